@@ -1,11 +1,14 @@
 from flask import Flask, session, g, request
 
 from .config import Config
+from . import notification_context
 from .deps import build_dependencies
+from .observability import metrics, query_trace
 from .routes.visitor_routes import visitor_bp
 from .routes.auth_routes import auth_bp
 from .routes.tenant_routes import tenant_bp
 from .routes.admin_routes import admin_bp
+from .services.idempotency import new_idempotency_key
 from .services.notification_service import NotificationService
 
 
@@ -26,18 +29,21 @@ def create_app():
     app.register_blueprint(tenant_bp, url_prefix="/tenant")
     app.register_blueprint(admin_bp, url_prefix="/admin")
 
-    @app.context_processor
-    def inject_notifications():
-        user_id = session.get("user_id")
-        deps = app.config.get("deps", {})
-        notification_service: NotificationService = deps.get("notification_service")
-        notifications = []
-        if user_id and notification_service:
-            notifications = notification_service.get_unread(user_id, limit=8)
-        return {
-            "notifications_unread": notifications,
-            "notifications_count": len(notifications) if notifications else 0,
-        }
+    # Latencia por ruta y render de plantillas (expuesto en /admin/metrics)
+    metrics.init_app(app)
+    # Consultas por petición y detección de N+1 (?_trace=1 en modo debug)
+    query_trace.init_app(app)
+
+    # Notificaciones en vivo (SSE)
+    app.config.setdefault("NOTIFICATION_STREAM", Config.NOTIFICATION_STREAM)
+    app.config.setdefault("NOTIFICATION_STREAM_HEARTBEAT", Config.NOTIFICATION_STREAM_HEARTBEAT)
+    app.config.setdefault("NOTIFICATION_STREAM_MAX_SECONDS", Config.NOTIFICATION_STREAM_MAX_SECONDS)
+
+    # Campana: no leídas cargadas solo si la plantilla las usa
+    notification_context.init_app(app)
+
+    # Clave única por formulario de pago/reporte (reintentos no duplican el envío)
+    app.jinja_env.globals["new_idempotency_key"] = new_idempotency_key
 
     @app.before_request
     def mark_notification_as_read():
@@ -47,6 +53,7 @@ def create_app():
             deps = app.config.get("deps", {})
             notification_service: NotificationService = deps.get("notification_service")
             if notification_service:
-                notification_service.mark_as_read(notif_id, user_id)
+                # Se escribe en el próximo lote; la página ya la muestra como leída
+                notification_service.mark_as_read(notif_id, user_id, defer=True)
 
     return app
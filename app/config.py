@@ -23,10 +23,46 @@ class Config:
     
     # Storage
     STORAGE_BUCKET: str = os.getenv("STORAGE_BUCKET", "comprobantes")
+    # Comprobantes de pago: pueden ir a un bucket privado (se muestran con URLs
+    # firmadas de RECEIPTS_SIGNED_URL_TTL segundos, cacheadas por proceso)
+    RECEIPTS_BUCKET: str = os.getenv("RECEIPTS_BUCKET", "") or STORAGE_BUCKET
+    RECEIPTS_PRIVATE: bool = os.getenv("RECEIPTS_PRIVATE", "False").lower() == "true"
+    RECEIPTS_SIGNED_URL_TTL: int = int(os.getenv("RECEIPTS_SIGNED_URL_TTL", "3600"))
     
     # Debug
     DEBUG: bool = os.getenv("FLASK_DEBUG", "False").lower() == "true"
 
+    # Traza de consultas: avisa si una misma consulta se repite más de N veces por petición
+    QUERY_TRACE: bool = os.getenv("QUERY_TRACE", "True").lower() == "true"
+    QUERY_REPEAT_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+    # Hash de contraseñas (método de werkzeug, ej: "scrypt", "pbkdf2:sha256:600000").
+    # Los hashes guardados con otro método se actualizan en el siguiente login.
+    PASSWORD_HASH_METHOD: str = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # Hashes simultáneos como máximo y segundos de espera por un cupo (luego 503)
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+    # Notificaciones en vivo (SSE en /auth/notifications/stream).
+    # Canal entre procesos: "local" (un solo proceso) o "postgres" (LISTEN/NOTIFY,
+    # requiere psycopg, DATABASE_URL y database/notifications_notify.sql)
+    # Desactivado por defecto: cada stream ocupa un hilo hasta 300 s y Vercel
+    # acumula la respuesta en lugar de enviarla por partes
+    NOTIFICATION_STREAM: bool = os.getenv("NOTIFICATION_STREAM", "False").lower() == "true"
+    NOTIFICATION_CHANNEL: str = os.getenv("NOTIFICATION_CHANNEL", "local")
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Segundos entre heartbeats y duración máxima de un stream (luego el navegador reconecta)
+    NOTIFICATION_STREAM_HEARTBEAT: int = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "15"))
+    NOTIFICATION_STREAM_MAX_SECONDS: int = int(os.getenv("NOTIFICATION_STREAM_MAX_SECONDS", "300"))
+    # Marcas de leído (?notif_id=) en lotes: se escriben cada N segundos o al juntar
+    # N marcas. Desactivado por defecto en Vercel (VERCEL=1): el proceso se congela
+    # entre peticiones y puede reciclarse con marcas pendientes
+    NOTIFICATION_READ_BUFFER: bool = os.getenv(
+        "NOTIFICATION_READ_BUFFER", "False" if os.getenv("VERCEL") else "True"
+    ).lower() == "true"
+    NOTIFICATION_READ_FLUSH_SECONDS: float = float(os.getenv("NOTIFICATION_READ_FLUSH_SECONDS", "2"))
+    NOTIFICATION_READ_FLUSH_SIZE: int = int(os.getenv("NOTIFICATION_READ_FLUSH_SIZE", "50"))
+
     # SMTP / Email
     SMTP_HOST: str = os.getenv("SMTP_HOST", "")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
@@ -34,6 +70,22 @@ class Config:
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     SMTP_FROM: str = os.getenv("SMTP_FROM", "")
     SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "True").lower() == "true"
+    # Correos "al momento" en un hilo aparte (la petición no espera al SMTP).
+    # Desactivado por defecto en Vercel (VERCEL=1): el proceso se congela al
+    # responder y el envío pendiente puede perderse, así que se envía antes
+    EMAIL_BACKGROUND: bool = os.getenv(
+        "EMAIL_BACKGROUND", "False" if os.getenv("VERCEL") else "True"
+    ).lower() == "true"
+
+    # Secreto del endpoint de tareas programadas (/admin/cron/*). Vercel Cron
+    # lo envía como "Authorization: Bearer <CRON_SECRET>". Vacío = deshabilitado.
+    CRON_SECRET: str = os.getenv("CRON_SECRET", "")
+    # El cron de resúmenes corre una vez al día (vercel.json en el plan Hobby):
+    # el panel solo ofrece "al momento" y "diario". Por defecto en Vercel (VERCEL=1);
+    # con un schedule cada hora (plan Pro) configurar DIGEST_CRON_DAILY=false
+    DIGEST_CRON_DAILY: bool = os.getenv(
+        "DIGEST_CRON_DAILY", "True" if os.getenv("VERCEL") else "False"
+    ).lower() == "true"
 
 
 
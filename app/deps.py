@@ -6,69 +6,310 @@ Aquí se conectan todas las piezas:
 - Repositorios
 - Servicios
 
-Retorna un diccionario con todos los servicios listos para usar en las rutas.
+Las dependencias se construyen de forma perezosa: cada cliente, repositorio o
+servicio se crea (e importa) recién la primera vez que una ruta lo pide. Así un
+arranque en frío (Vercel) que solo muestra el catálogo no paga por el cliente de
+Storage, SMTP, PDF, etc.
 """
 
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Callable, Iterable, List
 
-from .repositories.supabase.client import SupabaseClient
-from .repositories.supabase.user_repo import SupabaseUserRepository
-from .repositories.supabase.department_repo import SupabaseDepartmentRepository
-from .repositories.supabase.payment_repo import SupabasePaymentRepository
-from .repositories.supabase.report_repo import SupabaseReportRepository
-from .repositories.supabase.storage_repo import SupabaseStorageRepository
-from .repositories.supabase.notification_repo import SupabaseNotificationRepository
-from .repositories.supabase.rating_repo import SupabaseRatingRepository
+from .observability.metrics import instrument
 
-from .services.auth_service import AuthService
-from .services.department_service import DepartmentService
-from .services.payment_service import PaymentService
-from .services.report_service import ReportService
-from .services.notification_service import NotificationService
-from .services.email_service import EmailService
-from .services.rating_service import RatingService
 
+Provider = Callable[["LazyDependencies"], Any]
 
-def build_dependencies() -> Dict[str, Any]:
+
+class LazyDependencies:
+    """
+    Contenedor de dependencias con construcción perezosa.
+
+    Se usa igual que el diccionario que retornaba build_dependencies():
+    deps.get("auth_service"), deps["payment_service"], "x" in deps.
+    """
+
+    def __init__(self, providers: Dict[str, Provider], instrumented: Iterable[str] = ()):
+        self._providers = providers
+        self._instrumented = set(instrumented)
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        provider = self._providers.get(name)
+        if provider is None:
+            return default
+        with self._lock:
+            if name not in self._instances:
+                instance = provider(self)
+                if name in self._instrumented:
+                    # Latencia y errores por método (ver /admin/metrics)
+                    instance = instrument(instance, name)
+                self._instances[name] = instance
+            return self._instances[name]
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._providers:
+            raise KeyError(name)
+        return self.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._providers
+
+    def keys(self) -> List[str]:
+        return list(self._providers)
+
+    def built(self) -> List[str]:
+        """Nombres de las dependencias ya construidas (útil para medir el arranque)"""
+        return list(self._instances)
+
+
+# ---------------------------------------------------------------------------
+# Proveedores: los imports van dentro de cada función para diferir su costo
+# ---------------------------------------------------------------------------
+
+def _client(deps: LazyDependencies):
+    from .repositories.supabase.client import SupabaseClient
+    return SupabaseClient.get_client()
+
+
+def _user_repo(deps: LazyDependencies):
+    from .repositories.supabase.user_repo import SupabaseUserRepository
+    return SupabaseUserRepository(deps.get("client"))
+
+
+def _department_repo(deps: LazyDependencies):
+    from .repositories.supabase.department_repo import SupabaseDepartmentRepository
+    return SupabaseDepartmentRepository(deps.get("client"))
+
+
+def _payment_repo(deps: LazyDependencies):
+    from .repositories.supabase.payment_repo import SupabasePaymentRepository
+    return SupabasePaymentRepository(deps.get("client"))
+
+
+def _report_repo(deps: LazyDependencies):
+    from .repositories.supabase.report_repo import SupabaseReportRepository
+    return SupabaseReportRepository(deps.get("client"))
+
+
+def _storage_repo(deps: LazyDependencies):
+    # Cliente con SUPABASE_SERVICE_ROLE_KEY, no el cliente compartido (anon key):
+    # la política de DELETE del bucket es solo para service_role (ver
+    # docs/SETUP_SUPABASE_STORAGE.md) y eliminar imágenes o huérfanos la
+    # necesita. Sin esa key SupabaseClient usa la anon key, como antes.
+    from .repositories.supabase.storage_repo import SupabaseStorageRepository
+    return SupabaseStorageRepository()
+
+
+def _receipt_storage_repo(deps: LazyDependencies):
+    # Comprobantes: bucket propio, opcionalmente privado (URLs firmadas)
+    from .config import Config
+    from .repositories.supabase.storage_repo import SupabaseStorageRepository
+    return SupabaseStorageRepository(
+        bucket=Config.RECEIPTS_BUCKET,
+        private=Config.RECEIPTS_PRIVATE,
+        signed_url_ttl=Config.RECEIPTS_SIGNED_URL_TTL
+    )
+
+
+def _notification_repo(deps: LazyDependencies):
+    from .repositories.supabase.notification_repo import SupabaseNotificationRepository
+    return SupabaseNotificationRepository(deps.get("client"))
+
+
+def _email_digest_repo(deps: LazyDependencies):
+    from .repositories.supabase.email_digest_repo import SupabaseEmailDigestRepository
+    return SupabaseEmailDigestRepository(deps.get("client"))
+
+
+def _idempotency_repo(deps: LazyDependencies):
+    from .repositories.supabase.idempotency_repo import SupabaseIdempotencyRepository
+    return SupabaseIdempotencyRepository(deps.get("client"))
+
+
+def _rating_repo(deps: LazyDependencies):
+    from .repositories.supabase.rating_repo import SupabaseRatingRepository
+    return SupabaseRatingRepository(deps.get("client"))
+
+
+def _password_hasher(deps: LazyDependencies):
+    from .config import Config
+    from .services.password_hasher import PasswordHasher
+    return PasswordHasher(
+        method=Config.PASSWORD_HASH_METHOD,
+        max_concurrency=Config.PASSWORD_HASH_CONCURRENCY,
+        queue_timeout=Config.PASSWORD_HASH_QUEUE_TIMEOUT,
+    )
+
+
+def _auth_service(deps: LazyDependencies):
+    from .services.auth_service import AuthService
+    return AuthService(deps.get("user_repo"), deps.get("password_hasher"))
+
+
+def _recommendation_service(deps: LazyDependencies):
+    from .services.recommendation_service import RecommendationService
+    return RecommendationService(deps.get("department_repo"))
+
+
+def _department_service(deps: LazyDependencies):
+    from .services.department_service import DepartmentService
+    return DepartmentService(
+        deps.get("department_repo"),
+        # Storage y recomendaciones se resuelven recién cuando se usan
+        storage_repo=_LazyAttribute(deps, "storage_repo"),
+        user_repo=deps.get("user_repo"),
+        recommendation_service=_LazyAttribute(deps, "recommendation_service")
+    )
+
+
+def _department_import_service(deps: LazyDependencies):
+    from .services.department_import import DepartmentImportService
+    return DepartmentImportService(deps.get("department_service"))
+
+
+def _payment_service(deps: LazyDependencies):
+    from .services.payment_service import PaymentService
+    return PaymentService(deps.get("payment_repo"), _LazyAttribute(deps, "receipt_storage_repo"))
+
+
+def _report_service(deps: LazyDependencies):
+    from .services.report_service import ReportService
+    return ReportService(deps.get("report_repo"))
+
+
+def _notification_broker(deps: LazyDependencies):
+    from .config import Config
+    from .services.notification_broker import NotificationBroker, build_channel
+    return NotificationBroker(build_channel(Config.NOTIFICATION_CHANNEL, Config.DATABASE_URL))
+
+
+def _notification_service(deps: LazyDependencies):
+    from .config import Config
+    from .services.notification_service import NotificationService
+    from .services.read_mark_buffer import ReadMarkBuffer
+    repo = deps.get("notification_repo")
+    read_buffer = None
+    if Config.NOTIFICATION_READ_BUFFER:
+        read_buffer = ReadMarkBuffer(
+            repo.mark_many_as_read,
+            max_size=Config.NOTIFICATION_READ_FLUSH_SIZE,
+            interval=Config.NOTIFICATION_READ_FLUSH_SECONDS,
+        )
+    # El broker (y el hilo LISTEN del canal postgres) se crea al publicar la primera notificación
+    return NotificationService(repo, _LazyAttribute(deps, "notification_broker"), read_buffer)
+
+
+def _email_service(deps: LazyDependencies):
+    from .services.email_service import EmailService
+    return EmailService()
+
+
+def _email_digest_service(deps: LazyDependencies):
+    from .config import Config
+    from .services.email_digest import EmailDigestService
+    return EmailDigestService(
+        deps.get("email_digest_repo"),
+        deps.get("user_repo"),
+        deps.get("email_service"),
+        cron_daily=Config.DIGEST_CRON_DAILY,
+    )
+
+
+def _idempotency_service(deps: LazyDependencies):
+    from .services.idempotency import IdempotencyService
+    return IdempotencyService(deps.get("idempotency_repo"))
+
+
+def _storage_gc_service(deps: LazyDependencies):
+    from .services.storage_gc import StorageGCService
+    return StorageGCService(
+        [deps.get("storage_repo"), deps.get("receipt_storage_repo")],
+        deps.get("department_repo"),
+        deps.get("payment_repo"),
+        deps.get("report_repo"),
+    )
+
+
+def _rating_service(deps: LazyDependencies):
+    from .services.rating_service import RatingService
+    return RatingService(deps.get("rating_repo"))
+
+
+class _LazyAttribute:
     """
-    Construye todas las dependencias y retorna un diccionario con los servicios.
-    
-    Returns:
-        Dict con las siguientes claves:
-        - auth_service: AuthService
-        - department_service: DepartmentService
-        - payment_service: PaymentService
-        - report_service: ReportService
+    Referencia a una dependencia que se construye en el primer uso de uno de
+    sus atributos (ej: storage_repo.upload_file). Evita crear el cliente de
+    Storage cuando un servicio se construye pero nunca sube archivos.
+    """
+
+    def __init__(self, deps: LazyDependencies, name: str):
+        self._deps = deps
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._deps.get(self._name), attr)
+
+    def __bool__(self) -> bool:
+        return self._name in self._deps
+
+
+PROVIDERS: Dict[str, Provider] = {
+    "client": _client,
+    "user_repo": _user_repo,
+    "department_repo": _department_repo,
+    "payment_repo": _payment_repo,
+    "report_repo": _report_repo,
+    "storage_repo": _storage_repo,
+    "receipt_storage_repo": _receipt_storage_repo,
+    "notification_repo": _notification_repo,
+    "email_digest_repo": _email_digest_repo,
+    "idempotency_repo": _idempotency_repo,
+    "rating_repo": _rating_repo,
+    "password_hasher": _password_hasher,
+    "auth_service": _auth_service,
+    "recommendation_service": _recommendation_service,
+    "department_service": _department_service,
+    "department_import_service": _department_import_service,
+    "payment_service": _payment_service,
+    "report_service": _report_service,
+    "notification_broker": _notification_broker,
+    "notification_service": _notification_service,
+    "email_service": _email_service,
+    "email_digest_service": _email_digest_service,
+    "idempotency_service": _idempotency_service,
+    "storage_gc_service": _storage_gc_service,
+    "rating_service": _rating_service,
+}
+
+
+# Dependencias que se envuelven con métricas de latencia (repositorios y SMTP)
+INSTRUMENTED = (
+    "user_repo",
+    "department_repo",
+    "payment_repo",
+    "report_repo",
+    "storage_repo",
+    "receipt_storage_repo",
+    "notification_repo",
+    "email_digest_repo",
+    "idempotency_repo",
+    "rating_repo",
+    "email_service",
+)
+
+
+def build_dependencies() -> LazyDependencies:
     """
-    # Cliente Supabase
-    client = SupabaseClient.get_client()
-    
-    # Repositorios
-    user_repo = SupabaseUserRepository(client)
-    department_repo = SupabaseDepartmentRepository(client)
-    payment_repo = SupabasePaymentRepository(client)
-    report_repo = SupabaseReportRepository(client)
-    storage_repo = SupabaseStorageRepository(client)
-    notification_repo = SupabaseNotificationRepository(client)
-    rating_repo = SupabaseRatingRepository(client)
-    
-    # Servicios (inyección de dependencias)
-    auth_service = AuthService(user_repo)
-    department_service = DepartmentService(department_repo, storage_repo, user_repo)
-    payment_service = PaymentService(payment_repo, storage_repo)
-    report_service = ReportService(report_repo)
-    notification_service = NotificationService(notification_repo)
-    email_service = EmailService()
-    rating_service = RatingService(rating_repo)
-    
-    return {
-        "auth_service": auth_service,
-        "department_service": department_service,
-        "payment_service": payment_service,
-        "report_service": report_service,
-        "notification_service": notification_service,
-        "email_service": email_service,
-        "rating_service": rating_service,
-        "storage_repo": storage_repo
-    }
+    Retorna el contenedor de dependencias (nada se construye todavía).
 
+    Claves disponibles:
+        - auth_service, department_service, department_import_service, payment_service, report_service,
+          notification_service, notification_broker, email_service, email_digest_service, rating_service,
+          recommendation_service
+        - storage_repo y el resto de repositorios (*_repo), client, password_hasher
+    """
+    return LazyDependencies(PROVIDERS, INSTRUMENTED)
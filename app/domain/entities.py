@@ -4,8 +4,12 @@ from typing import Optional
 
 from .enums import DepartmentStatus, PaymentStatus, ReportStatus, UserRole
 
+# slots=True: las entidades no tienen __dict__ por instancia, lo que reduce la
+# memoria y el costo de crear miles de ellas en los listados (Python 3.10+).
+# Los repositorios las construyen con argumentos posicionales en
+# _rows_to_entities: agregar campos nuevos al final de cada clase.
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """Entidad Usuario"""
     id: str
@@ -16,9 +20,12 @@ class User:
     password_hash: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # Admins: minutos entre correos resumen (None = un correo por evento)
+    email_digest_minutes: Optional[int] = None
+    email_digest_sent_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Notification:
     """Entidad Notificación"""
     id: str
@@ -29,9 +36,10 @@ class Notification:
     type: Optional[str]
     is_read: bool
     created_at: Optional[datetime] = None
+    count: int = 1  # Eventos agrupados en esta notificación (coalesce_key)
 
 
-@dataclass
+@dataclass(slots=True)
 class Department:
     """Entidad Departamento"""
     id: str
@@ -57,7 +65,7 @@ class Department:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     """Entidad Pago"""
     id: str
@@ -73,7 +81,49 @@ class Payment:
     reviewed_by: Optional[str] = None  # ID del admin que revisó
 
 
-@dataclass
+@dataclass(slots=True)
+class PaymentApproval:
+    """Resultado de aprobar un pago (función approve_payment de la BD)"""
+    payment: Payment
+    tenant_email: Optional[str] = None
+    department_title: Optional[str] = None
+    department_assigned: bool = False  # Se asignó al inquilino y se marcó ocupado
+    already_reviewed: bool = False  # No estaba pendiente: no se aprobó ni notificó de nuevo
+
+
+@dataclass(slots=True)
+class PaymentReview:
+    """Resultado por pago de una revisión en lote (función review_payments de la BD)"""
+    payment_id: str
+    result: str  # approved | rejected | not_found | already_reviewed | missing_receipt
+    payment: Optional[Payment] = None  # Solo si se revisó
+    tenant_email: Optional[str] = None
+    department_title: Optional[str] = None
+    department_assigned: bool = False
+
+
+@dataclass(slots=True)
+class DigestEvent:
+    """Evento pendiente de enviarse en el correo resumen de un admin"""
+    id: str
+    user_id: str
+    subject: str
+    body: str
+    created_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class IdempotencyKey:
+    """Envío de formulario ya recibido (pago, reporte), para no procesarlo dos veces"""
+    key: str
+    user_id: str
+    scope: str
+    result_id: Optional[str] = None  # ID creado por el envío original (None = en proceso)
+    created_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
 class Report:
     """Entidad Reporte"""
     id: str
@@ -89,7 +139,7 @@ class Report:
     resolved_by: Optional[str] = None  # ID del admin que resolvió
 
 
-@dataclass
+@dataclass(slots=True)
 class Rating:
     """Entidad Calificación"""
     id: str
@@ -0,0 +1,147 @@
+"""
+Notificaciones de la campana en el contexto de las plantillas.
+
+`notifications_unread` y `notifications_count` son proxies perezosos: la
+consulta de no leídas se ejecuta la primera vez que una plantilla usa
+cualquiera de los dos (una sola consulta para ambos). Las plantillas que no
+muestran la campana (páginas de error, correos, PDF) no consultan nada.
+
+Cada petición que renderiza una plantilla con un usuario en sesión cuenta en
+/admin/metrics (pucehogar_events_total{event="notification_context"}) por
+endpoint y resultado: loaded, skipped (no se usó) o streamed (el navegador
+las tiene por el stream SSE, ver STREAM_COOKIE).
+"""
+
+from typing import Callable, Iterator, List, Optional
+
+from flask import Flask, g, request, session
+
+from .domain.entities import Notification
+from .observability.metrics import count_event
+from .services.notification_broker import STREAM_COOKIE
+
+# Notificaciones que muestra la campana
+BELL_LIMIT = 8
+
+
+class UnreadNotifications:
+    """Carga las no leídas del usuario una sola vez, la primera vez que se piden"""
+
+    def __init__(self, loader: Callable[[], List[Notification]]):
+        self._loader = loader
+        self._items: Optional[List[Notification]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._items is not None
+
+    def get(self) -> List[Notification]:
+        if self._items is None:
+            self._items = self._loader() or []
+        return self._items
+
+
+class LazyUnreadList:
+    """notifications_unread: se comporta como la lista de no leídas"""
+
+    __slots__ = ("_source",)
+
+    def __init__(self, source: UnreadNotifications):
+        self._source = source
+
+    def __iter__(self) -> Iterator[Notification]:
+        return iter(self._source.get())
+
+    def __len__(self) -> int:
+        return len(self._source.get())
+
+    def __bool__(self) -> bool:
+        return bool(self._source.get())
+
+    def __getitem__(self, index):
+        return self._source.get()[index]
+
+    def __repr__(self) -> str:
+        return repr(self._source.get())
+
+
+class LazyUnreadCount:
+    """notifications_count: se comporta como el entero len(no leídas)"""
+
+    __slots__ = ("_source",)
+
+    def __init__(self, source: UnreadNotifications):
+        self._source = source
+
+    def __int__(self) -> int:
+        return len(self._source.get())
+
+    __index__ = __int__
+
+    def __bool__(self) -> bool:
+        return int(self) > 0
+
+    def __eq__(self, other) -> bool:
+        return int(self) == other
+
+    def __ne__(self, other) -> bool:
+        return int(self) != other
+
+    def __lt__(self, other) -> bool:
+        return int(self) < other
+
+    def __le__(self, other) -> bool:
+        return int(self) <= other
+
+    def __gt__(self, other) -> bool:
+        return int(self) > other
+
+    def __ge__(self, other) -> bool:
+        return int(self) >= other
+
+    def __hash__(self) -> int:
+        return hash(int(self))
+
+    def __str__(self) -> str:
+        return str(int(self))
+
+    __repr__ = __str__
+
+
+def init_app(app: Flask) -> None:
+    """Registra el context processor de la campana y su métrica por endpoint"""
+
+    @app.context_processor
+    def inject_notifications():
+        user_id = session.get("user_id")
+        # Con un stream abierto el navegador ya tiene las notificaciones: no consultar
+        streamed = bool(
+            user_id and app.config["NOTIFICATION_STREAM"] and request.cookies.get(STREAM_COOKIE)
+        )
+        source = g.get("_notification_context")
+        if source is None:
+            notification_service = app.config.get("deps", {}).get("notification_service")
+            if user_id and notification_service and not streamed:
+                source = UnreadNotifications(lambda: notification_service.get_unread(user_id, limit=BELL_LIMIT))
+            else:
+                source = UnreadNotifications(list)
+            if user_id:
+                # Varias plantillas en la misma petición comparten la consulta
+                g._notification_context = source
+                g._notification_context_streamed = streamed
+        return {
+            "notifications_unread": LazyUnreadList(source),
+            "notifications_count": LazyUnreadCount(source),
+            "notifications_streamed": streamed,
+        }
+
+    @app.teardown_request
+    def _notification_context_metric(exc):
+        source = g.pop("_notification_context", None)
+        if source is None:
+            return
+        if g.pop("_notification_context_streamed", False):
+            outcome = "streamed"
+        else:
+            outcome = "loaded" if source.loaded else "skipped"
+        count_event("notification_context", outcome=outcome, endpoint=request.endpoint or "-")
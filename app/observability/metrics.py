@@ -0,0 +1,278 @@
+"""
+Métricas de latencia y errores en formato de texto de Prometheus.
+
+- Cada hilo escribe en su propio "shard" (threading.local), sin locks en el
+  camino caliente; el lock solo se toma la primera vez que un hilo registra
+  algo y al exportar (/admin/metrics), donde se suman todos los shards. Los
+  shards de hilos que ya terminaron se suman a un shard base y se descartan,
+  así la lista no crece con cada hilo que el servidor crea y destruye.
+- instrument(obj, component) envuelve los métodos públicos de un repositorio
+  o servicio y mide cada llamada, etiquetada con el endpoint de Flask actual.
+- init_app(app) agrega la latencia por ruta y el tiempo de render de plantillas.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, g, has_request_context, request, template_rendered, before_render_template
+
+
+# Límites superiores de los buckets (segundos)
+BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+OPERATION_METRIC = "pucehogar_operation_duration_seconds"
+OPERATION_ERRORS = "pucehogar_operation_errors_total"
+REQUEST_METRIC = "pucehogar_http_request_duration_seconds"
+COUNTER_METRIC = "pucehogar_events_total"
+
+HELP = {
+    OPERATION_METRIC: "Latencia de repositorios, servicios externos y plantillas",
+    OPERATION_ERRORS: "Errores (excepciones) en repositorios y servicios externos",
+    REQUEST_METRIC: "Latencia por endpoint de Flask",
+    COUNTER_METRIC: "Contadores de eventos de la aplicación",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """Acumuladores de un solo hilo"""
+
+    __slots__ = ("histograms", "counters")
+
+    def __init__(self) -> None:
+        # (métrica, labels) -> [conteo, suma, bucket_0, ..., bucket_n]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        # (métrica, labels) -> valor
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+    def add(self, other: "_Shard") -> None:
+        """Suma los valores de otro shard"""
+        # dict.copy() es atómico bajo el GIL aunque el hilo dueño siga escribiendo
+        for key, values in other.histograms.copy().items():
+            total = self.histograms.setdefault(key, [0.0] * len(values))
+            for i, value in enumerate(list(values)):
+                total[i] += value
+        for key, value in other.counters.copy().items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class MetricsRegistry:
+    """Registro de histogramas y contadores con agregación por hilo"""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._retired = _Shard()  # Acumulado de los hilos que ya terminaron
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._lock:
+                self._fold_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_dead_shards(self) -> None:
+        """Suma al shard base los de hilos terminados y los descarta (con el lock tomado)"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._retired.add(shard)  # El hilo ya no escribe en él
+        self._shards = alive
+
+    def observe(self, metric: str, labels: Labels, seconds: float) -> None:
+        """Registra una observación en un histograma"""
+        histograms = self._shard().histograms
+        key = (metric, labels)
+        values = histograms.get(key)
+        if values is None:
+            values = [0.0] * (len(self.buckets) + 3)
+            histograms[key] = values
+        values[0] += 1
+        values[1] += seconds
+        values[2 + bisect_left(self.buckets, seconds)] += 1
+
+    def inc(self, metric: str, labels: Labels, amount: float = 1) -> None:
+        """Incrementa un contador"""
+        counters = self._shard().counters
+        key = (metric, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            for _, shard in self._shards:
+                shard.histograms.clear()
+                shard.counters.clear()
+            self._retired = _Shard()
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, Labels], List[float]], Dict[Tuple[str, Labels], float]]:
+        """Suma todos los shards (histogramas, contadores)"""
+        total = _Shard()
+        with self._lock:
+            self._fold_dead_shards()
+            total.add(self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            total.add(shard)
+        return total.histograms, total.counters
+
+    def render(self) -> str:
+        """Exporta en formato de texto de Prometheus (version 0.0.4)"""
+        histograms, counters = self.snapshot()
+        lines: List[str] = []
+
+        by_metric: Dict[str, List[Tuple[Labels, List[float]]]] = {}
+        for (metric, labels), values in histograms.items():
+            by_metric.setdefault(metric, []).append((labels, values))
+        for metric in sorted(by_metric):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, values in sorted(by_metric[metric]):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, values[2:]):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_labels(labels, ('le', _number(bound)))} {_number(cumulative)}")
+                lines.append(f"{metric}_bucket{_labels(labels, ('le', '+Inf'))} {_number(values[0])}")
+                lines.append(f"{metric}_sum{_labels(labels)} {values[1]!r}")
+                lines.append(f"{metric}_count{_labels(labels)} {_number(values[0])}")
+
+        counter_metrics: Dict[str, List[Tuple[Labels, float]]] = {}
+        for (metric, labels), value in counters.items():
+            counter_metrics.setdefault(metric, []).append((labels, value))
+        for metric in sorted(counter_metrics):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(counter_metrics[metric]):
+                lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+registry = MetricsRegistry()
+
+
+def current_endpoint() -> str:
+    """Endpoint de Flask de la petición actual ("-" fuera de una petición)"""
+    if has_request_context():
+        return request.endpoint or "-"
+    return "-"
+
+
+def observe_operation(component: str, operation: str, seconds: float, error: bool = False) -> None:
+    labels = (("component", component), ("operation", operation), ("endpoint", current_endpoint()))
+    registry.observe(OPERATION_METRIC, labels, seconds)
+    if error:
+        registry.inc(OPERATION_ERRORS, labels)
+
+
+def count_event(event: str, amount: float = 1, **labels: str) -> None:
+    """Contador genérico (ej: filas eliminadas por un job)"""
+    registry.inc(COUNTER_METRIC, (("event", event),) + tuple(sorted(labels.items())), amount)
+
+
+class _Instrumented:
+    """Proxy que mide la latencia de los métodos públicos del objeto envuelto"""
+
+    def __init__(self, target: Any, component: str):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_component", component)
+        object.__setattr__(self, "_wrapped", {})
+
+    def __getattr__(self, name: str) -> Any:
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        value = getattr(self._target, name)
+        if name.startswith("_") or not callable(value):
+            return value
+        wrapped = _timed(value, self._component, name)
+        self._wrapped[name] = wrapped
+        return wrapped
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target, name, value)
+        self._wrapped.pop(name, None)
+
+    def __repr__(self) -> str:
+        return f"<instrumented {self._component}: {self._target!r}>"
+
+
+def _timed(method, component: str, operation: str):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            observe_operation(component, operation, time.perf_counter() - start, error=True)
+            raise
+        observe_operation(component, operation, time.perf_counter() - start)
+        return result
+    return wrapper
+
+
+def instrument(target: Any, component: str) -> Any:
+    """Envuelve un repositorio/servicio para medir cada llamada a sus métodos públicos"""
+    return _Instrumented(target, component)
+
+
+def init_app(app: Flask) -> None:
+    """Registra la latencia por endpoint y el tiempo de render de plantillas"""
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            registry.observe(
+                REQUEST_METRIC,
+                (
+                    ("endpoint", request.endpoint or "-"),
+                    ("method", request.method),
+                    ("status", str(response.status_code)),
+                ),
+                time.perf_counter() - start,
+            )
+        return response
+
+    def _template_start(sender, template, context, **extra):
+        stack = g.setdefault("_metrics_templates", [])
+        stack.append(time.perf_counter())
+
+    def _template_done(sender, template, context, **extra):
+        stack = g.get("_metrics_templates")
+        if stack:
+            observe_operation("template", template.name or "-", time.perf_counter() - stack.pop())
+
+    before_render_template.connect(_template_start, app, weak=False)
+    template_rendered.connect(_template_done, app, weak=False)
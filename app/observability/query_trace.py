@@ -0,0 +1,222 @@
+"""
+Traza de consultas a Supabase por petición y detección de N+1.
+
+- install(client) registra "event hooks" de httpx en las sesiones de PostgREST
+  (y Storage) del cliente: cada llamada HTTP queda anotada en la traza de la
+  petición de Flask en curso con su "forma" (método, tabla y filtros sin
+  valores), su duración y el punto del código de la app que la originó.
+- init_app(app) abre una traza por petición y, al terminar, avisa si una misma
+  forma se repitió más de QUERY_REPEAT_THRESHOLD veces (típico de un bucle que
+  consulta de a un registro). Con app.testing se lanza NPlusOneQueryError con
+  los puntos de llamada, para que el test falle.
+- En modo debug, agregar ?_trace=1 a cualquier URL devuelve la traza en JSON
+  en lugar de la página, y toda respuesta incluye X-Query-Count.
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, has_request_context, jsonify, request
+
+from .metrics import current_endpoint
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(APP_DIR)
+OBSERVABILITY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cantidad de frames de la app que se guardan por llamada
+CALL_SITE_DEPTH = 4
+
+# Parámetros de PostgREST cuyo valor define la forma de la consulta
+STRUCTURAL_PARAMS = {"select", "order", "on_conflict", "columns"}
+
+
+class NPlusOneQueryError(AssertionError):
+    """Una misma consulta se repitió demasiadas veces en una petición (modo testing)"""
+
+
+class QueryTrace:
+    """Consultas realizadas durante una petición"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.queries: List[Dict[str, Any]] = []
+
+    def record(self, method: str, target: str, shape: str, call_site: List[str]) -> Dict[str, Any]:
+        entry = {
+            "method": method,
+            "target": target,
+            "shape": shape,
+            "call_site": call_site,
+            "start_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "duration_ms": None,
+            "status": None,
+        }
+        self.queries.append(entry)
+        return entry
+
+    def repeated(self, threshold: int) -> List[Dict[str, Any]]:
+        """Formas que se repiten más de threshold veces, con sus puntos de llamada"""
+        counts = Counter(q["shape"] for q in self.queries)
+        result = []
+        for shape, count in counts.most_common():
+            if count <= threshold:
+                break
+            sites = Counter(
+                " <- ".join(q["call_site"]) or "?" for q in self.queries if q["shape"] == shape
+            )
+            result.append({"shape": shape, "count": count, "call_sites": [s for s, _ in sites.most_common()]})
+        return result
+
+    def to_dict(self, threshold: int) -> Dict[str, Any]:
+        durations = [q["duration_ms"] for q in self.queries if q["duration_ms"] is not None]
+        return {
+            "endpoint": self.endpoint,
+            "query_count": len(self.queries),
+            "query_time_ms": round(sum(durations), 3),
+            "repeat_threshold": threshold,
+            "repeated": self.repeated(threshold),
+            "queries": self.queries,
+        }
+
+
+def current_trace() -> Optional[QueryTrace]:
+    if has_request_context():
+        return g.get("_query_trace")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Forma de la consulta
+# ---------------------------------------------------------------------------
+
+def _param_shape(key: str, value: str) -> str:
+    if key in STRUCTURAL_PARAMS:
+        # Listas de columnas largas se acortan para que el log sea legible
+        return f"{key}={value if len(value) <= 40 else value[:40] + '…'}"
+    if key in ("limit", "offset"):
+        return f"{key}=?"
+    if key in ("or", "and"):
+        return f"{key}=(?)"
+    # Filtros de PostgREST: "eq.123", "not.is.null", "in.(a,b)" -> solo el operador
+    parts = value.split(".", 2)
+    operator = ".".join(parts[:2]) if parts[0] == "not" and len(parts) > 1 else parts[0]
+    return f"{key}={operator}.?"
+
+
+def _target(path: str) -> str:
+    """Tabla, función RPC u operación de Storage a partir del path de la URL"""
+    parts = [p for p in path.split("/") if p]
+    if len(parts) >= 3 and parts[0] == "rest":
+        return "/".join(parts[2:4]) if parts[2] == "rpc" else parts[2]
+    if len(parts) >= 3 and parts[0] == "storage":
+        # storage/v1/object/<bucket>/<ruta...> -> storage:object/<bucket>
+        return "storage:" + "/".join(parts[2:4])
+    return path
+
+
+def query_shape(method: str, path: str, params) -> str:
+    filters = sorted(_param_shape(key, value) for key, value in params.multi_items())
+    shape = f"{method} {_target(path)}"
+    return f"{shape}?{'&'.join(filters)}" if filters else shape
+
+
+def _call_site() -> List[str]:
+    """Frames de la app (más interno primero), sin contar este módulo"""
+    sites = []
+    frame = sys._getframe(2)
+    while frame is not None and len(sites) < CALL_SITE_DEPTH:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(OBSERVABILITY_DIR):
+            relative = os.path.relpath(filename, ROOT_DIR)
+            sites.append(f"{relative}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return sites
+
+
+# ---------------------------------------------------------------------------
+# Hooks de httpx
+# ---------------------------------------------------------------------------
+
+def _on_request(http_request) -> None:
+    trace = current_trace()
+    if trace is None:
+        return
+    entry = trace.record(
+        http_request.method,
+        _target(http_request.url.path),
+        query_shape(http_request.method, http_request.url.path, http_request.url.params),
+        _call_site(),
+    )
+    http_request.extensions["query_trace"] = (entry, time.perf_counter())
+
+
+def _on_response(http_response) -> None:
+    pending = http_response.request.extensions.get("query_trace")
+    if pending is None:
+        return
+    entry, start = pending
+    # Tiempo hasta recibir la respuesta (el cuerpo se lee después del hook)
+    entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    entry["status"] = http_response.status_code
+
+
+def _hook_session(session) -> None:
+    hooks = session.event_hooks
+    if _on_request not in hooks["request"]:
+        hooks["request"].append(_on_request)
+        hooks["response"].append(_on_response)
+        session.event_hooks = hooks
+
+
+def install(client, storage: bool = False) -> None:
+    """Registra los hooks en las sesiones HTTP de un cliente de Supabase"""
+    _hook_session(client.postgrest.session)
+    if storage:
+        _hook_session(client.storage.session)
+
+
+# ---------------------------------------------------------------------------
+# Integración con Flask
+# ---------------------------------------------------------------------------
+
+def init_app(app: Flask) -> None:
+    """Abre una traza por petición y revisa consultas repetidas al terminar"""
+    from ..config import Config
+
+    app.config.setdefault("QUERY_TRACE", Config.QUERY_TRACE)
+    app.config.setdefault("QUERY_REPEAT_THRESHOLD", Config.QUERY_REPEAT_THRESHOLD)
+
+    @app.before_request
+    def _query_trace_start():
+        if app.config["QUERY_TRACE"]:
+            g._query_trace = QueryTrace(current_endpoint())
+
+    @app.after_request
+    def _query_trace_finish(response):
+        trace = g.pop("_query_trace", None)
+        if trace is None:
+            return response
+        threshold = app.config["QUERY_REPEAT_THRESHOLD"]
+        repeated = trace.repeated(threshold)
+        for item in repeated:
+            app.logger.warning(
+                "Posible N+1 en %s: %s se ejecutó %d veces (umbral %d). Llamadas desde: %s",
+                trace.endpoint, item["shape"], item["count"], threshold, " | ".join(item["call_sites"]),
+            )
+        if repeated and app.testing:
+            details = "\n".join(
+                f"  {item['shape']} x{item['count']}\n    " + "\n    ".join(item["call_sites"])
+                for item in repeated
+            )
+            raise NPlusOneQueryError(f"Consultas repetidas en {trace.endpoint} (umbral {threshold}):\n{details}")
+        if app.debug:
+            response.headers["X-Query-Count"] = str(len(trace.queries))
+            if request.args.get("_trace") == "1":
+                return jsonify(trace.to_dict(threshold))
+        return response
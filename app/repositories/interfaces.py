@@ -1,7 +1,7 @@
-from typing import Protocol, Optional, List
+from typing import Dict, Iterable, Iterator, Protocol, Optional, List, Tuple
 from datetime import datetime
 
-from ..domain.entities import Department, Payment, Report, User, Notification, Rating
+from ..domain.entities import DigestEvent, Department, IdempotencyKey, Payment, PaymentApproval, PaymentReview, Report, User, Notification, Rating
 from ..domain.enums import DepartmentStatus, PaymentStatus, ReportStatus
 
 
@@ -36,6 +36,18 @@ class UserRepository(Protocol):
         """Retorna True si existe al menos un admin"""
         ...
     
+    def set_email_digest(self, user_id: str, minutes: Optional[int]) -> bool:
+        """Guarda la preferencia de correo resumen (None = un correo por evento)"""
+        ...
+
+    def mark_digest_sent(self, user_id: str, sent_at: datetime) -> bool:
+        """Registra el envío del último correo resumen"""
+        ...
+    
+    def update_password_hash(self, user_id: str, password_hash: str) -> bool:
+        """Reemplaza solo el hash de la contraseña (ej: al regenerarlo en el login)"""
+        ...
+
     def unassign_department(self, department_id: str) -> int:
         """Desasigna un departamento de todos los usuarios que lo tengan asignado. Retorna el número de usuarios desasignados."""
         ...
@@ -56,10 +68,43 @@ class DepartmentRepository(Protocol):
         """Obtiene todos los departamentos, con filtros opcionales (características, rangos)"""
         ...
     
+    def search(
+        self,
+        text: Optional[str] = None,
+        status: Optional[DepartmentStatus] = None,
+        filters: Optional[dict] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Department]:
+        """Búsqueda de texto ordenada por relevancia, combinable con los mismos filtros de get_all"""
+        ...
+    
+    def get_all_paged(self, status: Optional[DepartmentStatus] = None, page_size: int = 1000) -> List[Department]:
+        """Todos los departamentos leídos por páginas (sin el tope de filas por respuesta)"""
+        ...
+    
+    def get_version(self) -> Optional[tuple]:
+        """Marca que cambia con cualquier alta, edición o baja de departamentos (None si falla)"""
+        ...
+    
+    def get_facets(
+        self,
+        text: Optional[str] = None,
+        status: Optional[DepartmentStatus] = None,
+        filters: Optional[dict] = None,
+        price_buckets: int = 5
+    ) -> Optional[dict]:
+        """Conteos por característica e histogramas de precio/habitaciones de todos los resultados"""
+        ...
+    
     def create(self, department: Department) -> Department:
         """Crea un nuevo departamento"""
         ...
     
+    def create_many(self, departments: List[Department]) -> List[Department]:
+        """Crea varios departamentos en una sola inserción"""
+        ...
+    
     def update(self, department: Department) -> Department:
         """Actualiza un departamento"""
         ...
@@ -67,6 +112,10 @@ class DepartmentRepository(Protocol):
     def delete(self, department_id: str) -> bool:
         """Elimina un departamento"""
         ...
+    
+    def iter_image_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """URLs de imágenes de todos los departamentos (por páginas)"""
+        ...
 
 
 class PaymentRepository(Protocol):
@@ -77,11 +126,28 @@ class PaymentRepository(Protocol):
         ...
     
     def get_by_tenant(self, tenant_id: str) -> List[Payment]:
-        """Obtiene pagos de un inquilino"""
+        """Obtiene pagos de un inquilino (más recientes primero)"""
         ...
     
     def get_by_status(self, status: PaymentStatus) -> List[Payment]:
-        """Obtiene pagos por estado"""
+        """Obtiene pagos por estado (más recientes primero)"""
+        ...
+    
+    def get_all(self) -> List[Payment]:
+        """Obtiene todos los pagos (más recientes primero)"""
+        ...
+    
+    def exists(
+        self,
+        tenant_id: str,
+        department_id: str,
+        status: Optional[PaymentStatus] = None
+    ) -> bool:
+        """Indica si el inquilino tiene algún pago del departamento (opcionalmente con un estado)"""
+        ...
+    
+    def latest_status_for(self, tenant_id: str, department_id: str) -> Optional[PaymentStatus]:
+        """Estado del pago más reciente del inquilino para el departamento (None si no hay)"""
         ...
     
     def create(self, payment: Payment) -> Payment:
@@ -100,6 +166,34 @@ class PaymentRepository(Protocol):
     ) -> Optional[Payment]:
         """Actualiza el estado de un pago"""
         ...
+    
+    def approve(
+        self,
+        payment_id: str,
+        reviewed_by: str,
+        notification_link: Optional[str] = None
+    ) -> Optional[PaymentApproval]:
+        """
+        Aprueba el pago, asigna el departamento al inquilino y crea la
+        notificación en una transacción. None si el pago no existe;
+        ValueError si no tiene comprobante.
+        """
+        ...
+    
+    def review_many(
+        self,
+        payment_ids: List[str],
+        status: PaymentStatus,
+        reviewed_by: str,
+        notes: Optional[str] = None,
+        notification_link_template: Optional[str] = None
+    ) -> List[PaymentReview]:
+        """Aprueba o rechaza en lote los pagos pendientes indicados (un resultado por pago)"""
+        ...
+    
+    def iter_receipt_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """Comprobantes de todos los pagos (por páginas)"""
+        ...
 
 
 class ReportRepository(Protocol):
@@ -141,6 +235,10 @@ class ReportRepository(Protocol):
     def update_notes(self, report_id: str, notes: Optional[str]) -> Optional[Report]:
         """Actualiza notas del reporte"""
         ...
+    
+    def iter_attachment_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """Adjuntos de todos los reportes (por páginas)"""
+        ...
 
 
 class NotificationRepository(Protocol):
@@ -150,6 +248,23 @@ class NotificationRepository(Protocol):
         """Crea una notificación"""
         ...
 
+    def notify_users(
+        self,
+        user_ids: List[str],
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        type: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window_seconds: int = 3600,
+    ) -> List[Notification]:
+        """Crea (o agrupa por coalesce_key) la notificación de cada usuario en una sola consulta"""
+        ...
+
+    def get_unread_since(self, user_id: str, since: datetime, limit: int = 50) -> List[Notification]:
+        """No leídas creadas después de `since` (más recientes primero)"""
+        ...
+    
     def get_unread_by_user(self, user_id: str, limit: int = 10) -> List[Notification]:
         """Obtiene notificaciones no leídas de un usuario"""
         ...
@@ -158,10 +273,18 @@ class NotificationRepository(Protocol):
         """Marca como leída una notificación si pertenece al usuario"""
         ...
 
+    def mark_many_as_read(self, user_id: str, notification_ids: List[str]) -> int:
+        """Marca varias notificaciones del usuario como leídas (una consulta); retorna cuántas"""
+        ...
+
     def mark_all_as_read(self, user_id: str) -> bool:
         """Marca todas las notificaciones del usuario como leídas"""
         ...
 
+    def purge_read(self, older_than: datetime, batch_size: int, archive: bool = False) -> int:
+        """Elimina (o archiva) un lote de leídas creadas antes de `older_than`; retorna cuántas"""
+        ...
+
 
 class StorageRepository(Protocol):
     """Interface para repositorio de almacenamiento"""
@@ -175,6 +298,54 @@ class StorageRepository(Protocol):
         """Sube un archivo y retorna la URL"""
         ...
     
+    def create_upload_url(self, file_name: str, folder: Optional[str] = None) -> dict:
+        """URL firmada para subir un archivo directo a Storage (path, signed_url, token)"""
+        ...
+    
+    def get_file_info(self, file_path: str) -> Optional[dict]:
+        """Tamaño y tipo de un objeto subido, None si no existe"""
+        ...
+    
+    def get_public_url(self, file_path: str) -> str:
+        """URL pública de un objeto"""
+        ...
+    
+    def file_reference(self, file_path: str) -> str:
+        """Valor a guardar en la BD para un objeto (URL pública o ruta si el bucket es privado)"""
+        ...
+    
+    def get_signed_url(self, file_path: str) -> str:
+        """URL firmada de un objeto"""
+        ...
+    
+    def get_signed_urls(self, file_paths: Iterable[str]) -> Dict[str, str]:
+        """URLs firmadas de varios objetos en una sola llamada"""
+        ...
+    
+    def resolve_urls(self, references: Iterable[str]) -> Dict[str, str]:
+        """URL para mostrar cada valor guardado con file_reference"""
+        ...
+    
+    def download_file(self, file_path: str) -> bytes:
+        """Descarga el contenido de un objeto"""
+        ...
+    
+    def read_file_head(self, file_path: str, size: int = 16) -> bytes:
+        """Primeros `size` bytes de un objeto, sin descargarlo completo"""
+        ...
+    
+    def object_path(self, reference: str) -> Optional[str]:
+        """Ruta en el bucket de un valor guardado; None si es de otro bucket o externo"""
+        ...
+    
+    def iter_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[dict]:
+        """Todos los objetos del bucket (path, size, created_at), listados por páginas"""
+        ...
+    
+    def delete_files(self, file_paths: List[str]) -> int:
+        """Elimina varios objetos en una sola llamada"""
+        ...
+    
     def delete_file(self, file_path: str) -> bool:
         """Elimina un archivo"""
         ...
@@ -211,7 +382,42 @@ class RatingRepository(Protocol):
         """Actualiza una calificación existente"""
         ...
     
+    def upsert(self, rating: Rating) -> Rating:
+        """Crea o reemplaza la calificación del tenant para el departamento (una sola escritura)"""
+        ...
+    
     def delete(self, rating_id: str) -> bool:
         """Elimina una calificación"""
         ...
 
+
+class EmailDigestRepository(Protocol):
+    """Interface para la cola de eventos de los correos resumen"""
+
+    def enqueue(self, events: List[DigestEvent]) -> int:
+        """Agrega eventos a la cola (una sola inserción); retorna cuántos"""
+        ...
+
+    def pop(self, user_id: str, until: datetime) -> List[DigestEvent]:
+        """Saca de la cola los eventos del usuario creados hasta `until` (más antiguos primero)"""
+        ...
+
+
+class IdempotencyRepository(Protocol):
+    """Interface para las claves de idempotencia de los formularios"""
+
+    def claim(self, record: IdempotencyKey) -> Tuple[Optional[IdempotencyKey], bool]:
+        """Registra la clave si no existe o expiró; retorna (fila, True si la registró esta llamada)"""
+        ...
+
+    def complete(self, key: str, result_id: str) -> bool:
+        """Guarda el ID creado por el envío original"""
+        ...
+
+    def release(self, key: str) -> bool:
+        """Elimina una clave sin resultado (el envío falló y puede reintentarse)"""
+        ...
+
+    def purge_expired(self, now: datetime) -> int:
+        """Elimina las claves expiradas; retorna cuántas"""
+        ...
@@ -2,6 +2,7 @@ from supabase import create_client, Client
 from typing import Optional
 
 from ...config import Config
+from ...observability import query_trace
 
 
 class SupabaseClient:
@@ -20,6 +21,7 @@ class SupabaseClient:
                     "Configúralos en variables de entorno o config_local.py"
                 )
             cls._instance = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            query_trace.install(cls._instance)
         return cls._instance
     
     @classmethod
@@ -36,5 +38,6 @@ class SupabaseClient:
                 print("   Para operaciones de Storage, configura SUPABASE_SERVICE_ROLE_KEY en config_local.py")
             
             cls._service_role_instance = create_client(Config.SUPABASE_URL, service_key)
+            query_trace.install(cls._service_role_instance, storage=True)
         return cls._service_role_instance
 
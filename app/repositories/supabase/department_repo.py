@@ -1,4 +1,6 @@
-from typing import Optional, List
+import re
+import unicodedata
+from typing import Iterable, Optional, List, Iterator
 from datetime import datetime
 
 from supabase import Client
@@ -6,6 +8,41 @@ from supabase import Client
 from ...domain.entities import Department
 from ...domain.enums import DepartmentStatus
 from .client import SupabaseClient
+from .hydration import enum_lookup, parse_timestamp
+from .streaming import stream_column_values
+
+
+_DEPARTMENT_STATUS = enum_lookup(DepartmentStatus)
+
+
+# Columnas que se leen de la tabla (se excluye search_vector para no transferirlo)
+DEPARTMENT_COLUMNS = (
+    "id,title,address,price,status,description,rooms,bathrooms,area,"
+    "image_url,image_url_2,image_url_3,has_terrace,has_balcony,sea_view,"
+    "parking,furnished,allow_pets,created_at,updated_at"
+)
+
+# Filtros booleanos soportados (características)
+FEATURE_FILTERS = ("has_terrace", "has_balcony", "sea_view", "parking", "furnished", "allow_pets")
+
+
+def fold_accents(text: str) -> str:
+    """Quita tildes y pasa a minúsculas ("Balcón" -> "balcon")"""
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c)).lower()
+
+
+def build_prefix_tsquery(text: str) -> Optional[str]:
+    """
+    Convierte el texto del usuario en un tsquery seguro con prefijos.
+
+    "Vista al már" -> "vista:* & al:* & mar:*"
+    Retorna None si no quedan términos válidos.
+    """
+    terms = re.findall(r"[0-9a-z]+", fold_accents(text or ""))
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms[:8])
 
 
 class SupabaseDepartmentRepository:
@@ -17,39 +54,70 @@ class SupabaseDepartmentRepository:
     
     def _row_to_entity(self, row: dict) -> Department:
         """Convierte una fila de BD a entidad Department"""
-        return Department(
-            id=str(row["id"]),
-            title=row["title"],
-            address=row["address"],
-            price=float(row["price"]),
-            status=DepartmentStatus(row["status"]),
-            description=row.get("description"),
-            rooms=row.get("rooms"),
-            bathrooms=row.get("bathrooms"),
-            area=float(row["area"]) if row.get("area") else None,
-            image_url=row.get("image_url"),
-            image_url_2=row.get("image_url_2"),
-            image_url_3=row.get("image_url_3"),
-            has_terrace=row.get("has_terrace", False) or False,
-            has_balcony=row.get("has_balcony", False) or False,
-            sea_view=row.get("sea_view", False) or False,
-            parking=row.get("parking", False) or False,
-            furnished=row.get("furnished", False) or False,
-            allow_pets=row.get("allow_pets", False) or False,
-            created_at=row.get("created_at"),
-            updated_at=row.get("updated_at")
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[Department]:
+        """Convierte filas de BD a entidades Department (argumentos en el orden de la dataclass)"""
+        status = _DEPARTMENT_STATUS
+        return [
+            Department(
+                str(row["id"]),
+                row["title"],
+                row["address"],
+                float(row["price"]),
+                status(row["status"]),
+                row.get("description"),
+                row.get("rooms"),
+                row.get("bathrooms"),
+                float(row["area"]) if row.get("area") else None,
+                row.get("image_url"),
+                row.get("image_url_2"),
+                row.get("image_url_3"),
+                row.get("has_terrace") or False,
+                row.get("has_balcony") or False,
+                row.get("sea_view") or False,
+                row.get("parking") or False,
+                row.get("furnished") or False,
+                row.get("allow_pets") or False,
+                parse_timestamp(row.get("created_at")),
+                parse_timestamp(row.get("updated_at")),
+            )
+            for row in rows
+        ]
     
     def get_by_id(self, department_id: str) -> Optional[Department]:
         """Obtiene un departamento por ID"""
         try:
-            result = self.client.table(self.table).select("*").eq("id", department_id).single().execute()
+            result = self.client.table(self.table).select(DEPARTMENT_COLUMNS).eq("id", department_id).single().execute()
             if result.data:
                 return self._row_to_entity(result.data)
             return None
         except Exception:
             return None
     
+    def _apply_filters(self, query, status: Optional[DepartmentStatus], filters: Optional[dict]):
+        """Aplica estado y filtros (características, rangos) a una consulta"""
+        if status:
+            query = query.eq("status", status.value)
+
+        if filters:
+            for feature in FEATURE_FILTERS:
+                if filters.get(feature) is True:
+                    query = query.eq(feature, True)
+            if filters.get("min_price") is not None:
+                query = query.gte("price", filters["min_price"])
+            if filters.get("max_price") is not None:
+                query = query.lte("price", filters["max_price"])
+            if filters.get("min_rooms") is not None:
+                query = query.gte("rooms", filters["min_rooms"])
+            if filters.get("max_rooms") is not None:
+                query = query.lte("rooms", filters["max_rooms"])
+        return query
+
+    def iter_image_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """URLs de imágenes de todos los departamentos, por páginas (ver streaming.py)"""
+        return stream_column_values(self.client, self.table, ("image_url", "image_url_2", "image_url_3"), page_size)
+
     def get_all(
         self,
         status: Optional[DepartmentStatus] = None,
@@ -57,41 +125,105 @@ class SupabaseDepartmentRepository:
     ) -> List[Department]:
         """Obtiene todos los departamentos con filtros opcionales"""
         try:
-            query = self.client.table(self.table).select("*")
-
-            if status:
-                query = query.eq("status", status.value)
-
-            if filters:
-                if filters.get("has_terrace") is True:
-                    query = query.eq("has_terrace", True)
-                if filters.get("has_balcony") is True:
-                    query = query.eq("has_balcony", True)
-                if filters.get("sea_view") is True:
-                    query = query.eq("sea_view", True)
-                if filters.get("parking") is True:
-                    query = query.eq("parking", True)
-                if filters.get("furnished") is True:
-                    query = query.eq("furnished", True)
-                if filters.get("min_price") is not None:
-                    query = query.gte("price", filters["min_price"])
-                if filters.get("max_price") is not None:
-                    query = query.lte("price", filters["max_price"])
-                if filters.get("min_rooms") is not None:
-                    query = query.gte("rooms", filters["min_rooms"])
-                if filters.get("max_rooms") is not None:
-                    query = query.lte("rooms", filters["max_rooms"])
-                if filters.get("allow_pets") is True:
-                    query = query.eq("allow_pets", True)
-
+            query = self.client.table(self.table).select(DEPARTMENT_COLUMNS)
+            query = self._apply_filters(query, status, filters)
             result = query.order("created_at", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
+
+    def get_all_paged(self, status: Optional[DepartmentStatus] = None, page_size: int = 1000) -> List[Department]:
+        """
+        Todos los departamentos por páginas de range() ordenadas por id, hasta una
+        página vacía (PostgREST recorta cada respuesta a max-rows). Los errores se propagan.
+        """
+        departments: List[Department] = []
+        offset = 0
+        while True:
+            query = self._apply_filters(self.client.table(self.table).select(DEPARTMENT_COLUMNS), status, None)
+            rows = query.order("id").range(offset, offset + page_size - 1).execute().data or []
+            if not rows:
+                return departments
+            departments.extend(self._rows_to_entities(rows))
+            offset += len(rows)
     
-    def create(self, department: Department) -> Department:
-        """Crea un nuevo departamento"""
-        data = {
+    def get_version(self) -> Optional[tuple]:
+        """
+        (cantidad de filas, último updated_at) de la tabla en una consulta de una
+        fila: cambia con cualquier alta, edición o baja. None si falla.
+        """
+        try:
+            result = (
+                self.client.table(self.table)
+                .select("updated_at", count="exact")
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            rows = result.data or []
+            return (result.count, rows[0]["updated_at"] if rows else None)
+        except Exception:
+            return None
+    
+    def search(
+        self,
+        text: Optional[str] = None,
+        status: Optional[DepartmentStatus] = None,
+        filters: Optional[dict] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Department]:
+        """
+        Búsqueda de texto (título, dirección, descripción) combinable con filtros.
+
+        Con texto, los resultados vienen ordenados por relevancia (función
+        search_departments, ver database/add_search.sql). Sin texto, se comporta
+        como get_all pero paginado.
+        """
+        try:
+            tsquery = build_prefix_tsquery(text) if text else None
+            if tsquery:
+                query = self.client.rpc("search_departments", {"search_query": tsquery}).select(DEPARTMENT_COLUMNS)
+            else:
+                query = self.client.table(self.table).select(DEPARTMENT_COLUMNS)
+            query = self._apply_filters(query, status, filters)
+            if not tsquery:
+                query = query.order("created_at", desc=True)
+            result = query.range(offset, offset + limit - 1).execute()
+            return self._rows_to_entities(result.data or [])
+        except Exception:
+            return []
+    
+    def get_facets(
+        self,
+        text: Optional[str] = None,
+        status: Optional[DepartmentStatus] = None,
+        filters: Optional[dict] = None,
+        price_buckets: int = 5
+    ) -> Optional[dict]:
+        """
+        Conteos por característica e histogramas de precio y habitaciones de
+        todos los resultados de la búsqueda, calculados en la BD (función
+        department_facets, ver database/department_facets.sql). None si falla.
+        """
+        try:
+            tsquery = build_prefix_tsquery(text) if text else None
+            result = self.client.rpc("department_facets", {
+                "p_search_query": tsquery,
+                "p_status": status.value if status else None,
+                "p_filters": {
+                    key: value for key, value in (filters or {}).items()
+                    if value is not None and value is not False
+                },
+                "p_price_buckets": price_buckets,
+            }).execute()
+            return result.data or None
+        except Exception:
+            return None
+    
+    def _to_row(self, department: Department) -> dict:
+        """Columnas a insertar para un departamento nuevo"""
+        return {
             "title": department.title,
             "address": department.address,
             "price": department.price,
@@ -110,8 +242,19 @@ class SupabaseDepartmentRepository:
             "furnished": department.furnished,
             "allow_pets": department.allow_pets
         }
-        result = self.client.table(self.table).insert(data).execute()
+
+    def create(self, department: Department) -> Department:
+        """Crea un nuevo departamento"""
+        result = self.client.table(self.table).insert(self._to_row(department)).execute()
         return self._row_to_entity(result.data[0])
+
+    def create_many(self, departments: List[Department]) -> List[Department]:
+        """Crea varios departamentos con un solo insert([...])"""
+        if not departments:
+            return []
+        rows = [self._to_row(department) for department in departments]
+        result = self.client.table(self.table).insert(rows).execute()
+        return self._rows_to_entities(result.data)
     
     def update(self, department: Department) -> Department:
         """Actualiza un departamento"""
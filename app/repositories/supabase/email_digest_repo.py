@@ -0,0 +1,59 @@
+from typing import Iterable, Optional, List
+from datetime import datetime, timezone
+
+from supabase import Client
+
+from ...domain.entities import DigestEvent
+from .client import SupabaseClient
+from .hydration import parse_timestamp
+
+
+class SupabaseEmailDigestRepository:
+    """Cola de eventos de los correos resumen de admins (tabla email_digest_queue)"""
+
+    def __init__(self, client: Optional[Client] = None):
+        self.client = client or SupabaseClient.get_client()
+        self.table = "email_digest_queue"
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[DigestEvent]:
+        # Argumentos en el orden de la dataclass
+        return [
+            DigestEvent(
+                str(row["id"]),
+                row["user_id"],
+                row["subject"],
+                row["body"],
+                parse_timestamp(row.get("created_at")),
+            )
+            for row in rows
+        ]
+
+    def enqueue(self, events: List[DigestEvent]) -> int:
+        if not events:
+            return 0
+        now = datetime.now(timezone.utc)
+        # Mismas columnas en todas las filas (inserción en lote); reencolar conserva la fecha original
+        rows = [
+            {
+                "user_id": event.user_id,
+                "subject": event.subject,
+                "body": event.body,
+                "created_at": (event.created_at or now).isoformat(),
+            }
+            for event in events
+        ]
+        result = self.client.table(self.table).insert(rows).execute()
+        return len(result.data or [])
+
+    def pop(self, user_id: str, until: datetime) -> List[DigestEvent]:
+        # DELETE ... RETURNING: dos ejecuciones simultáneas del cron no envían el mismo evento
+        result = (
+            self.client.table(self.table)
+            .delete()
+            .eq("user_id", user_id)
+            .lte("created_at", until.isoformat())
+            .execute()
+        )
+        events = self._rows_to_entities(result.data or [])
+        events.sort(key=lambda e: e.created_at or until)
+        return events
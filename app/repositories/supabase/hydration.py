@@ -0,0 +1,59 @@
+"""
+Utilidades compartidas para convertir filas de Supabase en entidades.
+
+- parse_timestamp: un único parser de timestamps para todos los repositorios,
+  memoizado (los mismos valores se repiten entre created_at/updated_at y entre
+  peticiones que leen las mismas filas; datetime es inmutable, así que se
+  puede compartir). Siempre retorna datetimes con zona horaria (UTC si el
+  valor no la trae), para que ordenar y comparar nunca mezcle tipos.
+- enum_lookup: conversión valor -> Enum por diccionario, más barata que
+  llamar a la clase Enum por cada fila.
+"""
+
+import re
+from datetime import datetime, timezone
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+E = TypeVar("E", bound=Enum)
+
+TIMESTAMP_CACHE_SIZE = 8192
+
+# Fracción de segundo con una cantidad de dígitos distinta de 3 o 6
+# ("...:05.12345+00:00"), que fromisoformat rechaza antes de Python 3.11
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _parse_iso(value: str) -> Optional[datetime]:
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        return _aware(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    try:
+        padded = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, count=1)
+        return _aware(datetime.fromisoformat(padded))
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Convierte un timestamp de Supabase (ISO 8601) en datetime con zona; None si no es válido"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return _aware(value)
+    return _parse_iso(value)
+
+
+def enum_lookup(enum_class: Type[E]) -> Callable[[Any], E]:
+    """Función valor -> miembro del Enum (KeyError si el valor no existe)"""
+    members: Dict[Any, E] = {member.value: member for member in enum_class}
+    return members.__getitem__
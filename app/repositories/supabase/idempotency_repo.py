@@ -0,0 +1,96 @@
+from typing import Optional, Tuple
+from datetime import datetime
+
+from supabase import Client
+
+from ...domain.entities import IdempotencyKey
+from .client import SupabaseClient
+from .hydration import parse_timestamp
+
+
+class SupabaseIdempotencyRepository:
+    """Claves de idempotencia de los formularios (tabla idempotency_keys)"""
+
+    def __init__(self, client: Optional[Client] = None):
+        self.client = client or SupabaseClient.get_client()
+        self.table = "idempotency_keys"
+
+    def _row_to_entity(self, row: dict) -> IdempotencyKey:
+        # Argumentos en el orden de la dataclass
+        return IdempotencyKey(
+            row["key"],
+            row["user_id"],
+            row["scope"],
+            row.get("result_id"),
+            parse_timestamp(row.get("created_at")),
+            parse_timestamp(row.get("expires_at")),
+        )
+
+    def claim(self, record: IdempotencyKey) -> Tuple[Optional[IdempotencyKey], bool]:
+        # Una fila expirada con la misma clave (aún sin purgar) queda libre
+        if record.created_at:
+            (
+                self.client.table(self.table)
+                .delete()
+                .eq("key", record.key)
+                .lt("expires_at", record.created_at.isoformat())
+                .execute()
+            )
+        # INSERT ... ON CONFLICT (key) DO NOTHING: de dos envíos simultáneos solo uno la registra
+        data = {
+            "key": record.key,
+            "user_id": record.user_id,
+            "scope": record.scope,
+            "expires_at": record.expires_at.isoformat() if record.expires_at else None,
+        }
+        result = (
+            self.client.table(self.table)
+            .upsert(data, on_conflict="key", ignore_duplicates=True)
+            .execute()
+        )
+        if result.data:
+            return self._row_to_entity(result.data[0]), True
+        existing = (
+            self.client.table(self.table)
+            .select("*")
+            .eq("key", record.key)
+            .maybe_single()
+            .execute()
+        )
+        if existing and existing.data:
+            return self._row_to_entity(existing.data), False
+        return None, False
+
+    def complete(self, key: str, result_id: str) -> bool:
+        try:
+            result = (
+                self.client.table(self.table)
+                .update({"result_id": result_id})
+                .eq("key", key)
+                .execute()
+            )
+            return bool(result.data)
+        except Exception:
+            return False
+
+    def release(self, key: str) -> bool:
+        try:
+            result = (
+                self.client.table(self.table)
+                .delete()
+                .eq("key", key)
+                .is_("result_id", "null")
+                .execute()
+            )
+            return bool(result.data)
+        except Exception:
+            return False
+
+    def purge_expired(self, now: datetime) -> int:
+        result = (
+            self.client.table(self.table)
+            .delete()
+            .lt("expires_at", now.isoformat())
+            .execute()
+        )
+        return len(result.data or [])
@@ -1,10 +1,11 @@
-from typing import Optional, List
-from datetime import datetime
+from typing import Iterable, Optional, List
+from datetime import datetime, timezone
 
 from supabase import Client
 
 from ...domain.entities import Notification
 from .client import SupabaseClient
+from .hydration import parse_timestamp
 
 
 class SupabaseNotificationRepository:
@@ -15,16 +16,24 @@ class SupabaseNotificationRepository:
         self.table = "notifications"
 
     def _row_to_entity(self, row: dict) -> Notification:
-        return Notification(
-            id=str(row["id"]),
-            user_id=row["user_id"],
-            title=row["title"],
-            message=row["message"],
-            link=row.get("link"),
-            type=row.get("type"),
-            is_read=bool(row.get("is_read", False)),
-            created_at=row.get("created_at"),
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[Notification]:
+        # Argumentos en el orden de la dataclass
+        return [
+            Notification(
+                str(row["id"]),
+                row["user_id"],
+                row["title"],
+                row["message"],
+                row.get("link"),
+                row.get("type"),
+                bool(row.get("is_read", False)),
+                parse_timestamp(row.get("created_at")),
+                row.get("count") or 1,
+            )
+            for row in rows
+        ]
 
     def create(self, notification: Notification) -> Notification:
         data = {
@@ -34,11 +43,36 @@ class SupabaseNotificationRepository:
             "link": notification.link,
             "type": notification.type,
             "is_read": notification.is_read,
-            "created_at": notification.created_at or datetime.utcnow().isoformat(),
+            "created_at": (notification.created_at or datetime.now(timezone.utc)).isoformat(),
         }
         result = self.client.table(self.table).insert(data).execute()
         return self._row_to_entity(result.data[0])
 
+    def notify_users(
+        self,
+        user_ids: List[str],
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        type: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window_seconds: int = 3600,
+    ) -> List[Notification]:
+        # Un solo upsert para todos los usuarios (database/coalesce_notifications.sql)
+        result = self.client.rpc(
+            "notify_users",
+            {
+                "p_user_ids": user_ids,
+                "p_title": title,
+                "p_message": message,
+                "p_link": link,
+                "p_type": type,
+                "p_coalesce_key": coalesce_key,
+                "p_window_seconds": window_seconds,
+            },
+        ).execute()
+        return self._rows_to_entities(result.data or [])
+
     def get_unread_by_user(self, user_id: str, limit: int = 10) -> List[Notification]:
         try:
             result = (
@@ -50,7 +84,23 @@ class SupabaseNotificationRepository:
                 .limit(limit)
                 .execute()
             )
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
+        except Exception:
+            return []
+
+    def get_unread_since(self, user_id: str, since: datetime, limit: int = 50) -> List[Notification]:
+        try:
+            result = (
+                self.client.table(self.table)
+                .select("*")
+                .eq("user_id", user_id)
+                .eq("is_read", False)
+                .gt("created_at", since.isoformat())
+                .order("created_at", desc=True)
+                .limit(limit)
+                .execute()
+            )
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
 
@@ -67,15 +117,40 @@ class SupabaseNotificationRepository:
         except Exception:
             return False
 
+    def mark_many_as_read(self, user_id: str, notification_ids: List[str]) -> int:
+        if not notification_ids:
+            return 0
+        try:
+            res = (
+                self.client.table(self.table)
+                .update({"is_read": True, "updated_at": datetime.utcnow().isoformat()})
+                .eq("user_id", user_id)
+                .in_("id", notification_ids)
+                .eq("is_read", False)
+                .execute()
+            )
+            return len(res.data or [])
+        except Exception:
+            return 0
+
     def mark_all_as_read(self, user_id: str) -> bool:
         try:
             res = (
                 self.client.table(self.table)
                 .update({"is_read": True, "updated_at": datetime.utcnow().isoformat()})
                 .eq("user_id", user_id)
+                .eq("is_read", False)  # No reescribir las ya leídas
                 .execute()
             )
             return bool(res.data)
         except Exception:
             return False
 
+    def purge_read(self, older_than: datetime, batch_size: int, archive: bool = False) -> int:
+        # Un lote por llamada (database/purge_notifications.sql); los errores se propagan al job
+        result = self.client.rpc(
+            "purge_notifications",
+            {"p_older_than": older_than.isoformat(), "p_batch_size": batch_size, "p_archive": archive},
+        ).execute()
+        return int(result.data or 0)
+
@@ -1,11 +1,16 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List, Iterator
 from datetime import datetime
 
 from supabase import Client
 
-from ...domain.entities import Payment
+from ...domain.entities import Payment, PaymentApproval, PaymentReview
 from ...domain.enums import PaymentStatus
 from .client import SupabaseClient
+from .hydration import enum_lookup, parse_timestamp
+from .streaming import stream_column_values
+
+
+_PAYMENT_STATUS = enum_lookup(PaymentStatus)
 
 
 class SupabasePaymentRepository:
@@ -17,28 +22,27 @@ class SupabasePaymentRepository:
     
     def _row_to_entity(self, row: dict) -> Payment:
         """Convierte una fila de BD a entidad Payment"""
-        def _parse_dt(val):
-            if not val:
-                return None
-            if isinstance(val, datetime):
-                return val
-            try:
-                return datetime.fromisoformat(val.replace("Z", "+00:00"))
-            except Exception:
-                return None
-        return Payment(
-            id=str(row["id"]),
-            tenant_id=str(row["tenant_id"]),
-            department_id=str(row["department_id"]),
-            amount=float(row["amount"]),
-            status=PaymentStatus(row["status"]),
-            month=row["month"],
-            receipt_url=row.get("receipt_url"),
-            notes=row.get("notes"),
-            created_at=_parse_dt(row.get("created_at")),
-            updated_at=_parse_dt(row.get("updated_at")),
-            reviewed_by=row.get("reviewed_by")
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[Payment]:
+        """Convierte filas de BD a entidades Payment (argumentos en el orden de la dataclass)"""
+        status = _PAYMENT_STATUS
+        return [
+            Payment(
+                str(row["id"]),
+                str(row["tenant_id"]),
+                str(row["department_id"]),
+                float(row["amount"]),
+                status(row["status"]),
+                row["month"],
+                row.get("receipt_url"),
+                row.get("notes"),
+                parse_timestamp(row.get("created_at")),
+                parse_timestamp(row.get("updated_at")),
+                row.get("reviewed_by"),
+            )
+            for row in rows
+        ]
     
     def get_by_id(self, payment_id: str) -> Optional[Payment]:
         """Obtiene un pago por ID"""
@@ -51,21 +55,72 @@ class SupabasePaymentRepository:
             return None
     
     def get_by_tenant(self, tenant_id: str) -> List[Payment]:
-        """Obtiene pagos de un inquilino"""
+        """Obtiene pagos de un inquilino (más recientes primero)"""
         try:
-            result = self.client.table(self.table).select("*").eq("tenant_id", tenant_id).order("month", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            result = self.client.table(self.table).select("*").eq("tenant_id", tenant_id).order("created_at", desc=True).execute()
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
     def get_by_status(self, status: PaymentStatus) -> List[Payment]:
-        """Obtiene pagos por estado"""
+        """Obtiene pagos por estado (más recientes primero)"""
         try:
             result = self.client.table(self.table).select("*").eq("status", status.value).order("created_at", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
+    def iter_receipt_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """Comprobantes (URL o ruta) de todos los pagos, por páginas (ver streaming.py)"""
+        return stream_column_values(self.client, self.table, ("receipt_url",), page_size)
+    
+    def get_all(self) -> List[Payment]:
+        """Obtiene todos los pagos (más recientes primero)"""
+        try:
+            result = self.client.table(self.table).select("*").order("created_at", desc=True).execute()
+            return self._rows_to_entities(result.data)
+        except Exception:
+            return []
+    
+    def exists(
+        self,
+        tenant_id: str,
+        department_id: str,
+        status: Optional[PaymentStatus] = None
+    ) -> bool:
+        """Indica si el inquilino tiene algún pago del departamento (lee a lo sumo una fila)"""
+        try:
+            query = (
+                self.client.table(self.table)
+                .select("id")
+                .eq("tenant_id", tenant_id)
+                .eq("department_id", department_id)
+            )
+            if status is not None:
+                query = query.eq("status", status.value)
+            result = query.limit(1).execute()
+            return bool(result.data)
+        except Exception:
+            return False
+    
+    def latest_status_for(self, tenant_id: str, department_id: str) -> Optional[PaymentStatus]:
+        """Estado del pago más reciente del inquilino para el departamento (lee una fila)"""
+        try:
+            result = (
+                self.client.table(self.table)
+                .select("status")
+                .eq("tenant_id", tenant_id)
+                .eq("department_id", department_id)
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            if result.data:
+                return _PAYMENT_STATUS(result.data[0]["status"])
+            return None
+        except Exception:
+            return None
+    
     def create(self, payment: Payment) -> Payment:
         """Crea un nuevo pago"""
         data = {
@@ -118,3 +173,60 @@ class SupabasePaymentRepository:
         except Exception:
             return None
 
+    def approve(
+        self,
+        payment_id: str,
+        reviewed_by: str,
+        notification_link: Optional[str] = None
+    ) -> Optional[PaymentApproval]:
+        """Aprueba el pago con la función approve_payment (database/approve_payment.sql)"""
+        try:
+            result = self.client.rpc("approve_payment", {
+                "p_payment_id": payment_id,
+                "p_reviewed_by": reviewed_by,
+                "p_notification_link": notification_link,
+            }).execute()
+        except Exception as e:
+            if "payment_not_found" in str(e):
+                return None
+            if "missing_receipt" in str(e):
+                raise ValueError("No se puede aprobar un pago sin comprobante")
+            raise
+        data = result.data
+        if not data:
+            return None
+        return PaymentApproval(
+            self._row_to_entity(data["payment"]),
+            data.get("tenant_email"),
+            data.get("department_title"),
+            bool(data.get("department_assigned")),
+            bool(data.get("already_reviewed")),
+        )
+
+    def review_many(
+        self,
+        payment_ids: List[str],
+        status: PaymentStatus,
+        reviewed_by: str,
+        notes: Optional[str] = None,
+        notification_link_template: Optional[str] = None
+    ) -> List[PaymentReview]:
+        """Revisa el lote con la función review_payments (database/review_payments.sql)"""
+        result = self.client.rpc("review_payments", {
+            "p_payment_ids": payment_ids,
+            "p_status": status.value,
+            "p_reviewed_by": reviewed_by,
+            "p_notes": notes,
+            "p_link_template": notification_link_template,
+        }).execute()
+        return [
+            PaymentReview(
+                str(item["id"]),
+                item["result"],
+                self._row_to_entity(item["payment"]) if item.get("payment") else None,
+                item.get("tenant_email"),
+                item.get("department_title"),
+                bool(item.get("department_assigned")),
+            )
+            for item in result.data or []
+        ]
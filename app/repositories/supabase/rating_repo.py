@@ -1,10 +1,11 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from datetime import datetime
 
 from supabase import Client
 
 from ...domain.entities import Rating
 from .client import SupabaseClient
+from .hydration import parse_timestamp
 
 
 class SupabaseRatingRepository:
@@ -16,25 +17,22 @@ class SupabaseRatingRepository:
 
     def _row_to_entity(self, row: dict) -> Rating:
         """Convierte una fila de BD a entidad Rating"""
-        def _parse_dt(val):
-            if not val:
-                return None
-            if isinstance(val, datetime):
-                return val
-            try:
-                return datetime.fromisoformat(val.replace("Z", "+00:00"))
-            except Exception:
-                return None
-        
-        return Rating(
-            id=str(row["id"]),
-            tenant_id=row["tenant_id"],
-            department_id=row["department_id"],
-            rating=int(row["rating"]),
-            comment=row.get("comment"),
-            created_at=_parse_dt(row.get("created_at")),
-            updated_at=_parse_dt(row.get("updated_at")),
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[Rating]:
+        """Convierte filas de BD a entidades Rating (argumentos en el orden de la dataclass)"""
+        return [
+            Rating(
+                str(row["id"]),
+                row["tenant_id"],
+                row["department_id"],
+                int(row["rating"]),
+                row.get("comment"),
+                parse_timestamp(row.get("created_at")),
+                parse_timestamp(row.get("updated_at")),
+            )
+            for row in rows
+        ]
 
     def get_by_id(self, rating_id: str) -> Optional[Rating]:
         try:
@@ -54,7 +52,7 @@ class SupabaseRatingRepository:
                 .order("created_at", desc=True)
                 .execute()
             )
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
 
@@ -129,6 +127,27 @@ class SupabaseRatingRepository:
             return self._row_to_entity(result.data[0])
         raise Exception("Error al actualizar calificación")
 
+    def upsert(self, rating: Rating) -> Rating:
+        """
+        Inserta o reemplaza la calificación en una sola llamada, usando la
+        restricción única (tenant_id, department_id). updated_at lo actualiza
+        el trigger de la tabla cuando la fila ya existía.
+        """
+        data = {
+            "tenant_id": rating.tenant_id,
+            "department_id": rating.department_id,
+            "rating": rating.rating,
+            "comment": rating.comment,
+        }
+        result = (
+            self.client.table(self.table)
+            .upsert(data, on_conflict="tenant_id,department_id")
+            .execute()
+        )
+        if result.data:
+            return self._row_to_entity(result.data[0])
+        raise Exception("Error al guardar calificación")
+
     def delete(self, rating_id: str) -> bool:
         try:
             self.client.table(self.table).delete().eq("id", rating_id).execute()
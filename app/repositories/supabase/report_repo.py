@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List, Iterator
 from datetime import datetime
 
 from supabase import Client
@@ -6,6 +6,11 @@ from supabase import Client
 from ...domain.entities import Report
 from ...domain.enums import ReportStatus
 from .client import SupabaseClient
+from .hydration import enum_lookup, parse_timestamp
+from .streaming import stream_column_values
+
+
+_REPORT_STATUS = enum_lookup(ReportStatus)
 
 
 class SupabaseReportRepository:
@@ -17,19 +22,27 @@ class SupabaseReportRepository:
     
     def _row_to_entity(self, row: dict) -> Report:
         """Convierte una fila de BD a entidad Report"""
-        return Report(
-            id=str(row["id"]),
-            tenant_id=str(row["tenant_id"]),
-            department_id=str(row["department_id"]),
-            title=row["title"],
-            description=row["description"],
-            status=ReportStatus(row["status"]),
-            notes=row.get("notes"),
-            attachment_url=row.get("attachment_url"),
-            created_at=row.get("created_at"),
-            updated_at=row.get("updated_at"),
-            resolved_by=row.get("resolved_by")
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[Report]:
+        """Convierte filas de BD a entidades Report (argumentos en el orden de la dataclass)"""
+        status = _REPORT_STATUS
+        return [
+            Report(
+                str(row["id"]),
+                str(row["tenant_id"]),
+                str(row["department_id"]),
+                row["title"],
+                row["description"],
+                status(row["status"]),
+                row.get("notes"),
+                row.get("attachment_url"),
+                parse_timestamp(row.get("created_at")),
+                parse_timestamp(row.get("updated_at")),
+                row.get("resolved_by"),
+            )
+            for row in rows
+        ]
     
     def get_by_id(self, report_id: str) -> Optional[Report]:
         """Obtiene un reporte por ID"""
@@ -45,7 +58,7 @@ class SupabaseReportRepository:
         """Obtiene reportes de un inquilino"""
         try:
             result = self.client.table(self.table).select("*").eq("tenant_id", tenant_id).order("created_at", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
@@ -53,15 +66,19 @@ class SupabaseReportRepository:
         """Obtiene reportes por estado"""
         try:
             result = self.client.table(self.table).select("*").eq("status", status.value).order("created_at", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
+    def iter_attachment_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """Adjuntos de todos los reportes, por páginas (ver streaming.py)"""
+        return stream_column_values(self.client, self.table, ("attachment_url",), page_size)
+    
     def get_all(self) -> List[Report]:
         """Obtiene todos los reportes"""
         try:
             result = self.client.table(self.table).select("*").order("created_at", desc=True).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
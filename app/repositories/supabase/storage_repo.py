@@ -1,4 +1,6 @@
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import threading
+import time
 import uuid
 from datetime import datetime
 import mimetypes
@@ -7,22 +9,66 @@ from supabase import Client
 
 from ...config import Config
 from .client import SupabaseClient
+from .hydration import parse_timestamp
+
+
+class SignedUrlCache:
+    """
+    URLs firmadas por ruta, reutilizadas hasta poco antes de expirar
+    (`margin` segundos) para no firmar en cada render. Compartida por el proceso.
+    """
+    
+    def __init__(self, margin: float = 300, max_entries: int = 10000):
+        self.margin = margin
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._urls: Dict[str, Tuple[str, float]] = {}
+    
+    def get(self, path: str) -> Optional[str]:
+        entry = self._urls.get(path)
+        if entry and entry[1] - self.margin > time.time():
+            return entry[0]
+        return None
+    
+    def put(self, path: str, url: str, expires_at: float) -> None:
+        with self._lock:
+            if len(self._urls) >= self.max_entries:
+                now = time.time()
+                self._urls = {p: e for p, e in self._urls.items() if e[1] - self.margin > now}
+                while len(self._urls) >= self.max_entries:
+                    self._urls.pop(next(iter(self._urls)))
+            self._urls[path] = (url, expires_at)
+    
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._urls.pop(path, None)
 
 
 class SupabaseStorageRepository:
     """Implementación de StorageRepository usando Supabase Storage"""
     
-    def __init__(self, client: Optional[Client] = None, use_service_role: bool = True):
+    def __init__(
+        self,
+        client: Optional[Client] = None,
+        use_service_role: bool = True,
+        bucket: Optional[str] = None,
+        private: bool = False,
+        signed_url_ttl: int = 3600
+    ):
         """
         Inicializa el repositorio de storage.
         
-        
+        Con private=True el bucket no es público: se guarda la ruta del objeto
+        (no una URL) y se muestra con URLs firmadas de `signed_url_ttl` segundos.
         """
         if use_service_role:
             self.client = client or SupabaseClient.get_service_role_client()
         else:
             self.client = client or SupabaseClient.get_client()
-        self.bucket = Config.STORAGE_BUCKET
+        self.bucket = bucket or Config.STORAGE_BUCKET
+        self.private = private
+        self.signed_url_ttl = signed_url_ttl
+        self._signed_urls = SignedUrlCache(margin=min(300, signed_url_ttl // 5))
     
     def _detect_content_type(self, file_name: str) -> str:
         """Detecta el tipo MIME del archivo"""
@@ -42,6 +88,21 @@ class SupabaseStorageRepository:
         }
         return mime_map.get(extension, 'application/octet-stream')
     
+    def _unique_name(self, file_name: str, folder: Optional[str] = None) -> str:
+        """Nombre único (fecha + uuid) conservando la extensión del archivo"""
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        unique_id = str(uuid.uuid4())[:8]
+        file_extension = file_name.split('.')[-1].lower() if '.' in file_name else ''
+        name = f"{timestamp}_{unique_id}.{file_extension}" if file_extension else f"{timestamp}_{unique_id}"
+        return f"{folder.strip('/')}/{name}" if folder else name
+    
+    def _object_path(self, file_path: str) -> str:
+        """Ruta del objeto dentro del bucket a partir de una ruta o URL pública"""
+        marker = f"/{self.bucket}/"
+        if "://" in file_path and marker in file_path:
+            return file_path.split(marker, 1)[1].split("?", 1)[0]
+        return file_path.lstrip("/")
+    
     def upload_file(
         self,
         file_content: bytes,
@@ -55,10 +116,7 @@ class SupabaseStorageRepository:
                 content_type = self._detect_content_type(file_name)
             
             # Generar nombre único para evitar colisiones
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
-            file_extension = file_name.split('.')[-1].lower() if '.' in file_name else ''
-            safe_file_name = f"{timestamp}_{unique_id}.{file_extension}" if file_extension else f"{timestamp}_{unique_id}"
+            safe_file_name = self._unique_name(file_name)
             
             # Subir archivo
             result = self.client.storage.from_(self.bucket).upload(
@@ -72,9 +130,8 @@ class SupabaseStorageRepository:
             
             # Verificar que se subió correctamente
             if result:
-                # Obtener URL pública
-                url_result = self.client.storage.from_(self.bucket).get_public_url(safe_file_name)
-                return url_result
+                # URL pública (o la ruta, si el bucket es privado)
+                return self.file_reference(safe_file_name)
             else:
                 raise Exception("No se recibió respuesta del servidor al subir el archivo")
                 
@@ -90,16 +147,184 @@ class SupabaseStorageRepository:
             else:
                 raise Exception(f"Error al subir archivo: {error_msg}")
     
-    def delete_file(self, file_path: str) -> bool:
-        """Elimina un archivo"""
+    def create_upload_url(self, file_name: str, folder: Optional[str] = None) -> dict:
+        """
+        URL firmada para que el navegador suba el archivo directamente a
+        Storage (PUT con el archivo como cuerpo). Retorna path, signed_url y token.
+        """
+        path = self._unique_name(file_name, folder)
+        try:
+            result = self.client.storage.from_(self.bucket).create_signed_upload_url(path)
+        except Exception as e:
+            if "Bucket not found" in str(e) or "does not exist" in str(e):
+                raise Exception(f"El bucket '{self.bucket}' no existe en Supabase. Crea el bucket en Storage primero.")
+            raise Exception(f"No se pudo preparar la subida: {e}")
+        return {"path": path, "signed_url": result["signed_url"], "token": result["token"]}
+    
+    def get_file_info(self, file_path: str) -> Optional[dict]:
+        """Tamaño y tipo de un objeto subido (None si no existe)"""
+        path = self._object_path(file_path)
+        folder, _, name = path.rpartition("/")
         try:
-            # Extraer el nombre del archivo de la URL si es necesario
-            if "/" in file_path:
-                file_name = file_path.split("/")[-1]
+            items = self.client.storage.from_(self.bucket).list(folder, {"search": name, "limit": 10})
+        except Exception:
+            return None
+        for item in items or []:
+            if item.get("name") == name:
+                metadata = item.get("metadata") or {}
+                return {
+                    "path": path,
+                    "size": int(metadata.get("size") or metadata.get("contentLength") or 0),
+                    "content_type": metadata.get("mimetype"),
+                }
+        return None
+    
+    def get_public_url(self, file_path: str) -> str:
+        """URL pública de un objeto del bucket"""
+        return self.client.storage.from_(self.bucket).get_public_url(self._object_path(file_path))
+    
+    def file_reference(self, file_path: str) -> str:
+        """Valor a guardar en la BD para un objeto: URL pública o, si el bucket es privado, su ruta"""
+        path = self._object_path(file_path)
+        return path if self.private else self.get_public_url(path)
+    
+    def get_signed_url(self, file_path: str) -> str:
+        """URL firmada de un objeto (cacheada hasta poco antes de expirar)"""
+        path = self._object_path(file_path)
+        url = self._signed_urls.get(path)
+        if url:
+            return url
+        expires_at = time.time() + self.signed_url_ttl
+        result = self.client.storage.from_(self.bucket).create_signed_url(path, self.signed_url_ttl)
+        url = result.get("signedURL") or result.get("signedUrl")
+        self._signed_urls.put(path, url, expires_at)
+        return url
+    
+    def get_signed_urls(self, file_paths: Iterable[str]) -> Dict[str, str]:
+        """
+        URLs firmadas de varios objetos: las que no están en caché se firman
+        en una sola llamada. Retorna {ruta o URL recibida: URL firmada}.
+        """
+        result: Dict[str, str] = {}
+        missing: Dict[str, list] = {}
+        for file_path in file_paths:
+            path = self._object_path(file_path)
+            url = self._signed_urls.get(path)
+            if url:
+                result[file_path] = url
             else:
-                file_name = file_path
-            
-            self.client.storage.from_(self.bucket).remove([file_name])
+                missing.setdefault(path, []).append(file_path)
+        if not missing:
+            return result
+        
+        expires_at = time.time() + self.signed_url_ttl
+        try:
+            signed = self.client.storage.from_(self.bucket).create_signed_urls(list(missing), self.signed_url_ttl)
+        except Exception:
+            signed = []
+        for item in signed or []:
+            url = item.get("signedURL") or item.get("signedUrl")
+            if item.get("error") or not url or item.get("path") not in missing:
+                continue
+            self._signed_urls.put(item["path"], url, expires_at)
+            for file_path in missing.pop(item["path"]):
+                result[file_path] = url
+        # Las que no vinieron en el lote se firman una por una
+        for path, originals in missing.items():
+            try:
+                url = self.get_signed_url(path)
+            except Exception:
+                continue
+            for file_path in originals:
+                result[file_path] = url
+        return result
+    
+    def _is_own_file(self, reference: str) -> bool:
+        """Ruta del bucket o URL de este bucket (no una URL externa)"""
+        return "://" not in reference or f"/{self.bucket}/" in reference
+    
+    def object_path(self, reference: str) -> Optional[str]:
+        """Ruta en este bucket de un valor guardado (URL o ruta); None si es externo o de otro bucket"""
+        return self._object_path(reference) if self._is_own_file(reference) else None
+    
+    def iter_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[dict]:
+        """
+        Todos los objetos bajo `prefix` (recorre las subcarpetas), listados por
+        páginas. Cada objeto: path, size y created_at (datetime). Los errores se propagan.
+        """
+        bucket = self.client.storage.from_(self.bucket)
+        folders = [prefix.strip("/")]
+        while folders:
+            folder = folders.pop()
+            offset = 0
+            while True:
+                items = bucket.list(folder, {
+                    "limit": page_size,
+                    "offset": offset,
+                    "sortBy": {"column": "name", "order": "asc"},
+                }) or []
+                for item in items:
+                    path = f"{folder}/{item['name']}" if folder else item["name"]
+                    if item.get("id") is None:
+                        folders.append(path)  # Subcarpeta (Storage no trae id ni metadata)
+                        continue
+                    metadata = item.get("metadata") or {}
+                    yield {
+                        "path": path,
+                        "size": int(metadata.get("size") or 0),
+                        "created_at": parse_timestamp(item.get("created_at")),
+                    }
+                if len(items) < page_size:
+                    break
+                offset += page_size
+    
+    def delete_files(self, file_paths: List[str]) -> int:
+        """Elimina varios objetos en una sola llamada; retorna cuántos se eliminaron"""
+        if not file_paths:
+            return 0
+        paths = [self._object_path(p) for p in file_paths]
+        removed = self.client.storage.from_(self.bucket).remove(paths)
+        for path in paths:
+            self._signed_urls.discard(path)
+        return len(removed or [])
+    
+    def resolve_urls(self, references: Iterable[str]) -> Dict[str, str]:
+        """
+        URL para mostrar cada valor guardado (ver file_reference): firmada si el
+        bucket es privado, pública si no. Las URLs externas quedan igual.
+        """
+        refs = list(dict.fromkeys(r for r in references if r))
+        if not self.private:
+            return {r: r if "://" in r else self.get_public_url(r) for r in refs}
+        urls = {r: r for r in refs if not self._is_own_file(r)}
+        urls.update(self.get_signed_urls([r for r in refs if r not in urls]))
+        return urls
+    
+    def download_file(self, file_path: str) -> bytes:
+        """Descarga el contenido de un objeto"""
+        return self.client.storage.from_(self.bucket).download(self._object_path(file_path))
+    
+    def read_file_head(self, file_path: str, size: int = 16) -> bytes:
+        """Primeros `size` bytes de un objeto (petición con Range, no descarga el archivo)"""
+        bucket = self.client.storage.from_(self.bucket)
+        path = self._object_path(file_path)
+        request = getattr(bucket, "_request", None)
+        if request is None:
+            # storage3 no expone descargas parciales: sin su _request se descarga y se recorta
+            return bucket.download(path)[:size]
+        response = request(
+            "GET",
+            f"object/{bucket._get_final_path(path)}",
+            headers={"Range": f"bytes=0-{size - 1}"},
+        )
+        return response.content[:size]
+    
+    def delete_file(self, file_path: str) -> bool:
+        """Elimina un archivo (acepta la ruta en el bucket o su URL pública)"""
+        try:
+            path = self._object_path(file_path)
+            self.client.storage.from_(self.bucket).remove([path])
+            self._signed_urls.discard(path)
             return True
         except Exception:
             return False
@@ -0,0 +1,55 @@
+"""
+Lectura de columnas de una tabla completa por páginas (keyset por id), sin
+cargar la tabla en memoria ni usar OFFSET: cada página es
+"WHERE id > <último id> ORDER BY id LIMIT n". La usa el recolector de
+objetos huérfanos de Storage para saber qué archivos siguen referenciados.
+
+A diferencia de las lecturas normales de los repositorios, los errores se
+propagan: un conjunto incompleto de referencias no debe tomarse como vacío.
+PostgREST recorta cada respuesta a max-rows (1000 en Supabase) aunque se
+pida un limit mayor, así que una página corta no indica el final: se lee
+hasta recibir una página vacía y al terminar se compara la cantidad de
+filas leídas con un conteo exacto de la tabla.
+"""
+
+from typing import Iterator, Sequence
+
+from supabase import Client
+
+# max-rows por defecto de PostgREST en Supabase
+MAX_PAGE_SIZE = 1000
+
+
+class IncompleteReadError(Exception):
+    """Se leyeron menos filas de las que tiene la tabla"""
+
+
+def stream_column_values(client: Client, table: str, columns: Sequence[str], page_size: int = 1000) -> Iterator[str]:
+    """
+    Valores no vacíos de `columns` en todas las filas de `table`. Lanza
+    IncompleteReadError si al terminar se leyeron menos filas que las contadas.
+    """
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    last_id = None
+    read = 0
+    select = ",".join(["id", *columns])
+    while True:
+        query = client.table(table).select(select).order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        if not rows:
+            break
+        read += len(rows)
+        for row in rows:
+            for column in columns:
+                value = row.get(column)
+                if value:
+                    yield value
+        last_id = rows[-1]["id"]
+
+    # Las filas insertadas durante la lectura pueden hacer fallar la
+    # verificación; es preferible reintentar a eliminar archivos en uso
+    expected = client.table(table).select("id", count="exact").limit(1).execute().count
+    if expected is None or read < expected:
+        raise IncompleteReadError(f"Lectura incompleta de {table}: {read} de {expected} filas")
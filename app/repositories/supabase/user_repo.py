@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from datetime import datetime
 
 from supabase import Client
@@ -6,6 +6,10 @@ from supabase import Client
 from ...domain.entities import User
 from ...domain.enums import UserRole
 from .client import SupabaseClient
+from .hydration import enum_lookup, parse_timestamp
+
+
+_USER_ROLE = enum_lookup(UserRole)
 
 
 class SupabaseUserRepository:
@@ -17,16 +21,26 @@ class SupabaseUserRepository:
     
     def _row_to_entity(self, row: dict) -> User:
         """Convierte una fila de BD a entidad User"""
-        return User(
-            id=str(row["id"]),
-            email=row["email"],
-            role=UserRole(row["role"]),
-            full_name=row.get("full_name"),
-            department_id=row.get("department_id"),
-            password_hash=row.get("password_hash"),
-            created_at=row.get("created_at"),
-            updated_at=row.get("updated_at")
-        )
+        return self._rows_to_entities((row,))[0]
+
+    def _rows_to_entities(self, rows: Iterable[dict]) -> List[User]:
+        """Convierte filas de BD a entidades User (argumentos en el orden de la dataclass)"""
+        role = _USER_ROLE
+        return [
+            User(
+                str(row["id"]),
+                row["email"],
+                role(row["role"]),
+                row.get("full_name"),
+                row.get("department_id"),
+                row.get("password_hash"),
+                parse_timestamp(row.get("created_at")),
+                parse_timestamp(row.get("updated_at")),
+                row.get("email_digest_minutes"),
+                parse_timestamp(row.get("email_digest_sent_at")),
+            )
+            for row in rows
+        ]
     
     def get_by_id(self, user_id: str) -> Optional[User]:
         """Obtiene un usuario por ID"""
@@ -73,6 +87,19 @@ class SupabaseUserRepository:
         result = self.client.table(self.table).update(data).eq("id", user.id).execute()
         return self._row_to_entity(result.data[0])
     
+    def update_password_hash(self, user_id: str, password_hash: str) -> bool:
+        """Reemplaza solo el hash de la contraseña (no pisa el resto de la fila)"""
+        try:
+            res = (
+                self.client.table(self.table)
+                .update({"password_hash": password_hash, "updated_at": datetime.utcnow().isoformat()})
+                .eq("id", user_id)
+                .execute()
+            )
+            return bool(res.data)
+        except Exception:
+            return False
+    
     def has_admins(self) -> bool:
         """Retorna True si existe al menos un admin"""
         try:
@@ -96,19 +123,45 @@ class SupabaseUserRepository:
     def get_tenants_by_department(self, department_id: str) -> List[User]:
         """Obtiene inquilinos de un departamento"""
         try:
-            result = self.client.table(self.table).select("*").eq("department_id", department_id).eq("role", UserRole.TENANT.value).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            result = self.client.table(self.table).select("*").eq("department_id", department_id).eq("role", UserRole.TENANT.value).order("created_at").execute()
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
 
     def get_admins(self) -> List[User]:
         """Obtiene todos los administradores"""
         try:
-            result = self.client.table(self.table).select("*").eq("role", UserRole.ADMIN.value).execute()
-            return [self._row_to_entity(row) for row in result.data]
+            result = self.client.table(self.table).select("*").eq("role", UserRole.ADMIN.value).order("created_at").execute()
+            return self._rows_to_entities(result.data)
         except Exception:
             return []
     
+    def set_email_digest(self, user_id: str, minutes: Optional[int]) -> bool:
+        """Guarda la preferencia de correo resumen (None = un correo por evento)"""
+        try:
+            res = (
+                self.client.table(self.table)
+                .update({"email_digest_minutes": minutes, "updated_at": datetime.utcnow().isoformat()})
+                .eq("id", user_id)
+                .execute()
+            )
+            return bool(res.data)
+        except Exception:
+            return False
+
+    def mark_digest_sent(self, user_id: str, sent_at: datetime) -> bool:
+        """Registra el envío del último correo resumen"""
+        try:
+            res = (
+                self.client.table(self.table)
+                .update({"email_digest_sent_at": sent_at.isoformat()})
+                .eq("id", user_id)
+                .execute()
+            )
+            return bool(res.data)
+        except Exception:
+            return False
+
     def unassign_department(self, department_id: str) -> int:
         """Desasigna un departamento de todos los usuarios que lo tengan asignado. Retorna el número de usuarios desasignados."""
         try:
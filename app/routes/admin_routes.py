@@ -1,21 +1,22 @@
+import hmac
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, make_response
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, make_response, Response, jsonify
 from datetime import datetime
-from fpdf import FPDF
 
-from .auth_routes import require_auth, require_role
+from .auth_routes import require_auth, require_role, busy_response
+from ..observability.metrics import registry as metrics_registry
 from ..domain.enums import UserRole, PaymentStatus, ReportStatus, DepartmentStatus
 from ..domain.entities import Department
 from ..factories.user_factory import UserFactory
+from ..config import Config
+from ..services.email_digest import DIGEST_INTERVALS
+from ..services.password_hasher import PasswordHasherBusy
+# Mismas reglas de imagen que la importación masiva
+from ..services.department_import import ALLOWED_IMAGE_EXTS, ALLOWED_IMAGE_MIMES, MAX_IMAGE_SIZE, COLUMNS as IMPORT_COLUMNS
 
 admin_bp = Blueprint("admin", __name__)
 
 
-ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png"}
-ALLOWED_IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
-MAX_IMAGE_SIZE = 5 * 1024 * 1024
-
-
 def read_valid_image(file, label: str):
     """Lee y valida imagen (jpg/png). Retorna (bytes|None, error|None)."""
     if not file or not file.filename:
@@ -58,6 +59,8 @@ def dashboard():
     
     payment_service = deps.get('payment_service')
     report_service = deps.get('report_service')
+    auth_service = deps.get('auth_service')
+    email_digest_service = deps.get('email_digest_service')
     
     pending_payments = []
     approved_payments = []
@@ -75,16 +78,77 @@ def dashboard():
     current_month = datetime.utcnow().strftime("%Y-%m")
     approved_month = len([p for p in approved_payments if p.month == current_month])
     rejected_month = len([p for p in rejected_payments if p.month == current_month])
+    admin = auth_service.get_user_by_id(get_current_user_id()) if auth_service else None
+    digest_minutes = admin.email_digest_minutes if admin else None
     
     return render_template(
         "admin/dashboard.html",
         pending_payments=pending_payments,
         open_reports=open_reports,
         approved_month=approved_month,
-        rejected_month=rejected_month
+        rejected_month=rejected_month,
+        digest_intervals=email_digest_service.intervals if email_digest_service else DIGEST_INTERVALS,
+        email_digest_minutes=(
+            email_digest_service.effective_minutes(digest_minutes) if email_digest_service else digest_minutes
+        )
     )
 
 
+@admin_bp.route("/email-digest", methods=["POST"])
+@require_auth
+@require_role(UserRole.ADMIN)
+def email_digest_settings():
+    """Guarda cada cuánto recibe el admin los correos de nuevos pagos y reportes"""
+    deps = get_services()
+    email_digest_service = deps.get('email_digest_service')
+    try:
+        minutes = int(request.form.get("email_digest_minutes", "0"))
+        if email_digest_service and email_digest_service.set_preference(get_current_user_id(), minutes):
+            flash(f"Correos: {DIGEST_INTERVALS[minutes].lower()}", "success")
+        else:
+            flash("No se pudo guardar la preferencia", "error")
+    except ValueError:
+        flash("Frecuencia de correo inválida", "error")
+    return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.route("/cron/email-digest")
+def cron_email_digest():
+    """
+    Envía los correos resumen pendientes y elimina las claves de idempotencia
+    expiradas. Lo llama Vercel Cron (vercel.json) con
+    "Authorization: Bearer <CRON_SECRET>"; sin CRON_SECRET no existe.
+    """
+    if not Config.CRON_SECRET:
+        return Response(status=404)
+    expected = f"Bearer {Config.CRON_SECRET}"
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+        return Response(status=401)
+    services = get_services()
+    result = services.get('email_digest_service').send_due()
+    try:
+        purged = services.get('idempotency_service').purge_expired()
+    except Exception as e:
+        # Sin la tabla (database/idempotency_keys.sql) no hay nada que limpiar
+        print(f"⚠️  No se pudieron eliminar las claves de idempotencia expiradas: {e}")
+        purged = None
+    return jsonify(
+        sent=result.sent,
+        events=result.events,
+        failed=result.failed,
+        seconds=round(result.seconds, 3),
+        idempotency_keys_purged=purged,
+    )
+
+
+@admin_bp.route("/metrics")
+@require_auth
+@require_role(UserRole.ADMIN)
+def metrics():
+    """Métricas de latencia y errores en formato Prometheus"""
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+
 @admin_bp.route("/payments")
 @require_auth
 @require_role(UserRole.ADMIN)
@@ -105,17 +169,8 @@ def payments_list():
             except ValueError:
                 payments = payment_service.get_pending_payments()
         else:
-            # Todos los pagos, cualquier estado
-            pending = payment_service.get_payments_by_status(PaymentStatus.PENDING)
-            approved = payment_service.get_payments_by_status(PaymentStatus.APPROVED)
-            rejected = payment_service.get_payments_by_status(PaymentStatus.REJECTED)
-            payments = pending + approved + rejected
-            # Ordenar por fecha de creación desc
-            payments = sorted(
-                payments,
-                key=lambda p: p.created_at or p.updated_at or p.month,
-                reverse=True
-            )
+            # Todos los pagos, cualquier estado (ordenados por fecha en la consulta)
+            payments = payment_service.get_all_payments()
 
     # Mapear departamentos para mostrar en tabla
     departments_map = {}
@@ -124,7 +179,15 @@ def payments_list():
             if p.department_id not in departments_map:
                 departments_map[p.department_id] = department_service.get_department_by_id(p.department_id)
     
-    return render_template("admin/payments.html", payments=payments, departments_map=departments_map)
+    # Comprobantes firmados en lote si el bucket es privado
+    receipt_links = payment_service.receipt_links(payments) if payment_service else {}
+    
+    return render_template(
+        "admin/payments.html",
+        payments=payments,
+        departments_map=departments_map,
+        receipt_links=receipt_links
+    )
 
 
 @admin_bp.route("/payment/<payment_id>")
@@ -149,7 +212,8 @@ def payment_detail(payment_id: str):
         "admin/payment_detail.html",
         payment=payment,
         tenant=tenant,
-        department=department
+        department=department,
+        receipt_link=payment_service.receipt_link(payment.receipt_url)
     )
 
 
@@ -161,55 +225,45 @@ def approve_payment(payment_id: str):
     user_id = get_current_user_id()
     deps = get_services()
     payment_service = deps.get('payment_service')
-    auth_service = deps.get('auth_service')
     department_service = deps.get('department_service')
     notification_service = deps.get('notification_service')
     email_service = deps.get('email_service')
     
     try:
-        payment = payment_service.get_payment_by_id(payment_id)
-        if not payment:
+        # Aprobar, asignar el departamento y notificar en una transacción (RPC)
+        link = url_for("tenant.payment_detail", payment_id=payment_id, _external=False)
+        approval = payment_service.approve_payment(payment_id, user_id, notification_link=link)
+        if not approval:
             flash("Pago no encontrado", "error")
             return redirect(url_for("admin.payments_list"))
-        if not payment.receipt_url:
-            flash("No se puede aprobar un pago sin comprobante", "error")
+        if approval.already_reviewed:
+            # Doble envío u otro admin: ni notificación ni correo repetidos
+            flash("El pago ya había sido revisado", "warning")
             return redirect(url_for("admin.payment_detail", payment_id=payment_id))
 
-        approved = payment_service.approve_payment(payment_id, user_id)
-        if approved:
-            department = department_service.get_department_by_id(approved.department_id) if department_service else None
-            # Asignar departamento al inquilino si no lo tiene
-            if auth_service and department_service:
-                tenant = auth_service.get_user_by_id(approved.tenant_id)
-                if tenant and not tenant.department_id:
-                    tenant.department_id = approved.department_id
-                    auth_service.user_repo.update(tenant)
-                    department_service.mark_as_occupied(approved.department_id)
-            # Notificar al inquilino
-            if notification_service and auth_service:
-                tenant = auth_service.get_user_by_id(approved.tenant_id)
-                if tenant:
-                    notification_service.create(
-                        user_id=tenant.id,
-                        title="Pago aprobado",
-                        message="Tu pago ha sido aprobado",
-                        link=url_for("tenant.payment_detail", payment_id=approved.id, _external=False),
-                        type="payment_approved"
-                    )
-                    if email_service and tenant.email:
-                        email_service.send_email(
-                            [tenant.email],
-                            "Pago aprobado",
-                            f"Tu pago ha sido aprobado.\n\n"
-                            f"Departamento: {department.title if department else 'N/D'}\n"
-                            f"Monto: ${approved.amount:.2f}\n"
-                            f"Mes: {approved.month}\n"
-                            f"Estado: Aprobado\n\n"
-                            f"Puedes ver el detalle en tu panel."
-                        )
-            flash("Pago aprobado correctamente", "success")
-        else:
-            flash("Error al aprobar el pago", "error")
+        approved = approval.payment
+        # La notificación la insertó la RPC: avisar a los streams abiertos
+        if notification_service:
+            notification_service.announce(
+                approved.tenant_id, "Pago aprobado", "Tu pago ha sido aprobado", link, "payment_approved"
+            )
+        if approval.department_assigned and department_service:
+            department_service.on_department_occupied(approved.department_id)
+        # El correo se envía fuera de la petición
+        if email_service and approval.tenant_email:
+            email_service.send_email_async(
+                [approval.tenant_email],
+                "Pago aprobado",
+                f"Tu pago ha sido aprobado.\n\n"
+                f"Departamento: {approval.department_title or 'N/D'}\n"
+                f"Monto: ${approved.amount:.2f}\n"
+                f"Mes: {approved.month}\n"
+                f"Estado: Aprobado\n\n"
+                f"Puedes ver el detalle en tu panel."
+            )
+        flash("Pago aprobado correctamente", "success")
+    except ValueError as e:
+        flash(str(e), "error")
     except Exception as e:
         flash(f"Error: {str(e)}", "error")
     
@@ -267,6 +321,110 @@ def reject_payment(payment_id: str):
     return redirect(url_for("admin.payments_list"))
 
 
+# Resultados de la revisión en lote que no se aplicaron, para el resumen
+_REVIEW_SKIPPED = {
+    "not_found": "no encontrados",
+    "already_reviewed": "ya revisados",
+    "missing_receipt": "sin comprobante",
+}
+_REVIEW_SUMMARY_ITEMS = 10
+
+
+@admin_bp.route("/payments/review", methods=["POST"])
+@require_auth
+@require_role(UserRole.ADMIN)
+def review_payments():
+    """Aprueba o rechaza en lote los pagos seleccionados en la lista"""
+    user_id = get_current_user_id()
+    deps = get_services()
+    payment_service = deps.get('payment_service')
+    department_service = deps.get('department_service')
+    notification_service = deps.get('notification_service')
+    email_service = deps.get('email_service')
+    
+    action = request.form.get("action")
+    payment_ids = request.form.getlist("payment_ids")
+    notes = request.form.get("notes", "").strip()
+    back = redirect(url_for("admin.payments_list", status=request.form.get("status_filter") or None))
+    
+    if action not in ("approve", "reject"):
+        flash("Acción inválida", "error")
+        return back
+    status = PaymentStatus.APPROVED if action == "approve" else PaymentStatus.REJECTED
+    
+    # Link de la notificación de cada pago: "{id}" lo reemplaza la BD
+    link_template = url_for("tenant.payment_detail", payment_id="__id__").replace("__id__", "{id}")
+    try:
+        reviews = payment_service.review_payments(
+            payment_ids, status, user_id, notes or None, notification_link_template=link_template
+        )
+    except ValueError as e:
+        flash(str(e), "error")
+        return back
+    except Exception as e:
+        flash(f"Error: {str(e)}", "error")
+        return back
+    
+    done = [r for r in reviews if r.result == status.value]
+    emails = []
+    for review in done:
+        payment = review.payment
+        if review.department_assigned and department_service:
+            department_service.on_department_occupied(payment.department_id)
+        # Las notificaciones las insertó la RPC: avisar a los streams abiertos
+        if notification_service:
+            if status == PaymentStatus.APPROVED:
+                title, message = "Pago aprobado", "Tu pago ha sido aprobado"
+            else:
+                title, message = "Pago rechazado", "Tu pago ha sido rechazado. Revisa el comprobante."
+            notification_service.announce(
+                payment.tenant_id, title, message, link_template.replace("{id}", payment.id), f"payment_{status.value}"
+            )
+        # Correos: se juntan y se envían al final en una sola sesión SMTP
+        if email_service and review.tenant_email:
+            if status == PaymentStatus.APPROVED:
+                subject = "Pago aprobado"
+                body = (
+                    f"Tu pago ha sido aprobado.\n\n"
+                    f"Departamento: {review.department_title or 'N/D'}\n"
+                    f"Monto: ${payment.amount:.2f}\n"
+                    f"Mes: {payment.month}\n"
+                    f"Estado: Aprobado\n\n"
+                    f"Puedes ver el detalle en tu panel."
+                )
+            else:
+                subject = "Pago rechazado"
+                body = (
+                    f"Tu pago ha sido rechazado.\n\n"
+                    f"Departamento: {review.department_title or 'N/D'}\n"
+                    f"Monto: ${payment.amount:.2f}\n"
+                    f"Mes: {payment.month}\n"
+                    f"Motivo: {notes or 'N/A'}\n"
+                    f"Estado: Rechazado\n\n"
+                    f"Revisa el comprobante y vuelve a intentarlo si corresponde."
+                )
+            emails.append(([review.tenant_email], subject, body))
+    if email_service and emails:
+        # En segundo plano si EMAIL_BACKGROUND; si no (Vercel), una conexión para todo el lote
+        email_service.send_many_async(emails)
+    
+    # Resumen: total aplicado y, por cada motivo, los pagos que se omitieron
+    verb = "aprobados" if status == PaymentStatus.APPROVED else "rechazados"
+    if done:
+        flash(f"✅ {len(done)} de {len(reviews)} pagos {verb}", "success")
+    for result, label in _REVIEW_SKIPPED.items():
+        skipped = [r for r in reviews if r.result == result]
+        if not skipped:
+            continue
+        items = ", ".join(
+            f"{r.department_title or 'N/D'} ({r.payment_id[:8]})" for r in skipped[:_REVIEW_SUMMARY_ITEMS]
+        )
+        more = f" y {len(skipped) - _REVIEW_SUMMARY_ITEMS} más" if len(skipped) > _REVIEW_SUMMARY_ITEMS else ""
+        flash(f"{len(skipped)} {label}: {items}{more}", "warning")
+    
+    return back
+
+
 @admin_bp.route("/reports")
 @require_auth
 @require_role(UserRole.ADMIN)
@@ -287,6 +445,9 @@ def reports_list():
 @require_role(UserRole.ADMIN)
 def export_reports_pdf():
     """Exporta todos los reportes a PDF"""
+    # Import diferido: fpdf solo se carga cuando alguien exporta
+    from fpdf import FPDF
+
     deps = get_services()
     report_service = deps.get('report_service')
     auth_service = deps.get('auth_service')
@@ -568,6 +729,42 @@ def new_department():
     return render_template("admin/new_department.html")
 
 
+@admin_bp.route("/departments/import", methods=["GET", "POST"])
+@require_auth
+@require_role(UserRole.ADMIN)
+def import_departments():
+    """Importación masiva de departamentos desde CSV/XLSX (con zip de imágenes opcional)"""
+    deps = get_services()
+    import_service = deps.get('department_import_service')
+    result = None
+    
+    if request.method == "POST":
+        data_file = request.files.get("file")
+        images_file = request.files.get("images")
+        if not data_file or not data_file.filename:
+            flash("Debes subir un archivo CSV o XLSX", "error")
+            return render_template("admin/import_departments.html", columns=IMPORT_COLUMNS)
+        try:
+            result = import_service.import_file(
+                data_file.filename,
+                data_file.read(),
+                images_zip=images_file.read() if images_file and images_file.filename else None,
+                check_urls=bool(request.form.get("check_urls")),
+            )
+            if result.created:
+                flash(f"✅ {len(result.created)} de {result.total_rows} departamentos importados", "success")
+            if result.errors:
+                flash(f"{len(result.errors)} filas con errores no se importaron", "warning")
+            if not result.total_rows:
+                flash("El archivo no tiene filas para importar", "warning")
+        except ValueError as e:
+            flash(str(e), "error")
+        except Exception as e:
+            flash(f"Error: {str(e)}", "error")
+    
+    return render_template("admin/import_departments.html", result=result, columns=IMPORT_COLUMNS)
+
+
 @admin_bp.route("/department/<department_id>/edit", methods=["GET", "POST"])
 @require_auth
 @require_role(UserRole.ADMIN)
@@ -823,6 +1020,9 @@ def create_admin():
             )
             flash(f"✅ Usuario administrador {email} creado exitosamente", "success")
             return redirect(url_for("admin.dashboard"))
+        except PasswordHasherBusy as e:
+            flash(str(e), "error")
+            return busy_response(render_template("admin/create_admin.html"))
         except ValueError as e:
             flash(str(e), "error")
         except Exception as e:
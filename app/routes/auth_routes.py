@@ -1,9 +1,21 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+import time
+from datetime import datetime, timezone
+
+from flask import (
+    Blueprint, Response, current_app, render_template, request, redirect, url_for, session, flash,
+    make_response, stream_with_context,
+)
 
 from ..domain.enums import UserRole
+from ..repositories.supabase.hydration import parse_timestamp
+from ..services.notification_broker import format_event, notification_to_event
+from ..services.password_hasher import PasswordHasherBusy
 
 auth_bp = Blueprint("auth", __name__)
 
+# Espera del navegador antes de reconectar el stream de notificaciones
+STREAM_RETRY_MS = 3000
+
 
 def get_services():
     """Helper para obtener servicios desde el contexto de la app"""
@@ -11,6 +23,13 @@ def get_services():
     return current_app.config.get('deps', {})
 
 
+def busy_response(body: str):
+    """Respuesta 503 cuando no hay cupo para hashear contraseñas (PasswordHasherBusy)"""
+    response = make_response(body, 503)
+    response.headers["Retry-After"] = "5"
+    return response
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     """Página de login"""
@@ -28,7 +47,11 @@ def login():
         auth_service = deps.get('auth_service')
         
         if auth_service:
-            user = auth_service.login(email, password)
+            try:
+                user = auth_service.login(email, password)
+            except PasswordHasherBusy as e:
+                flash(str(e), "error")
+                return busy_response(render_template("auth/login.html", next_url=next_url))
             if user:
                 # Guardar en sesión
                 session['user_id'] = user.id
@@ -100,6 +123,9 @@ def register():
                     return redirect(next_url)
                 else:
                     return redirect(url_for("tenant.dashboard"))
+            except PasswordHasherBusy as e:
+                flash(str(e), "error")
+                return busy_response(render_template("auth/register.html", next_url=next_url))
             except ValueError as e:
                 flash(str(e), "error")
             except Exception as e:
@@ -132,6 +158,75 @@ def mark_notifications_read():
     return redirect(next_url)
 
 
+@auth_bp.route("/notifications/stream")
+def notifications_stream():
+    """
+    Stream SSE con las notificaciones nuevas del usuario.
+
+    Sin Last-Event-ID envía primero un evento "snapshot" con las no leídas;
+    al reconectar (header Last-Event-ID o ?last_event_id=, un timestamp) envía
+    solo las creadas después, y solo consulta la BD si el broker no puede
+    asegurar que no hubo ninguna. Luego un evento "notification" por cada
+    notificación nueva y un comentario de heartbeat cada
+    NOTIFICATION_STREAM_HEARTBEAT segundos. Se cierra a los
+    NOTIFICATION_STREAM_MAX_SECONDS y el navegador reconecta.
+    """
+    if 'user_id' not in session:
+        return Response(status=401)
+    deps = get_services()
+    notification_service = deps.get("notification_service")
+    broker = deps.get("notification_broker")
+    if not current_app.config["NOTIFICATION_STREAM"] or not notification_service or not broker:
+        return Response(status=204)  # El navegador deja de intentar
+    heartbeat = current_app.config["NOTIFICATION_STREAM_HEARTBEAT"]
+    max_seconds = current_app.config["NOTIFICATION_STREAM_MAX_SECONDS"]
+
+    user_id = session.get('user_id')
+    since = parse_timestamp(request.headers.get("Last-Event-ID") or request.args.get("last_event_id"))
+    # Suscribirse antes de consultar: lo que llegue mientras tanto queda en la cola
+    subscription = broker.subscribe(user_id)
+
+    def generate():
+        sent = set()
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            if since is None:
+                snapshot_at = datetime.now(timezone.utc)
+                unread = notification_service.get_unread(user_id, limit=8)
+                sent.update(n.id for n in unread)
+                yield format_event(
+                    "snapshot",
+                    {"notifications": [notification_to_event(n) for n in unread]},
+                    snapshot_at.isoformat(),
+                )
+            elif broker.may_have_missed(user_id, since):
+                missed = notification_service.get_unread_since(user_id, since)
+                for notification in reversed(missed):
+                    sent.add(notification.id)
+                    yield format_event(
+                        "notification", notification_to_event(notification), notification.created_at.isoformat()
+                    )
+
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                notification = subscription.get(timeout=heartbeat)
+                if notification is None:
+                    yield ": ping\n\n"
+                    continue
+                if notification.id and notification.id in sent:
+                    continue
+                created_at = notification.created_at or datetime.now(timezone.utc)
+                yield format_event("notification", notification_to_event(notification), created_at.isoformat())
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def require_auth(f):
     """Decorador para requerir autenticación"""
     from functools import wraps
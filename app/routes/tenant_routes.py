@@ -1,5 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 
 from .auth_routes import require_auth
 from ..domain.enums import UserRole, PaymentStatus
@@ -33,20 +32,10 @@ def dashboard():
 
     user = auth_service.get_user_by_id(user_id) if auth_service else None
 
+    # Ambas listas vienen ordenadas por fecha de creación desc desde la consulta
     payments = payment_service.get_payments_by_tenant(user_id) if payment_service else []
     reports = report_service.get_reports_by_tenant(user_id) if report_service else []
 
-    def _sort_dt(value):
-        if isinstance(value, datetime):
-            return value
-        try:
-            return datetime.fromisoformat(value)
-        except Exception:
-            return datetime.min
-
-    payments = sorted(payments, key=lambda p: _sort_dt(getattr(p, "created_at", None)), reverse=True)
-    reports = sorted(reports, key=lambda r: _sort_dt(getattr(r, "created_at", None)), reverse=True)
-
     def _tenant_departments(user_obj, payment_list):
         """Obtiene departamentos asignados al usuario. Solo considera department_id del usuario, no pagos históricos."""
         ids = set()
@@ -70,7 +59,9 @@ def dashboard():
         department=department,
         departments=departments,
         payments=payments,
-        reports=reports
+        reports=reports,
+        # Comprobantes firmados en lote si el bucket es privado
+        receipt_links=payment_service.receipt_links(payments) if payment_service else {}
     )
 
 
@@ -85,6 +76,8 @@ def new_payment():
     department_service = deps.get('department_service')
     notification_service = deps.get('notification_service')
     email_service = deps.get('email_service')
+    email_digest_service = deps.get('email_digest_service')
+    idempotency_service = deps.get('idempotency_service')
 
     user = auth_service.get_user_by_id(user_id) if auth_service else None
     payments = payment_service.get_payments_by_tenant(user_id) if payment_service else []
@@ -123,23 +116,42 @@ def new_payment():
                 flash("Departamento no válido", "error")
                 return render_template("tenant/new_payment.html", departments=departments)
 
-        # Validar comprobante obligatorio
-        if 'receipt' not in request.files:
-            flash("Debes subir un comprobante de pago", "error")
-            return render_template("tenant/new_payment.html", departments=departments)
-        file = request.files['receipt']
-        if file.filename == '':
-            flash("Debes seleccionar un archivo de comprobante", "error")
+        # Comprobante obligatorio: ya subido a Storage desde el navegador
+        # (receipt_path) o como archivo del formulario
+        receipt_path = request.form.get("receipt_path", "").strip()
+        file = request.files.get('receipt')
+        if not receipt_path:
+            if file is None:
+                flash("Debes subir un comprobante de pago", "error")
+                return render_template("tenant/new_payment.html", departments=departments)
+            if file.filename == '':
+                flash("Debes seleccionar un archivo de comprobante", "error")
+                return render_template("tenant/new_payment.html", departments=departments)
+
+        # Reintento del mismo formulario (doble clic, reenvío del navegador):
+        # misma respuesta que la primera vez, sin subir ni insertar ni notificar de nuevo
+        try:
+            claim = idempotency_service.claim(request.form.get("idempotency_key"), user_id, "payment")
+        except ValueError as e:
+            flash(str(e), "error")
             return render_template("tenant/new_payment.html", departments=departments)
+        if not claim.is_new:
+            if claim.in_progress:
+                flash("Tu pago se está registrando. Revisa tu panel en unos segundos.", "info")
+            else:
+                flash("Pago registrado correctamente. Está pendiente de revisión.", "success")
+            return redirect(url_for("tenant.dashboard"))
 
         try:
-            file_content = file.read()
-            if len(file_content) == 0:
-                flash("El archivo está vacío", "error")
-                return render_template("tenant/new_payment.html", departments=departments)
-            if len(file_content) > 10 * 1024 * 1024:
-                flash("El archivo es demasiado grande. Máximo 10MB", "error")
-                return render_template("tenant/new_payment.html", departments=departments)
+            file_content = None
+            if not receipt_path:
+                file_content = file.read()
+                if len(file_content) == 0:
+                    flash("El archivo está vacío", "error")
+                    return render_template("tenant/new_payment.html", departments=departments)
+                if len(file_content) > 10 * 1024 * 1024:
+                    flash("El archivo es demasiado grande. Máximo 10MB", "error")
+                    return render_template("tenant/new_payment.html", departments=departments)
 
             payment = payment_service.create_payment_with_receipt(
                 tenant_id=user_id,
@@ -147,34 +159,38 @@ def new_payment():
                 amount=float(amount),
                 month=month,
                 file_content=file_content,
-                file_name=file.filename,
-                notes=notes if notes else None
+                file_name=file.filename if file_content else None,
+                notes=notes if notes else None,
+                receipt_path=receipt_path or None
             )
+            if payment:
+                idempotency_service.complete(claim, payment.id)
             # Notificar a admins
             if payment and notification_service and auth_service:
                 admins = auth_service.user_repo.get_admins()
-                sent_admin_emails = set()
-                for admin in admins:
-                    notification_service.create(
-                        user_id=admin.id,
-                        title="Nuevo pago/reserva",
-                        message=f"Se registró un pago para {departments[0].title if departments else 'un departamento'}",
-                        link=url_for("admin.payment_detail", payment_id=payment.id, _external=False),
-                        type="payment_created"
+                # Una notificación por admin en un solo upsert; los pagos seguidos
+                # del mismo inquilino se agrupan en la misma fila
+                notification_service.notify_users(
+                    [admin.id for admin in admins],
+                    title="Nuevo pago/reserva",
+                    message=f"Se registró un pago para {departments[0].title if departments else 'un departamento'}",
+                    link=url_for("admin.payment_detail", payment_id=payment.id, _external=False),
+                    type="payment_created",
+                    coalesce_key=f"payment_created:{user_id}",
+                )
+                # Correo al momento o al resumen periódico, según cada admin
+                if email_digest_service:
+                    email_digest_service.notify_admins(
+                        admins,
+                        "Nuevo pago/reserva registrado",
+                        f"Se registró un pago/reserva.\n\n"
+                        f"Departamento: {departments[0].title if departments else 'N/D'}\n"
+                        f"Monto: ${float(amount):.2f}\n"
+                        f"Mes: {month}\n"
+                        f"Notas: {notes or 'N/A'}\n"
+                        f"Usuario: {user.email if user else 'N/D'}\n\n"
+                        f"Revisa el detalle en el panel de administración."
                     )
-                    if email_service and admin.email and admin.email not in sent_admin_emails:
-                        email_service.send_email(
-                            [admin.email],
-                            "Nuevo pago/reserva registrado",
-                            f"Se registró un pago/reserva.\n\n"
-                            f"Departamento: {departments[0].title if departments else 'N/D'}\n"
-                            f"Monto: ${float(amount):.2f}\n"
-                            f"Mes: {month}\n"
-                            f"Notas: {notes or 'N/A'}\n"
-                            f"Usuario: {user.email if user else 'N/D'}\n\n"
-                            f"Revisa el detalle en el panel de administración."
-                        )
-                        sent_admin_emails.add(admin.email)
                 # Confirmar al usuario que su pago quedó registrado (pendiente)
                 if email_service and user and user.email:
                     email_service.send_email(
@@ -194,6 +210,9 @@ def new_payment():
             flash(str(e), "error")
         except Exception as e:
             flash(f"Error al crear el pago: {str(e)}", "error")
+        finally:
+            # Si no se creó el pago, el mismo formulario puede reenviarse
+            idempotency_service.release(claim)
     
     # GET: mostrar formulario
     if not departments:
@@ -203,6 +222,29 @@ def new_payment():
     return render_template("tenant/new_payment.html", departments=departments)
 
 
+@tenant_bp.route("/receipt/upload-url", methods=["POST"])
+@require_auth
+def receipt_upload_url():
+    """
+    URL firmada para subir el comprobante directo a Storage desde el navegador
+    (el archivo no pasa por el servidor). Responde JSON con path, signed_url y token.
+    """
+    payment_service = get_services().get('payment_service')
+    data = request.get_json(silent=True) or request.form
+    try:
+        size = int(data.get("size")) if data.get("size") not in (None, "") else None
+        upload = payment_service.create_receipt_upload(
+            tenant_id=get_current_user_id(),
+            file_name=data.get("file_name", ""),
+            size=size
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except Exception as e:
+        return jsonify(error=str(e)), 503
+    return jsonify(upload)
+
+
 @tenant_bp.route("/payment/<payment_id>/receipt", methods=["GET", "POST"])
 @require_auth
 def upload_receipt(payment_id: str):
@@ -277,7 +319,8 @@ def payment_detail(payment_id: str):
         "tenant/payment_detail.html",
         payment=payment,
         department=department,
-        admin=admin
+        admin=admin,
+        receipt_link=payment_service.receipt_link(payment.receipt_url)
     )
 
 
@@ -321,6 +364,8 @@ def new_report():
     department_service = deps.get('department_service')
     notification_service = deps.get('notification_service')
     email_service = deps.get('email_service')
+    email_digest_service = deps.get('email_digest_service')
+    idempotency_service = deps.get('idempotency_service')
     storage_repo = deps.get('storage_repo')
 
     payments = payment_service.get_payments_by_tenant(user_id) if payment_service else []
@@ -351,31 +396,44 @@ def new_report():
         selected_department_id = request.form.get("department_id")
         attachment_url = None
 
-        # Manejar archivo adjunto (opcional)
-        if 'attachment' in request.files:
-            file = request.files['attachment']
-            if file and file.filename:
-                file_content = file.read()
-                if len(file_content) == 0:
-                    flash("El archivo adjunto está vacío", "error")
-                    return render_template("tenant/new_report.html", departments=departments)
-                if len(file_content) > 10 * 1024 * 1024:
-                    flash("El archivo es demasiado grande. Máximo 10MB", "error")
-                    return render_template("tenant/new_report.html", departments=departments)
-                if storage_repo:
-                    try:
-                        attachment_url = storage_repo.upload_file(
-                            file_content=file_content,
-                            file_name=file.filename
-                        )
-                    except Exception as e:
-                        flash(f"No se pudo subir el adjunto: {str(e)}", "error")
-                        return render_template("tenant/new_report.html", departments=departments)
+        # Reintento del mismo formulario: misma respuesta, sin repetir la subida ni el reporte
+        try:
+            claim = idempotency_service.claim(request.form.get("idempotency_key"), user_id, "report")
+        except ValueError as e:
+            flash(str(e), "error")
+            return render_template("tenant/new_report.html", departments=departments)
+        if not claim.is_new:
+            if claim.in_progress:
+                flash("Tu reporte se está registrando. Revisa tu panel en unos segundos.", "info")
+            else:
+                flash("Reporte creado correctamente", "success")
+            return redirect(url_for("tenant.dashboard"))
 
-        department_id = selected_department_id or (departments[0].id if departments else None)
-        
-        report_service = deps.get('report_service')
         try:
+            # Manejar archivo adjunto (opcional)
+            if 'attachment' in request.files:
+                file = request.files['attachment']
+                if file and file.filename:
+                    file_content = file.read()
+                    if len(file_content) == 0:
+                        flash("El archivo adjunto está vacío", "error")
+                        return render_template("tenant/new_report.html", departments=departments)
+                    if len(file_content) > 10 * 1024 * 1024:
+                        flash("El archivo es demasiado grande. Máximo 10MB", "error")
+                        return render_template("tenant/new_report.html", departments=departments)
+                    if storage_repo:
+                        try:
+                            attachment_url = storage_repo.upload_file(
+                                file_content=file_content,
+                                file_name=file.filename
+                            )
+                        except Exception as e:
+                            flash(f"No se pudo subir el adjunto: {str(e)}", "error")
+                            return render_template("tenant/new_report.html", departments=departments)
+
+            department_id = selected_department_id or (departments[0].id if departments else None)
+            
+            report_service = deps.get('report_service')
             report = report_service.create_report(
                 tenant_id=user_id,
                 department_id=department_id,
@@ -383,34 +441,37 @@ def new_report():
                 description=description,
                 attachment_url=attachment_url
             )
+            if report:
+                idempotency_service.complete(claim, report.id)
             # Notificar a admins sobre nuevo reporte
             if notification_service and auth_service:
                 admins = auth_service.user_repo.get_admins()
-                sent_admin_emails = set()
-                for admin in admins:
-                    notification_service.create(
-                        user_id=admin.id,
-                        title="Nuevo reporte",
-                        message=f"{title}",
-                        link=url_for("admin.reports_list", _external=False),
-                        type="report_created"
+                notification_service.notify_users(
+                    [admin.id for admin in admins],
+                    title="Nuevo reporte",
+                    message=f"{title}",
+                    link=url_for("admin.reports_list", _external=False),
+                    type="report_created",
+                    coalesce_key=f"report_created:{user_id}",
+                )
+                if email_digest_service:
+                    email_digest_service.notify_admins(
+                        admins,
+                        "Nuevo reporte recibido",
+                        f"Se creó un nuevo reporte.\n\n"
+                        f"Título: {title}\n"
+                        f"Departamento: {department_id}\n"
+                        f"Descripción: {description}\n\n"
+                        f"Revisa el panel de administración."
                     )
-                    if email_service and admin.email and admin.email not in sent_admin_emails:
-                        email_service.send_email(
-                            [admin.email],
-                            "Nuevo reporte recibido",
-                            f"Se creó un nuevo reporte.\n\n"
-                            f"Título: {title}\n"
-                            f"Departamento: {department_id}\n"
-                            f"Descripción: {description}\n\n"
-                            f"Revisa el panel de administración."
-                        )
-                        sent_admin_emails.add(admin.email)
             flash("Reporte creado correctamente", "success")
             return redirect(url_for("tenant.dashboard"))
         except ValueError as e:
             flash(str(e), "error")
         except Exception as e:
             flash(f"Error al crear el reporte: {str(e)}", "error")
+        finally:
+            # Si no se creó el reporte, el mismo formulario puede reenviarse
+            idempotency_service.release(claim)
     
     return render_template("tenant/new_report.html")
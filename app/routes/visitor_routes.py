@@ -6,6 +6,8 @@ from .auth_routes import require_auth
 
 visitor_bp = Blueprint("visitor", __name__)
 
+CATALOG_PAGE_SIZE = 24
+
 
 def get_services():
     """Helper para obtener servicios desde el contexto de la app"""
@@ -57,15 +59,36 @@ def home():
     if max_rooms is not None:
         filters["max_rooms"] = max_rooms
 
+    search_text = (request.args.get("q") or "").strip()
+    page = _parse_int(request.args.get("page")) or 1
+    if page < 1:
+        page = 1
+
+    has_next = False
     if department_service:
-        departments = department_service.get_all_departments(
+        departments, has_next = department_service.search_departments(
+            text=search_text or None,
+            available_only=True,
+            filters=filters if filters else None,
+            page=page,
+            per_page=CATALOG_PAGE_SIZE
+        )
+        facets = department_service.get_facets(
+            text=search_text or None,
             available_only=True,
             filters=filters if filters else None
         )
     else:
         departments = []
+        facets = None
+
+    # URLs de paginación conservando búsqueda y filtros
+    query_args = request.args.to_dict()
+    prev_url = url_for("visitor.home", **{**query_args, "page": page - 1}) if page > 1 else None
+    next_url = url_for("visitor.home", **{**query_args, "page": page + 1}) if has_next else None
 
     active_filters = {
+        "q": search_text,
         "has_terrace": filters.get("has_terrace", False),
         "has_balcony": filters.get("has_balcony", False),
         "sea_view": filters.get("sea_view", False),
@@ -81,7 +104,11 @@ def home():
     return render_template(
         "visitor/departments.html",
         departments=departments,
-        active_filters=active_filters
+        active_filters=active_filters,
+        facets=facets,
+        page=page,
+        prev_url=prev_url,
+        next_url=next_url
     )
 
 
@@ -111,18 +138,21 @@ def department_detail(department_id: str):
     user_id = session.get('user_id') if is_authenticated else None
     existing_payment_status = None
     user_has_department = False
+    is_tenant = False
     if is_authenticated and auth_service:
         # Verificar si el usuario tiene el departamento asignado (department_id)
         user = auth_service.get_user_by_id(user_id)
-        if user and user.department_id == department_id:
-            user_has_department = True
-            # Verificar el estado del pago más reciente aprobado para este departamento
-            if payment_service:
-                payments = payment_service.get_payments_by_tenant(user_id)
-                for p in payments:
-                    if p.department_id == department_id and p.status.value == 'approved':
-                        existing_payment_status = p.status.value
-                        break
+        if user:
+            is_tenant = user.role == UserRole.TENANT
+            user_has_department = user.department_id == department_id
+    if is_tenant and payment_service:
+        # Solo los inquilinos tienen pagos. Consultas de una fila (índices
+        # (tenant_id, department_id, status) y (tenant_id, department_id, created_at desc))
+        if user_has_department and payment_service.has_approved_payment(user_id, department_id):
+            existing_payment_status = 'approved'
+        else:
+            latest_status = payment_service.get_latest_payment_status(user_id, department_id)
+            existing_payment_status = latest_status.value if latest_status else None
     
     # Obtener calificaciones del departamento
     ratings = []
@@ -136,6 +166,9 @@ def department_detail(department_id: str):
         if user_id:
             user_rating = rating_service.get_user_rating(user_id, department_id)
     
+    # Departamentos similares disponibles (índice en memoria, ver RecommendationService)
+    similar_departments = department_service.get_similar_departments(department, k=4)
+    
     return render_template(
         "visitor/department_detail.html",
         department=department,
@@ -146,7 +179,8 @@ def department_detail(department_id: str):
         ratings=ratings,
         average_rating=average_rating,
         rating_count=rating_count,
-        user_rating=user_rating
+        user_rating=user_rating,
+        similar_departments=similar_departments
     )
 
 
@@ -166,6 +200,8 @@ def pay_department(department_id: str):
     notification_service = deps.get('notification_service')
     auth_service = deps.get('auth_service')
     email_service = deps.get('email_service')
+    email_digest_service = deps.get('email_digest_service')
+    idempotency_service = deps.get('idempotency_service')
     
     # Verificar que el departamento existe
     department = department_service.get_department_by_id(department_id)
@@ -195,14 +231,30 @@ def pay_department(department_id: str):
         end_date_str = request.form.get("end_date")
         expected_amount = float(department.price)
         
-        if 'receipt' not in request.files:
-            flash("Debes subir un comprobante de pago", "error")
-            return render_template("visitor/pay_department.html", department=department)
+        # Comprobante ya subido a Storage desde el navegador o archivo del formulario
+        receipt_path = request.form.get("receipt_path", "").strip()
+        file = request.files.get('receipt')
+        if not receipt_path:
+            if file is None:
+                flash("Debes subir un comprobante de pago", "error")
+                return render_template("visitor/pay_department.html", department=department)
+            if file.filename == '':
+                flash("Debes seleccionar un archivo", "error")
+                return render_template("visitor/pay_department.html", department=department)
         
-        file = request.files['receipt']
-        if file.filename == '':
-            flash("Debes seleccionar un archivo", "error")
+        # Reintento del mismo formulario (doble clic, reenvío del navegador):
+        # misma respuesta que la primera vez, sin subir ni insertar ni notificar de nuevo
+        try:
+            claim = idempotency_service.claim(request.form.get("idempotency_key"), user_id, "payment")
+        except ValueError as e:
+            flash(str(e), "error")
             return render_template("visitor/pay_department.html", department=department)
+        if not claim.is_new:
+            if claim.in_progress:
+                flash("Tu pago se está registrando. Revisa tu panel en unos segundos.", "info")
+            else:
+                flash("Pago registrado correctamente. Está pendiente de revisión.", "success")
+            return redirect(url_for("visitor.department_detail", department_id=department_id))
         
         try:
             # Validar monto numérico
@@ -212,16 +264,18 @@ def pay_department(department_id: str):
                 flash("Monto inválido", "error")
                 return render_template("visitor/pay_department.html", department=department)
 
-            file_content = file.read()
-            if len(file_content) == 0:
-                flash("El archivo está vacío", "error")
-                return render_template("visitor/pay_department.html", department=department)
-            
-            # Validar tamaño (máx 10MB)
-            max_size = 10 * 1024 * 1024  # 10MB
-            if len(file_content) > max_size:
-                flash("El archivo es demasiado grande. Máximo 10MB", "error")
-                return render_template("visitor/pay_department.html", department=department)
+            file_content = None
+            if not receipt_path:
+                file_content = file.read()
+                if len(file_content) == 0:
+                    flash("El archivo está vacío", "error")
+                    return render_template("visitor/pay_department.html", department=department)
+                
+                # Validar tamaño (máx 10MB)
+                max_size = 10 * 1024 * 1024  # 10MB
+                if len(file_content) > max_size:
+                    flash("El archivo es demasiado grande. Máximo 10MB", "error")
+                    return render_template("visitor/pay_department.html", department=department)
 
             # Calcular monto prorrateado si se ingresa rango de fechas
             if start_date_str or end_date_str:
@@ -265,37 +319,38 @@ def pay_department(department_id: str):
                 amount=amount_val,
                 month=month,
                 file_content=file_content,
-                file_name=file.filename,
-                notes=notes if notes else None
+                file_name=file.filename if file_content else None,
+                notes=notes if notes else None,
+                receipt_path=receipt_path or None
             )
             
             if payment:
+                idempotency_service.complete(claim, payment.id)
                 tenant_user = auth_service.get_user_by_id(user_id) if auth_service else None
                 # Notificar a todos los admins (evitar duplicados por email repetido)
                 if notification_service and auth_service:
                     admins = auth_service.user_repo.get_admins()
-                    sent_admin_emails = set()
-                    for admin in admins:
-                        notification_service.create(
-                            user_id=admin.id,
-                            title="Nuevo pago/reserva",
-                            message=f"Se registró un pago para {department.title}",
-                            link=url_for("admin.payment_detail", payment_id=payment.id, _external=False),
-                            type="payment_created"
+                    notification_service.notify_users(
+                        [admin.id for admin in admins],
+                        title="Nuevo pago/reserva",
+                        message=f"Se registró un pago para {department.title}",
+                        link=url_for("admin.payment_detail", payment_id=payment.id, _external=False),
+                        type="payment_created",
+                        coalesce_key=f"payment_created:{user_id}",
+                    )
+                    # Correo al momento o al resumen periódico, según cada admin
+                    if email_digest_service:
+                        email_digest_service.notify_admins(
+                            admins,
+                            "Nuevo pago/reserva registrado",
+                            f"Se registró un pago/reserva.\n\n"
+                            f"Departamento: {department.title}\n"
+                            f"Monto: ${amount_val:.2f}\n"
+                            f"Mes: {month}\n"
+                            f"Notas: {notes or 'N/A'}\n"
+                            f"Usuario: {tenant_user.email if tenant_user else 'N/D'}\n\n"
+                            f"Revisa el detalle en el panel de administración."
                         )
-                        if email_service and admin.email and admin.email not in sent_admin_emails:
-                            email_service.send_email(
-                                [admin.email],
-                                "Nuevo pago/reserva registrado",
-                                f"Se registró un pago/reserva.\n\n"
-                                f"Departamento: {department.title}\n"
-                                f"Monto: ${amount_val:.2f}\n"
-                                f"Mes: {month}\n"
-                                f"Notas: {notes or 'N/A'}\n"
-                                f"Usuario: {tenant_user.email if tenant_user else 'N/D'}\n\n"
-                                f"Revisa el detalle en el panel de administración."
-                            )
-                            sent_admin_emails.add(admin.email)
                 # Confirmar al usuario que su pago quedó registrado (pendiente)
                 if email_service and auth_service:
                     tenant = auth_service.get_user_by_id(user_id)
@@ -319,6 +374,9 @@ def pay_department(department_id: str):
             flash(str(e), "error")
         except Exception as e:
             flash(f"Error: {str(e)}", "error")
+        finally:
+            # Si no se creó el pago, el mismo formulario puede reenviarse
+            idempotency_service.release(claim)
     
     return render_template("visitor/pay_department.html", department=department)
 
@@ -341,25 +399,15 @@ def rate_department(department_id: str):
         flash("Debes iniciar sesión para calificar", "error")
         return redirect(url_for("visitor.department_detail", department_id=department_id))
     
-    # Verificar que el usuario tenga el departamento asignado (pago aprobado)
+    # Verificar que el usuario tenga el departamento asignado (pago aprobado).
+    # Un pago existente implica que el departamento existe (payments se borra en cascada)
     if payment_service:
-        payments = payment_service.get_payments_by_tenant(user_id)
-        has_approved_payment = False
-        for p in payments:
-            if p.department_id == department_id and p.status.value == 'approved':
-                has_approved_payment = True
-                break
-        
-        if not has_approved_payment:
+        if not payment_service.has_approved_payment(user_id, department_id):
             flash("Solo puedes calificar departamentos que tengas asignados", "error")
             return redirect(url_for("visitor.department_detail", department_id=department_id))
-    
-    # Verificar que el departamento existe
-    if department_service:
-        department = department_service.get_department_by_id(department_id)
-        if not department:
-            flash("Departamento no encontrado", "error")
-            return redirect(url_for("visitor.home"))
+    elif department_service and not department_service.get_department_by_id(department_id):
+        flash("Departamento no encontrado", "error")
+        return redirect(url_for("visitor.home"))
     
     # Obtener datos del formulario
     rating_value = request.form.get("rating")
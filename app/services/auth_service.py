@@ -1,17 +1,18 @@
 from typing import Optional
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from ..domain.entities import User
 from ..domain.enums import UserRole
 from ..repositories.interfaces import UserRepository
 from ..factories.user_factory import UserFactory
+from .password_hasher import PasswordHasher
 
 
 class AuthService:
     """Servicio de autenticación y gestión de usuarios"""
     
-    def __init__(self, user_repo: UserRepository):
+    def __init__(self, user_repo: UserRepository, password_hasher: Optional[PasswordHasher] = None):
         self.user_repo = user_repo
+        self.password_hasher = password_hasher or PasswordHasher()
     
     def register(
         self,
@@ -34,10 +35,8 @@ class AuthService:
         else:
             raise ValueError(f"Rol no válido para registro: {role}")
 
-        # Asignar password hash
-        user.password_hash = generate_password_hash(password.strip())
-        
-        
+        # Asignar password hash (puede lanzar PasswordHasherBusy)
+        user.password_hash = self.password_hasher.hash(password.strip())
         
         # Guardar en BD
         user = self.user_repo.create(user)
@@ -47,15 +46,27 @@ class AuthService:
         """
         Autentica un usuario.
         
-    
+        Si el hash guardado usa parámetros distintos a los configurados
+        (PASSWORD_HASH_METHOD), se regenera con la contraseña recién validada.
+        Puede lanzar PasswordHasherBusy si no hay cupo para verificar.
         """
         user = self.user_repo.get_by_email(email)
         if not user or not user.password_hash:
             return None
 
-        if not check_password_hash(user.password_hash, password.strip()):
+        password = password.strip()
+        if not self.password_hasher.verify(user.password_hash, password):
             return None
 
+        try:
+            if self.password_hasher.needs_rehash(user.password_hash):
+                password_hash = self.password_hasher.hash(password)
+                # Solo la columna del hash: no pisa cambios concurrentes del resto del usuario
+                if self.user_repo.update_password_hash(user.id, password_hash):
+                    user.password_hash = password_hash
+        except Exception:
+            pass  # El login no depende de poder actualizar el hash (ni de tener cupo para hacerlo)
+
         return user
     
     def get_user_by_id(self, user_id: str) -> Optional[User]:
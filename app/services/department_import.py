@@ -0,0 +1,351 @@
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..domain.entities import Department
+from ..domain.enums import DepartmentStatus
+from .department_service import FEATURES, DepartmentService
+
+
+ALLOWED_IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png"}
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+
+MAX_IMPORT_ROWS = 2000
+IMPORT_CHUNK_SIZE = 100  # Filas por insert([...])
+IMPORT_WORKERS = 8  # Subidas / verificaciones de URL en paralelo
+URL_CHECK_TIMEOUT = 5
+
+IMAGE_COLUMNS = ("image_url", "image_url_2", "image_url_3")
+COLUMNS = (
+    "title", "address", "price", "status", "description", "rooms", "bathrooms", "area",
+) + IMAGE_COLUMNS + FEATURES
+
+_TRUE = {"1", "true", "si", "sí", "s", "yes", "y", "x"}
+_FALSE = {"", "0", "false", "no", "n"}
+
+# Firmas de archivo (los nombres dentro del zip no traen tipo MIME)
+_MAGIC = {b"\xff\xd8\xff": "image/jpeg", b"\x89PNG\r\n\x1a\n": "image/png"}
+
+
+@dataclass
+class ImportResult:
+    """Resultado de una importación: filas creadas y errores por número de fila"""
+    total_rows: int = 0
+    created: List[Department] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def image_type(content: bytes) -> Optional[str]:
+    """Tipo MIME según los primeros bytes (solo JPG/PNG), None si no es una imagen permitida"""
+    for magic, mime in _MAGIC.items():
+        if content.startswith(magic):
+            return mime
+    return None
+
+
+def read_rows(file_name: str, content: bytes) -> List[Tuple[int, Dict[str, str]]]:
+    """
+    Lee un CSV (UTF-8, separado por comas o punto y coma) o XLSX y retorna
+    una lista de (número de fila en la hoja, {columna: valor}). La primera fila
+    son los encabezados (fila 1); las filas vacías se omiten sin correr la numeración.
+    """
+    ext = os.path.splitext(file_name or "")[1].lower()
+    if ext == ".xlsx":
+        return _read_xlsx(content)
+    if ext not in (".csv", ".txt"):
+        raise ValueError("El archivo debe ser CSV o XLSX")
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+    return _to_dicts(list(reader))
+
+
+def _read_xlsx(content: bytes) -> List[Tuple[int, Dict[str, str]]]:
+    # openpyxl se importa solo al importar un XLSX (no suma al arranque)
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar XLSX instala openpyxl (o sube el archivo como CSV)")
+    workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = [
+            ["" if value is None else str(value) for value in row]
+            for row in sheet.iter_rows(values_only=True)
+        ]
+    finally:
+        workbook.close()
+    return _to_dicts(rows)
+
+
+def _to_dicts(rows: List[List[str]]) -> List[Tuple[int, Dict[str, str]]]:
+    if not rows:
+        return []
+    headers = [h.strip().lower() for h in rows[0]]
+    missing = [c for c in ("title", "address", "price") if c not in headers]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    result = []
+    for number, row in enumerate(rows[1:], start=2):
+        if not any((value or "").strip() for value in row):
+            continue  # Filas vacías (intermedias o al final del archivo)
+        result.append((number, {h: (row[i] if i < len(row) else "").strip() for i, h in enumerate(headers) if h}))
+    return result
+
+
+def _number(value: str, label: str, integer: bool = False):
+    if not value:
+        return None
+    # "1234,5" (coma decimal) o "1,234.5" (coma de miles)
+    normalized = value.replace(",", ".") if "." not in value else value.replace(",", "")
+    try:
+        number = float(normalized)
+    except ValueError:
+        raise ValueError(f"{label} inválido: {value}")
+    if integer:
+        if not number.is_integer():
+            raise ValueError(f"{label} debe ser un número entero: {value}")
+        return int(number)
+    return number
+
+
+def _bool(value: str, label: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise ValueError(f"{label} debe ser sí/no: {value}")
+
+
+def row_to_department(row: Dict[str, str]) -> Department:
+    """Convierte una fila en Department (las columnas de imagen quedan tal cual vienen)"""
+    status_value = (row.get("status") or DepartmentStatus.AVAILABLE.value).lower()
+    try:
+        status = DepartmentStatus(status_value)
+    except ValueError:
+        raise ValueError(f"Estado inválido: {status_value} (available, occupied o maintenance)")
+    price = _number(row.get("price", ""), "Precio")
+    if price is None:
+        raise ValueError("El precio es obligatorio")
+    return Department(
+        id="",
+        title=row.get("title", ""),
+        address=row.get("address", ""),
+        price=price,
+        status=status,
+        description=row.get("description") or None,
+        rooms=_number(row.get("rooms", ""), "Habitaciones", integer=True),
+        bathrooms=_number(row.get("bathrooms", ""), "Baños", integer=True),
+        area=_number(row.get("area", ""), "Área"),
+        image_url=row.get("image_url") or None,
+        image_url_2=row.get("image_url_2") or None,
+        image_url_3=row.get("image_url_3") or None,
+        **{feature: _bool(row.get(feature, ""), feature) for feature in FEATURES},
+    )
+
+
+def is_url(value: str) -> bool:
+    return value.lower().startswith(("http://", "https://"))
+
+
+def check_image_url(url: str) -> Optional[str]:
+    """Verifica que la URL responda con una imagen JPG/PNG. Retorna el error o None."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return f"URL de imagen inválida: {url}"
+    import requests
+
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=URL_CHECK_TIMEOUT)
+        if response.status_code == 405:  # Servidores que no aceptan HEAD
+            response = requests.get(url, stream=True, timeout=URL_CHECK_TIMEOUT)
+            response.close()
+    except requests.RequestException:
+        return f"No se pudo acceder a la imagen: {url}"
+    if response.status_code >= 400:
+        return f"La imagen respondió {response.status_code}: {url}"
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in ALLOWED_IMAGE_MIMES:
+        return f"La URL no es una imagen JPG/PNG ({content_type}): {url}"
+    return None
+
+
+class DepartmentImportService:
+    """
+    Importación masiva de departamentos desde CSV/XLSX.
+
+    Cada fila se valida con las mismas reglas que el formulario
+    (DepartmentService.validate_department). Las columnas de imagen aceptan una
+    URL http(s) o el nombre de un archivo dentro del zip de imágenes; los
+    archivos del zip se validan (JPG/PNG, máx. 5MB) y se suben en paralelo, y
+    las URLs se verifican en paralelo. Las filas válidas se insertan en lotes
+    de IMPORT_CHUNK_SIZE con un solo insert([...]) por lote. Las filas con
+    errores no se insertan y se reportan con su número de fila.
+    """
+
+    def __init__(self, department_service: DepartmentService, max_workers: int = IMPORT_WORKERS):
+        self.department_service = department_service
+        self.max_workers = max_workers
+
+    def import_file(
+        self,
+        file_name: str,
+        content: bytes,
+        images_zip: Optional[bytes] = None,
+        check_urls: bool = True,
+    ) -> ImportResult:
+        rows = read_rows(file_name, content)
+        if len(rows) > MAX_IMPORT_ROWS:
+            raise ValueError(f"Máximo {MAX_IMPORT_ROWS} filas por importación")
+        result = ImportResult(total_rows=len(rows))
+        errors: Dict[int, str] = {}
+
+        # 1. Convertir y validar filas (numeración como en la hoja: encabezado = fila 1)
+        departments: Dict[int, Department] = {}
+        for number, row in rows:
+            try:
+                department = row_to_department(row)
+                self.department_service.validate_department(department)
+                if not department.image_url:
+                    raise ValueError("La imagen principal (image_url) es obligatoria")
+                departments[number] = department
+            except ValueError as e:
+                errors[number] = str(e)
+
+        # 2. Imágenes: archivos del zip y URLs externas
+        archive = self._open_zip(images_zip)
+        try:
+            file_refs, url_refs = self._collect_images(departments, archive, errors)
+            uploaded = self._upload_images(archive, file_refs, errors) if file_refs else {}
+        finally:
+            if archive:
+                archive.close()
+        if check_urls and url_refs:
+            self._check_urls(url_refs, errors)
+
+        valid = []
+        for number, department in departments.items():
+            if number in errors:
+                continue
+            for column in IMAGE_COLUMNS:
+                value = getattr(department, column)
+                if value and not is_url(value):
+                    setattr(department, column, uploaded[value])
+            valid.append((number, department))
+
+        # 3. Insertar en lotes
+        for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+            chunk = valid[start:start + IMPORT_CHUNK_SIZE]
+            try:
+                result.created.extend(self.department_service.create_departments([d for _, d in chunk]))
+            except Exception as e:
+                for number, _ in chunk:
+                    errors[number] = f"Error al guardar: {str(e)}"
+
+        result.errors = sorted(errors.items())
+        return result
+
+    def _open_zip(self, images_zip: Optional[bytes]) -> Optional[zipfile.ZipFile]:
+        if not images_zip:
+            return None
+        try:
+            return zipfile.ZipFile(io.BytesIO(images_zip))
+        except zipfile.BadZipFile:
+            raise ValueError("El archivo de imágenes no es un zip válido")
+
+    def _collect_images(
+        self,
+        departments: Dict[int, Department],
+        archive: Optional[zipfile.ZipFile],
+        errors: Dict[int, str],
+    ) -> Tuple[Dict[str, List[int]], Dict[str, List[int]]]:
+        """Agrupa las referencias de imagen (archivo del zip o URL) con las filas que las usan"""
+        # Se busca por nombre de archivo, sin importar carpetas dentro del zip
+        entries = {}
+        if archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    entries.setdefault(os.path.basename(info.filename).lower(), info)
+
+        file_refs: Dict[str, List[int]] = {}
+        url_refs: Dict[str, List[int]] = {}
+        for number, department in departments.items():
+            for column in IMAGE_COLUMNS:
+                value = getattr(department, column)
+                if not value:
+                    continue
+                if is_url(value):
+                    url_refs.setdefault(value, []).append(number)
+                    continue
+                info = entries.get(os.path.basename(value).lower())
+                if info is None:
+                    errors.setdefault(number, f"La imagen {value} no está en el zip")
+                elif os.path.splitext(info.filename)[1].lower() not in ALLOWED_IMAGE_EXTS:
+                    errors.setdefault(number, f"La imagen {value} debe ser JPG o PNG")
+                elif info.file_size > MAX_IMAGE_SIZE:
+                    errors.setdefault(number, f"La imagen {value} es demasiado grande. Máximo 5MB")
+                else:
+                    setattr(department, column, info.filename)
+                    file_refs.setdefault(info.filename, []).append(number)
+        return file_refs, url_refs
+
+    def _upload_images(
+        self,
+        archive: zipfile.ZipFile,
+        file_refs: Dict[str, List[int]],
+        errors: Dict[int, str],
+    ) -> Dict[str, str]:
+        """Sube cada archivo referenciado una sola vez, en paralelo. Retorna {archivo: URL}"""
+        storage_repo = self.department_service.storage_repo
+        if not storage_repo:
+            raise ValueError("No hay almacenamiento configurado para subir imágenes")
+        # Solo se suben imágenes de filas sin errores; la lectura del zip no es thread-safe
+        pending = {}
+        for name, numbers in file_refs.items():
+            if all(n in errors for n in numbers):
+                continue
+            content = archive.read(name)
+            mime = image_type(content)
+            if mime is None:
+                for n in numbers:
+                    errors.setdefault(n, f"La imagen {os.path.basename(name)} no es un JPG/PNG válido")
+                continue
+            pending[name] = (content, mime)
+
+        def upload(item):
+            name, (content, mime) = item
+            return storage_repo.upload_file(
+                file_content=content, file_name=os.path.basename(name), content_type=mime
+            )
+
+        uploaded = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="import-upload") as pool:
+            futures = {name: pool.submit(upload, (name, data)) for name, data in pending.items()}
+            for name, future in futures.items():
+                try:
+                    uploaded[name] = future.result()
+                except Exception as e:
+                    for n in file_refs[name]:
+                        errors.setdefault(n, f"Error al subir {os.path.basename(name)}: {str(e)}")
+        return uploaded
+
+    def _check_urls(self, url_refs: Dict[str, List[int]], errors: Dict[int, str]) -> None:
+        urls = [url for url, numbers in url_refs.items() if not all(n in errors for n in numbers)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="import-url") as pool:
+            for url, error in zip(urls, pool.map(check_image_url, urls)):
+                if error:
+                    for n in url_refs[url]:
+                        errors.setdefault(n, error)
@@ -1,8 +1,12 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from ..domain.entities import Department
 from ..domain.enums import DepartmentStatus
 from ..repositories.interfaces import DepartmentRepository, StorageRepository, UserRepository
+from .recommendation_service import RecommendationService
+
+
+FEATURES = ("has_terrace", "has_balcony", "sea_view", "parking", "furnished", "allow_pets")
 
 
 class DepartmentService:
@@ -12,11 +16,19 @@ class DepartmentService:
         self,
         department_repo: DepartmentRepository,
         storage_repo: Optional[StorageRepository] = None,
-        user_repo: Optional[UserRepository] = None
+        user_repo: Optional[UserRepository] = None,
+        recommendation_service: Optional[RecommendationService] = None
     ):
         self.department_repo = department_repo
         self.storage_repo = storage_repo
         self.user_repo = user_repo
+        self.recommendation_service = recommendation_service
+    
+    def _on_saved(self, department: Optional[Department]) -> Optional[Department]:
+        """Mantiene actualizado el índice de recomendaciones tras guardar"""
+        if self.recommendation_service:
+            self.recommendation_service.on_department_saved(department)
+        return department
     
     def get_all_departments(
         self,
@@ -36,19 +48,76 @@ class DepartmentService:
             return self.department_repo.get_all(DepartmentStatus.AVAILABLE, filters)
         return self.department_repo.get_all(status, filters)
     
+    def search_departments(
+        self,
+        text: Optional[str] = None,
+        available_only: bool = True,
+        filters: Optional[dict] = None,
+        page: int = 1,
+        per_page: int = 24
+    ) -> Tuple[List[Department], bool]:
+        """
+        Busca departamentos por texto (con prefijos y sin importar tildes) y filtros.
+        
+        Returns:
+            (departamentos de la página, hay_página_siguiente)
+        """
+        page = max(page, 1)
+        status = DepartmentStatus.AVAILABLE if available_only else None
+        # Se pide un elemento extra para saber si existe una página siguiente
+        results = self.department_repo.search(
+            text=text,
+            status=status,
+            filters=filters,
+            limit=per_page + 1,
+            offset=(page - 1) * per_page
+        )
+        return results[:per_page], len(results) > per_page
+    
+    def get_facets(
+        self,
+        text: Optional[str] = None,
+        available_only: bool = True,
+        filters: Optional[dict] = None
+    ) -> Optional[Dict]:
+        """
+        Conteos por característica e histogramas de precio/habitaciones para los
+        filtros actuales, calculados en la BD (una sola llamada RPC). None si la
+        función department_facets no está disponible: el catálogo se muestra sin conteos.
+        """
+        status = DepartmentStatus.AVAILABLE if available_only else None
+        return self.department_repo.get_facets(text=text, status=status, filters=filters)
+    
+    def get_similar_departments(self, department: Department, k: int = 4) -> List[Department]:
+        """Departamentos disponibles similares (vacío si no hay índice configurado)"""
+        if not self.recommendation_service:
+            return []
+        return self.recommendation_service.get_similar(department, k)
+    
     def get_department_by_id(self, department_id: str) -> Optional[Department]:
         """Obtiene un departamento por ID"""
         return self.department_repo.get_by_id(department_id)
     
-    def create_department(self, department: Department) -> Department:
-        """Crea un nuevo departamento (solo admin)"""
-        # Validaciones de negocio
+    def validate_department(self, department: Department) -> None:
+        """Validaciones de negocio de un departamento nuevo (ValueError si no es válido)"""
         if department.price <= 0:
             raise ValueError("El precio debe ser mayor a 0")
         if not department.title or not department.address:
             raise ValueError("Título y dirección son obligatorios")
-        
-        return self.department_repo.create(department)
+    
+    def create_department(self, department: Department) -> Department:
+        """Crea un nuevo departamento (solo admin)"""
+        self.validate_department(department)
+        return self._on_saved(self.department_repo.create(department))
+    
+    def create_departments(self, departments: List[Department]) -> List[Department]:
+        """Crea varios departamentos con un solo insert (importación masiva)"""
+        for department in departments:
+            self.validate_department(department)
+        created = self.department_repo.create_many(departments)
+        for department in created:
+            self._on_saved(department)
+        return created
     
     def update_department(self, department: Department) -> Department:
         """Actualiza un departamento (solo admin)"""
@@ -66,7 +135,7 @@ class DepartmentService:
                     # Log opcional: print(f"Desasignados {unassigned_count} usuarios del departamento {department.id}")
                     pass
         
-        return self.department_repo.update(department)
+        return self._on_saved(self.department_repo.update(department))
     
     def delete_department(self, department_id: str) -> bool:
         """Elimina un departamento (solo admin)"""
@@ -75,7 +144,10 @@ class DepartmentService:
         if dept and dept.status == DepartmentStatus.OCCUPIED:
             raise ValueError("No se puede eliminar un departamento ocupado")
         
-        return self.department_repo.delete(department_id)
+        deleted = self.department_repo.delete(department_id)
+        if deleted and self.recommendation_service:
+            self.recommendation_service.on_department_deleted(department_id)
+        return deleted
     
     def mark_as_occupied(self, department_id: str) -> Optional[Department]:
         """Marca un departamento como ocupado"""
@@ -84,7 +156,12 @@ class DepartmentService:
             return None
         
         dept.status = DepartmentStatus.OCCUPIED
-        return self.department_repo.update(dept)
+        return self._on_saved(self.department_repo.update(dept))
+    
+    def on_department_occupied(self, department_id: str) -> None:
+        """Saca de las recomendaciones un departamento que se ocupó fuera del servicio (ej: approve_payment)"""
+        if self.recommendation_service:
+            self.recommendation_service.on_department_deleted(department_id)
     
     def mark_as_available(self, department_id: str) -> Optional[Department]:
         """Marca un departamento como disponible y desasigna a los usuarios"""
@@ -100,7 +177,7 @@ class DepartmentService:
                 pass
         
         dept.status = DepartmentStatus.AVAILABLE
-        return self.department_repo.update(dept)
+        return self._on_saved(self.department_repo.update(dept))
     
     def upload_department_image(
         self,
@@ -125,7 +202,7 @@ class DepartmentService:
             
             # Actualizar departamento con URL de la imagen
             dept.image_url = image_url
-            return self.department_repo.update(dept)
+            return self._on_saved(self.department_repo.update(dept))
         except Exception as e:
             raise Exception(f"Error al subir imagen: {str(e)}")
 
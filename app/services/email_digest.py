@@ -0,0 +1,147 @@
+"""
+Correos a admins: uno por evento o un resumen periódico.
+
+Cada admin elige en su panel cada cuánto quiere recibir correos
+(users.email_digest_minutes). Con un intervalo, los eventos (nuevo pago,
+nuevo reporte, ...) se guardan en email_digest_queue y send_due() envía un
+solo correo con todos los pendientes cuando se cumple el intervalo. La llama
+el cron de Vercel (/admin/cron/email-digest) o scripts/send_email_digest.py.
+Sin intervalo, el correo se envía en segundo plano como antes.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from ..domain.entities import DigestEvent, User
+from ..observability.metrics import count_event, observe_operation
+from ..repositories.interfaces import EmailDigestRepository, UserRepository
+from .email_service import EmailService
+
+# Opciones del panel: minutos -> etiqueta (0 = un correo por evento)
+DIGEST_INTERVALS: Dict[int, str] = {
+    0: "Un correo por evento",
+    60: "Resumen cada hora",
+    240: "Resumen cada 4 horas",
+    1440: "Resumen diario",
+}
+
+# Intervalo más corto que admite un cron diario (ver Config.DIGEST_CRON_DAILY)
+DAILY_DIGEST_MINUTES = 1440
+
+# Margen sobre el intervalo (fracción): el cron no corre en el minuto exacto
+# (Vercel Hobby lo ejecuta en cualquier momento de la hora programada) y sin
+# margen un admin diario podía quedar sin resumen hasta el día siguiente
+DIGEST_TOLERANCE = 0.1
+
+
+@dataclass
+class DigestRunResult:
+    """Resultado de una ejecución de send_due"""
+    sent: int = 0  # Correos resumen enviados
+    events: int = 0  # Eventos incluidos en esos correos
+    failed: int = 0  # Admins cuyo envío falló (sus eventos vuelven a la cola)
+    seconds: float = 0.0
+
+
+def format_digest(events: List[DigestEvent]) -> str:
+    """Cuerpo del correo resumen (eventos en orden cronológico)"""
+    lines = [f"Resumen de actividad en PUCEHOGAR: {len(events)} evento(s).", ""]
+    for i, event in enumerate(events, 1):
+        when = event.created_at.strftime("%d/%m/%Y %H:%M UTC") if event.created_at else ""
+        lines.append(f"=== {i}. {event.subject} ({when}) ===")
+        lines.append(event.body.strip())
+        lines.append("")
+    lines.append("Puedes cambiar la frecuencia de estos correos en tu panel de administración.")
+    return "\n".join(lines)
+
+
+class EmailDigestService:
+    """Envía los correos de eventos a admins según su preferencia"""
+
+    def __init__(
+        self,
+        digest_repo: EmailDigestRepository,
+        user_repo: UserRepository,
+        email_service: EmailService,
+        cron_daily: bool = False
+    ):
+        self.digest_repo = digest_repo
+        self.user_repo = user_repo
+        self.email_service = email_service
+        self.cron_daily = cron_daily
+
+    @property
+    def intervals(self) -> Dict[int, str]:
+        """Opciones del panel: con cron diario no se ofrecen resúmenes más frecuentes"""
+        if not self.cron_daily:
+            return DIGEST_INTERVALS
+        return {m: label for m, label in DIGEST_INTERVALS.items() if m == 0 or m >= DAILY_DIGEST_MINUTES}
+
+    def effective_minutes(self, minutes: Optional[int]) -> int:
+        """Intervalo con el que realmente llegan los resúmenes (0 = al momento)"""
+        if minutes and self.cron_daily:
+            return max(minutes, DAILY_DIGEST_MINUTES)
+        return minutes or 0
+
+    def notify_admins(self, admins: Iterable[User], subject: str, body: str) -> None:
+        """
+        Correo de un evento para cada admin (sin repetir email): en segundo
+        plano si lo quiere al momento, a la cola (una sola inserción para
+        todos) si prefiere resumen.
+        """
+        immediate: List[User] = []
+        digest: List[User] = []
+        seen = set()
+        for admin in admins:
+            if not admin.email or admin.email in seen:
+                continue
+            seen.add(admin.email)
+            (digest if admin.email_digest_minutes else immediate).append(admin)
+
+        if digest:
+            now = datetime.now(timezone.utc)
+            try:
+                self.digest_repo.enqueue([DigestEvent("", a.id, subject, body, now) for a in digest])
+                count_event("email_digest_queued", len(digest))
+            except Exception:
+                immediate.extend(digest)  # Sin cola disponible: no perder el aviso
+        for admin in immediate:
+            self.email_service.send_email_async([admin.email], subject, body)
+
+    def set_preference(self, user_id: str, minutes: int) -> bool:
+        if minutes not in self.intervals:
+            raise ValueError("Frecuencia de correo inválida")
+        return self.user_repo.set_email_digest(user_id, minutes or None)
+
+    def send_due(self, now: Optional[datetime] = None) -> DigestRunResult:
+        """Envía el resumen a cada admin cuyo intervalo se cumplió y tiene eventos pendientes"""
+        now = now or datetime.now(timezone.utc)
+        result = DigestRunResult()
+        if not self.email_service.enabled:
+            return result  # Sin SMTP los eventos esperan en la cola
+        start = time.perf_counter()
+        for admin in self.user_repo.get_admins():
+            minutes = admin.email_digest_minutes
+            if not minutes or not admin.email:
+                continue
+            last = admin.email_digest_sent_at
+            if last and last + timedelta(minutes=minutes * (1 - DIGEST_TOLERANCE)) > now:
+                continue
+            events = self.digest_repo.pop(admin.id, now)
+            if not events:
+                continue
+            subject = f"Resumen PUCEHOGAR: {len(events)} evento(s)"
+            if self.email_service.send_email([admin.email], subject, format_digest(events)):
+                self.user_repo.mark_digest_sent(admin.id, now)
+                result.sent += 1
+                result.events += len(events)
+            else:
+                self.digest_repo.enqueue(events)
+                result.failed += 1
+        result.seconds = time.perf_counter() - start
+        count_event("email_digest_sent", result.sent)
+        count_event("email_digest_events", result.events)
+        observe_operation("email_digest", "send_due", result.seconds, error=bool(result.failed))
+        return result
@@ -1,8 +1,45 @@
 import smtplib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from email.message import EmailMessage
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from ..config import Config
+from ..observability.metrics import observe_operation
+
+# Pool compartido para envíos fuera de la petición. Pocos hilos: el SMTP es
+# lento pero el volumen es bajo. Al salir, Python espera los envíos pendientes.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# (destinatarios, asunto, cuerpo)
+Email = Tuple[List[str], str, str]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="email")
+    return _executor
+
+
+def _observed(operation: str, fn, *args):
+    """
+    Ejecuta fn en el hilo del pool registrando su latencia como
+    email_service.<operation> (el proxy instrumentado de deps solo mide la
+    llamada que encola, no el envío)
+    """
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+    except Exception:
+        observe_operation("email_service", operation, time.perf_counter() - start, error=True)
+        raise
+    observe_operation("email_service", operation, time.perf_counter() - start)
+    return result
 
 
 class EmailService:
@@ -16,6 +53,7 @@ class EmailService:
         self.password = Config.SMTP_PASSWORD
         self.from_email = Config.SMTP_FROM or self.user
         self.use_tls = Config.SMTP_USE_TLS
+        self.background = Config.EMAIL_BACKGROUND
 
     @property
     def enabled(self) -> bool:
@@ -34,29 +72,74 @@ class EmailService:
             return False
         return True
 
-    def send_email(self, to_emails: List[str], subject: str, body: str) -> bool:
-        """Envía un correo de texto plano. Retorna True si se envió, False si no."""
-        if not self.enabled:
-            return False
-        if not to_emails:
-            return False
-        valid_recipients = [e for e in to_emails if self._is_valid_email(e)]
+    def _build_message(self, to_emails: List[str], subject: str, body: str) -> Optional[EmailMessage]:
+        valid_recipients = [e for e in to_emails or [] if self._is_valid_email(e)]
         if not valid_recipients:
-            return False
-
+            return None
         msg = EmailMessage()
         msg["From"] = self.from_email
         msg["To"] = ", ".join(valid_recipients)
         msg["Subject"] = subject
         msg.set_content(body)
+        return msg
+
+    def send_email(self, to_emails: List[str], subject: str, body: str) -> bool:
+        """Envía un correo de texto plano. Retorna True si se envió, False si no."""
+        return self.send_many([(to_emails, subject, body)]) == 1
 
+    def send_many(self, emails: Sequence[Email]) -> int:
+        """
+        Envía varios correos en una sola sesión SMTP (una conexión y un login
+        para todo el lote). Retorna cuántos se enviaron.
+        """
+        if not self.enabled:
+            return 0
+        messages = [m for m in (self._build_message(*email) for email in emails) if m is not None]
+        if not messages:
+            return 0
+
+        sent = 0
         try:
             with smtplib.SMTP(self.host, self.port, timeout=10) as server:
                 if self.use_tls:
                     server.starttls()
                 server.login(self.user, self.password)
-                server.send_message(msg)
-            return True
+                for msg in messages:
+                    try:
+                        server.send_message(msg)
+                        sent += 1
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                        continue  # Un destinatario rechazado no corta el resto del lote
         except Exception:
             # Silenciar errores para no romper el flujo principal
-            return False
+            pass
+        return sent
+
+    def send_email_async(self, to_emails: List[str], subject: str, body: str) -> Optional[Future]:
+        """
+        Encola el correo y retorna de inmediato (la petición no espera al SMTP).
+        Con EMAIL_BACKGROUND=false (por defecto en Vercel) lo envía antes de
+        retornar y el Future ya viene resuelto. Retorna None si el envío está deshabilitado.
+        """
+        if not self.enabled or not to_emails:
+            return None
+        if not self.background:
+            future: Future = Future()
+            future.set_result(self.send_email(list(to_emails), subject, body))
+            return future
+        return _get_executor().submit(_observed, "send_email", self.send_email, list(to_emails), subject, body)
+
+    def send_many_async(self, emails: Sequence[Email]) -> Optional[Future]:
+        """
+        Como send_email_async pero para un lote: todos los correos van en una
+        sola sesión SMTP, en segundo plano o (con EMAIL_BACKGROUND=false) antes
+        de retornar. El Future resuelve a la cantidad de correos enviados.
+        """
+        emails = [(list(to), subject, body) for to, subject, body in emails if to]
+        if not self.enabled or not emails:
+            return None
+        if not self.background:
+            future: Future = Future()
+            future.set_result(self.send_many(emails))
+            return future
+        return _get_executor().submit(_observed, "send_many", self.send_many, emails)
@@ -0,0 +1,93 @@
+"""
+Idempotencia de los formularios de pago y reporte.
+
+Cada formulario lleva una clave única (idempotency_key, generada al
+renderizarlo). Al recibir el envío la clave se registra en idempotency_keys
+(clave primaria): si ya existía, el envío es un reintento (doble clic,
+reenvío del navegador móvil) y la ruta responde como la primera vez sin
+volver a subir archivos, insertar filas ni notificar a los admins.
+
+Las claves expiran a las IDEMPOTENCY_TTL_HOURS horas: una clave expirada se
+puede volver a registrar y purge_expired() las elimina, llamada desde el cron
+(/admin/cron/email-digest) o scripts/purge_idempotency_keys.py.
+"""
+
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from ..domain.entities import IdempotencyKey
+from ..observability.metrics import count_event
+from ..repositories.interfaces import IdempotencyRepository
+
+IDEMPOTENCY_TTL_HOURS = 24
+
+_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def new_idempotency_key() -> str:
+    """Clave para un formulario nuevo (campo oculto idempotency_key)"""
+    return uuid.uuid4().hex
+
+
+@dataclass
+class IdempotencyClaim:
+    """Resultado de registrar la clave de un envío"""
+    key: Optional[str]  # None: envío sin clave válida (se procesa como antes)
+    is_new: bool  # True: primer envío, hay que procesarlo
+    result_id: Optional[str] = None  # ID creado por el envío original
+
+    @property
+    def in_progress(self) -> bool:
+        """Reintento de un envío que todavía no termina"""
+        return not self.is_new and self.result_id is None
+
+
+class IdempotencyService:
+    """Registra las claves de los formularios y el resultado de cada envío"""
+
+    def __init__(self, idempotency_repo: IdempotencyRepository, ttl_hours: int = IDEMPOTENCY_TTL_HOURS):
+        self.idempotency_repo = idempotency_repo
+        self.ttl_hours = ttl_hours
+
+    def claim(self, key: Optional[str], user_id: str, scope: str) -> IdempotencyClaim:
+        """
+        Registra la clave del envío. is_new=False si ya se recibió antes: en ese
+        caso result_id es lo que creó el envío original (None si sigue en proceso).
+        """
+        key = (key or "").strip().lower()
+        if not _KEY_RE.match(key):
+            return IdempotencyClaim(None, True)
+        now = datetime.now(timezone.utc)
+        record = IdempotencyKey(key, user_id, scope, None, now, now + timedelta(hours=self.ttl_hours))
+        try:
+            row, created = self.idempotency_repo.claim(record)
+        except Exception as e:
+            # Sin la tabla (database/idempotency_keys.sql) se procesa como antes
+            print(f"⚠️  No se pudo registrar la clave de idempotencia: {e}")
+            return IdempotencyClaim(None, True)
+        if created:
+            return IdempotencyClaim(key, True)
+        if row is None or row.user_id != user_id or row.scope != scope:
+            raise ValueError("El formulario ya no es válido. Recarga la página e intenta de nuevo")
+        count_event("idempotent_replays", scope=scope)
+        return IdempotencyClaim(key, False, row.result_id)
+
+    def complete(self, claim: IdempotencyClaim, result_id: str) -> None:
+        """Guarda lo que creó el envío (los reintentos responden con esto)"""
+        claim.result_id = result_id
+        if claim.key and claim.is_new:
+            self.idempotency_repo.complete(claim.key, result_id)
+
+    def release(self, claim: IdempotencyClaim) -> None:
+        """Libera la clave si el envío falló antes de crear algo (se puede reintentar)"""
+        if claim.key and claim.is_new and claim.result_id is None:
+            self.idempotency_repo.release(claim.key)
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Elimina las claves expiradas; retorna cuántas. Los errores se propagan"""
+        purged = self.idempotency_repo.purge_expired(now or datetime.now(timezone.utc))
+        count_event("idempotency_keys_purged", purged)
+        return purged
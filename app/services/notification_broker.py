@@ -0,0 +1,224 @@
+"""
+Pub/sub de notificaciones para el stream SSE (/auth/notifications/stream).
+
+NotificationBroker reparte cada notificación nueva a los streams abiertos del
+usuario en este proceso (una cola por stream). Las notificaciones llegan al
+broker a través de un canal intercambiable:
+
+    - LocalChannel: NotificationService.create publica directamente en el
+      broker. Solo ve lo que se crea en este proceso (un único worker).
+    - PostgresChannel: un hilo escucha LISTEN pucehogar_notifications; el
+      trigger de database/notifications_notify.sql hace NOTIFY en cada INSERT,
+      incluidas las notificaciones creadas por funciones SQL (approve_payment,
+      review_payments). Sirve para varios procesos. Requiere psycopg y
+      DATABASE_URL.
+
+El broker recuerda la hora del último evento de cada usuario; si el canal ve
+todos los eventos desde antes de un Last-Event-ID, un stream que se reconecta
+puede saber sin consultar la BD que no se perdió nada.
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from ..domain.entities import Notification
+from ..repositories.supabase.hydration import parse_timestamp
+
+NOTIFY_CHANNEL = "pucehogar_notifications"
+# Cookie que pone el navegador mientras tiene un stream abierto: las páginas no
+# consultan las notificaciones, el navegador las muestra desde el stream
+STREAM_COOKIE = "notif_stream"
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+def notification_to_event(notification: Notification) -> dict:
+    """Datos que recibe el navegador por cada notificación"""
+    return {
+        "id": notification.id or None,
+        "title": notification.title,
+        "message": notification.message,
+        "link": notification.link,
+        "type": notification.type,
+        "count": notification.count,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+class Subscription:
+    """Cola de notificaciones de un stream abierto"""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._queue: "queue.Queue[Notification]" = queue.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def put(self, notification: Notification) -> None:
+        try:
+            self._queue.put_nowait(notification)
+        except queue.Full:
+            pass  # Cliente que no consume; al reconectar recupera con Last-Event-ID
+
+    def get(self, timeout: float) -> Optional[Notification]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class NotificationBroker:
+    """Reparte notificaciones a los streams abiertos de cada usuario"""
+
+    def __init__(self, channel: Optional["LocalChannel"] = None):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._last_event_at: Dict[str, datetime] = {}
+        self.channel = channel or LocalChannel()
+        self.channel.start(self.deliver)
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, notification: Notification) -> None:
+        """Publica una notificación recién creada (según el canal, se entrega aquí o vía la BD)"""
+        self.channel.publish(notification)
+
+    def deliver(self, notification: Notification) -> None:
+        """Entrega a los streams de este proceso (lo llama el canal)"""
+        created_at = notification.created_at or datetime.now(timezone.utc)
+        with self._lock:
+            previous = self._last_event_at.get(notification.user_id)
+            if previous is None or created_at > previous:
+                self._last_event_at[notification.user_id] = created_at
+            subscriptions = list(self._subscriptions.get(notification.user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(notification)
+
+    def may_have_missed(self, user_id: str, since: datetime) -> bool:
+        """
+        False solo si el canal vio todos los eventos desde `since` y ninguno
+        era para el usuario (entonces no hace falta consultar la BD). Solo el
+        canal postgres lo puede asegurar: con el canal local, las
+        notificaciones creadas en otro proceso o instancia no pasan por aquí.
+        """
+        if not self.channel.sees_all_processes:
+            return True
+        listening_since = self.channel.listening_since
+        if listening_since is None or since < listening_since:
+            return True
+        with self._lock:
+            last = self._last_event_at.get(user_id)
+        return last is not None and last > since
+
+
+class LocalChannel:
+    """Canal en memoria: publicar es entregar en este mismo proceso"""
+
+    # Solo ve lo que se publica en este proceso
+    sees_all_processes = False
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[Notification], None]] = None
+        self.listening_since: Optional[datetime] = None
+
+    def start(self, deliver: Callable[[Notification], None]) -> None:
+        self._deliver = deliver
+        self.listening_since = datetime.now(timezone.utc)
+
+    def publish(self, notification: Notification) -> None:
+        if self._deliver:
+            self._deliver(notification)
+
+
+class PostgresChannel(LocalChannel):
+    """
+    Canal LISTEN/NOTIFY. publish() no hace nada: el trigger de la tabla
+    notifications avisa de cada INSERT, venga de donde venga.
+    """
+
+    RECONNECT_DELAY = 5
+    sees_all_processes = True
+
+    def __init__(self, dsn: str, log: Callable[[str], None] = print):
+        super().__init__()
+        self.dsn = dsn
+        self.log = log
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[Notification], None]) -> None:
+        self._deliver = deliver
+        self._thread = threading.Thread(target=self._listen_forever, name="notifications-listen", daemon=True)
+        self._thread.start()
+
+    def publish(self, notification: Notification) -> None:
+        pass
+
+    def _listen_forever(self) -> None:
+        try:
+            import psycopg
+        except ImportError:
+            self.log("⚠️  NOTIFICATION_CHANNEL=postgres requiere psycopg; no habrá notificaciones en vivo")
+            return
+        while True:
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    self.listening_since = datetime.now(timezone.utc)
+                    for notify in conn.notifies():
+                        self._deliver(self._parse(notify.payload))
+            except Exception as e:
+                # Mientras está desconectado se pueden perder eventos
+                self.listening_since = None
+                self.log(f"⚠️  LISTEN {NOTIFY_CHANNEL} desconectado: {e}")
+                time.sleep(self.RECONNECT_DELAY)
+
+    @staticmethod
+    def _parse(payload: str) -> Notification:
+        row = json.loads(payload)
+        return Notification(
+            str(row["id"]),
+            row["user_id"],
+            row["title"],
+            row["message"],
+            row.get("link"),
+            row.get("type"),
+            bool(row.get("is_read")),
+            parse_timestamp(row.get("created_at")),
+            row.get("count") or 1,
+        )
+
+
+def build_channel(kind: str, dsn: str = "") -> LocalChannel:
+    """Canal según NOTIFICATION_CHANNEL ("local" o "postgres")"""
+    if kind == "postgres":
+        if not dsn:
+            raise ValueError("NOTIFICATION_CHANNEL=postgres requiere DATABASE_URL")
+        return PostgresChannel(dsn)
+    return LocalChannel()
+
+
+def format_event(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """Mensaje SSE (una línea data con JSON)"""
+    lines: List[str] = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
@@ -1,15 +1,53 @@
+import time
+import uuid
+from dataclasses import dataclass
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from ..domain.entities import Notification
+from ..observability.metrics import count_event, observe_operation
 from ..repositories.interfaces import NotificationRepository
+from .notification_broker import NotificationBroker
+from .read_mark_buffer import ReadMarkBuffer
+
+# Retención: notificaciones leídas con más de N días se eliminan en lotes
+RETENTION_DAYS = 90
+RETENTION_BATCH_SIZE = 1000
+# Eventos con la misma coalesce_key dentro de esta ventana se agrupan en una fila
+COALESCE_WINDOW_SECONDS = 3600
+
+
+@dataclass
+class RetentionResult:
+    """Resultado de una ejecución del job de retención"""
+    older_than: datetime
+    removed: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    archived: bool = False
+    complete: bool = True  # False si se detuvo por max_batches con filas pendientes
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
 
 
 class NotificationService:
     """Servicio para gestionar notificaciones"""
 
-    def __init__(self, repo: NotificationRepository):
+    def __init__(
+        self,
+        repo: NotificationRepository,
+        broker: Optional[NotificationBroker] = None,
+        read_buffer: Optional[ReadMarkBuffer] = None,
+    ):
         self.repo = repo
+        self.broker = broker
+        self.read_buffer = read_buffer
 
     def create(
         self,
@@ -27,16 +65,153 @@ class NotificationService:
             link=link,
             type=type,
             is_read=False,
-            created_at=datetime.utcnow().isoformat(),
+            created_at=datetime.now(timezone.utc),
         )
-        return self.repo.create(notif)
+        created = self.repo.create(notif)
+        self.publish(created)
+        return created
+
+    def notify_users(
+        self,
+        user_ids: List[str],
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        type: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window_seconds: int = COALESCE_WINDOW_SECONDS,
+    ) -> List[Notification]:
+        """
+        Notifica a varios usuarios (ej: todos los admins) con un solo upsert.
+
+        Con `coalesce_key` (ej: "payment_created:<tenant_id>"), si el usuario
+        ya tiene una notificación con esa clave en la ventana actual, se
+        actualiza (count + 1, mensaje, link y fecha del último evento) en lugar
+        de insertar otra. Retorna las notificaciones creadas o actualizadas.
+        """
+        user_ids = list(dict.fromkeys(u for u in user_ids if u))
+        if not user_ids:
+            return []
+        try:
+            notifications = self.repo.notify_users(
+                user_ids, title, message, link=link, type=type,
+                coalesce_key=coalesce_key, window_seconds=window_seconds,
+            )
+        except Exception:
+            # Sin database/coalesce_notifications.sql: una fila por usuario, sin agrupar
+            return [self.create(u, title, message, link=link, type=type) for u in user_ids]
+        for notification in notifications:
+            self.publish(notification)
+        return notifications
+
+    def publish(self, notification: Notification) -> None:
+        """Envía la notificación a los streams abiertos del usuario (no la guarda)"""
+        if self.broker:
+            try:
+                self.broker.publish(notification)
+            except Exception:
+                pass  # El aviso en vivo nunca debe romper la creación
+
+    def announce(
+        self,
+        user_id: str,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        type: Optional[str] = None,
+    ) -> None:
+        """
+        Avisa en vivo de una notificación que ya guardó la BD (ej: approve_payment).
+        Con el canal postgres no hace nada: el trigger ya la publica.
+        """
+        self.publish(Notification(
+            id="",
+            user_id=user_id,
+            title=title,
+            message=message,
+            link=link,
+            type=type,
+            is_read=False,
+            created_at=datetime.now(timezone.utc),
+        ))
+
+    def _pending_reads(self, user_id: str) -> set:
+        return self.read_buffer.pending_for(user_id) if self.read_buffer else set()
+
+    def get_unread_since(self, user_id: str, since: datetime, limit: int = 50) -> List[Notification]:
+        """No leídas creadas después de `since` (para reconexiones del stream)"""
+        pending = self._pending_reads(user_id)
+        notifications = self.repo.get_unread_since(user_id, since, limit=limit + len(pending))
+        return [n for n in notifications if n.id not in pending][:limit]
 
     def get_unread(self, user_id: str, limit: int = 10) -> List[Notification]:
-        return self.repo.get_unread_by_user(user_id, limit=limit)
+        # Las marcadas como leídas que aún esperan en el buffer no se muestran
+        pending = self._pending_reads(user_id)
+        notifications = self.repo.get_unread_by_user(user_id, limit=limit + len(pending))
+        return [n for n in notifications if n.id not in pending][:limit]
 
-    def mark_as_read(self, notification_id: str, user_id: str) -> bool:
+    def mark_as_read(self, notification_id: str, user_id: str, defer: bool = False) -> bool:
+        """
+        Marca una notificación como leída. Con `defer` (y buffer configurado)
+        solo la agrega al buffer: se escribe en el próximo lote.
+
+        Un ID que no es UUID (ej: ?notif_id= editado a mano) se ignora: en el
+        lote, Postgres rechazaría el UPDATE completo y con él las marcas válidas.
+        """
+        if not _is_uuid(notification_id):
+            return False
+        if defer and self.read_buffer:
+            self.read_buffer.add(user_id, notification_id)
+            return True
         return self.repo.mark_as_read(notification_id, user_id)
 
     def mark_all_as_read(self, user_id: str) -> bool:
         return self.repo.mark_all_as_read(user_id)
 
+    def purge_read(
+        self,
+        older_than_days: int = RETENTION_DAYS,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        archive: bool = False,
+        max_batches: Optional[int] = None,
+        pause: float = 0.0,
+    ) -> RetentionResult:
+        """
+        Elimina (o archiva) las notificaciones leídas con más de
+        `older_than_days` días, en lotes de `batch_size` (una transacción
+        corta por lote) hasta que no queden o se alcance `max_batches`.
+        `pause` son segundos de espera entre lotes para no saturar la BD.
+        Registra en /admin/metrics las filas eliminadas y la duración.
+        """
+        if older_than_days < 1:
+            raise ValueError("older_than_days debe ser al menos 1")
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser al menos 1")
+        result = RetentionResult(
+            older_than=datetime.now(timezone.utc) - timedelta(days=older_than_days),
+            archived=archive,
+        )
+        mode = "archive" if archive else "delete"
+        start = time.perf_counter()
+        error = False
+        try:
+            while True:
+                if max_batches is not None and result.batches >= max_batches:
+                    result.complete = False
+                    break
+                removed = self.repo.purge_read(result.older_than, batch_size, archive=archive)
+                result.batches += 1
+                result.removed += removed
+                count_event("notifications_purged", removed, mode=mode)
+                if removed < batch_size:
+                    break
+                if pause:
+                    time.sleep(pause)
+        except Exception:
+            error = True
+            raise
+        finally:
+            result.seconds = time.perf_counter() - start
+            observe_operation("notification_retention", mode, result.seconds, error=error)
+        return result
+
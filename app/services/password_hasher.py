@@ -0,0 +1,71 @@
+import threading
+from typing import Callable, Optional, TypeVar
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+T = TypeVar("T")
+
+
+def method_prefix(method: str) -> str:
+    """
+    Método y parámetros tal como werkzeug los guarda en el hash, completando
+    los valores por defecto ("scrypt" -> "scrypt:32768:8:1"), sin hashear nada
+    """
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2" and len(args) < 2:
+        hash_name = args[0] if args else "sha256"
+        return f"pbkdf2:{hash_name}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasherBusy(Exception):
+    """No hubo un cupo libre para hashear dentro del tiempo de espera (responder 503)"""
+
+
+class PasswordHasher:
+    """
+    Hash y verificación de contraseñas con un cupo de concurrencia.
+
+    scrypt/pbkdf2 consumen ~50-100 ms de CPU por llamada. Se ejecutan en el hilo
+    de la petición, como máximo `max_concurrency` a la vez (hashlib libera el
+    GIL, así que el resto de las peticiones sigue atendiéndose), y una petición
+    espera como máximo `queue_timeout` segundos por un cupo; si no lo obtiene se
+    lanza PasswordHasherBusy en lugar de acumular trabajo.
+
+    `method` es el método de werkzeug (ej: "scrypt", "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000"). needs_rehash() indica si un hash guardado se generó
+    con otros parámetros, para actualizarlo en el siguiente login exitoso.
+    """
+
+    def __init__(self, method: str = "scrypt", max_concurrency: int = 2, queue_timeout: float = 5.0):
+        self.method = method
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._prefix: Optional[str] = None
+
+    def _run(self, fn: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy("Demasiadas solicitudes de inicio de sesión, intenta de nuevo en unos segundos")
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    @property
+    def prefix(self) -> str:
+        """Método y parámetros tal como quedan guardados (ej: "scrypt:32768:8:1")"""
+        if self._prefix is None:
+            self._prefix = method_prefix(self.method)
+        return self._prefix
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.split("$", 1)[0] != self.prefix
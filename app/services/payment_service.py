@@ -1,9 +1,17 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 
-from ..domain.entities import Payment
+from ..domain.entities import Payment, PaymentApproval, PaymentReview
 from ..domain.enums import PaymentStatus
+from ..observability.metrics import count_event
 from ..repositories.interfaces import PaymentRepository, StorageRepository
+from .receipt_upload import (
+    MAX_RECEIPT_SIZE,
+    is_receipt_content_type,
+    receipt_folder,
+    receipt_type,
+    validate_receipt_name,
+)
 
 
 class PaymentService:
@@ -33,13 +41,26 @@ class PaymentService:
         """Obtiene pagos por estado"""
         return self.payment_repo.get_by_status(status)
     
+    def get_all_payments(self) -> List[Payment]:
+        """Obtiene todos los pagos, más recientes primero (para admin)"""
+        return self.payment_repo.get_all()
+    
+    def has_approved_payment(self, tenant_id: str, department_id: str) -> bool:
+        """Indica si el inquilino tiene un pago aprobado del departamento"""
+        return self.payment_repo.exists(tenant_id, department_id, PaymentStatus.APPROVED)
+    
+    def get_latest_payment_status(self, tenant_id: str, department_id: str) -> Optional[PaymentStatus]:
+        """Estado del último pago del inquilino para el departamento"""
+        return self.payment_repo.latest_status_for(tenant_id, department_id)
+    
     def create_payment(
         self,
         tenant_id: str,
         department_id: str,
         amount: float,
         month: str,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        receipt_url: Optional[str] = None
     ) -> Payment:
         """Crea un nuevo pago"""
         # Validaciones
@@ -59,6 +80,7 @@ class PaymentService:
             amount=amount,
             status=PaymentStatus.PENDING,
             month=month,
+            receipt_url=receipt_url,
             notes=notes
         )
         
@@ -70,11 +92,20 @@ class PaymentService:
         department_id: str,
         amount: float,
         month: str,
-        file_content: bytes,
-        file_name: str,
-        notes: Optional[str] = None
+        file_content: Optional[bytes] = None,
+        file_name: Optional[str] = None,
+        notes: Optional[str] = None,
+        receipt_path: Optional[str] = None
     ) -> Optional[Payment]:
-        """Crea un pago y sube el comprobante en un solo paso"""
+        """
+        Crea un pago y sube el comprobante en un solo paso.
+        Con receipt_path el comprobante ya está en Storage (subido por el
+        navegador con create_receipt_upload): solo se confirma el objeto.
+        """
+        if receipt_path:
+            return self._create_payment_with_uploaded_receipt(
+                tenant_id, department_id, amount, month, receipt_path, notes
+            )
         try:
             # Crear el pago
             payment = self.create_payment(
@@ -96,6 +127,101 @@ class PaymentService:
         except Exception as e:
             raise Exception(f"Error al crear pago con comprobante: {str(e)}")
     
+    def create_receipt_upload(
+        self,
+        tenant_id: str,
+        file_name: str,
+        size: Optional[int] = None
+    ) -> dict:
+        """
+        URL firmada (de corta duración) para que el navegador suba el
+        comprobante directo a Storage, en la carpeta del inquilino.
+        Retorna path, signed_url y token; ValueError si el archivo no es válido.
+        """
+        validate_receipt_name(file_name, size)
+        upload = self.storage_repo.create_upload_url(file_name, folder=receipt_folder(tenant_id))
+        count_event("receipt_upload_urls")
+        return upload
+    
+    def _create_payment_with_uploaded_receipt(
+        self,
+        tenant_id: str,
+        department_id: str,
+        amount: float,
+        month: str,
+        receipt_path: str,
+        notes: Optional[str]
+    ) -> Payment:
+        """
+        Confirma el objeto subido (tamaño, tipo declarado y firma de los
+        primeros bytes) y crea el pago.
+        """
+        # Solo objetos de la carpeta del inquilino (no rutas ajenas)
+        if not receipt_path.startswith(receipt_folder(tenant_id) + "/") or ".." in receipt_path:
+            raise ValueError("Comprobante inválido")
+        info = self.storage_repo.get_file_info(receipt_path)
+        if not info:
+            raise ValueError("No se encontró el comprobante subido. Vuelve a seleccionar el archivo")
+        if info["size"] <= 0:
+            raise ValueError("El archivo está vacío")
+        if info["size"] > MAX_RECEIPT_SIZE:
+            self.storage_repo.delete_file(receipt_path)
+            raise ValueError("El archivo es demasiado grande. Máximo 10MB")
+        if not is_receipt_content_type(info.get("content_type")) or not self._has_receipt_signature(receipt_path):
+            self.storage_repo.delete_file(receipt_path)
+            count_event("receipt_checks", outcome="rejected")
+            raise ValueError("El comprobante debe ser una imagen o un PDF")
+        
+        payment = self.create_payment(
+            tenant_id=tenant_id,
+            department_id=department_id,
+            amount=amount,
+            month=month,
+            notes=notes,
+            receipt_url=self.storage_repo.file_reference(receipt_path)
+        )
+        return payment
+    
+    def _has_receipt_signature(self, receipt_path: str) -> bool:
+        """
+        Firma de imagen o PDF en los primeros 16 bytes. Si la lectura con Range
+        falla se descarga el objeto (ya se confirmó que pesa como máximo
+        MAX_RECEIPT_SIZE) y se revisa aquí mismo, antes de crear el pago.
+        """
+        try:
+            head = self.storage_repo.read_file_head(receipt_path, 16)
+        except Exception as e:
+            print(f"⚠️  No se pudo leer el inicio del comprobante {receipt_path}: {e}")
+            count_event("receipt_checks", outcome="full_download")
+            try:
+                head = self.storage_repo.download_file(receipt_path)[:16]
+            except Exception as e:
+                print(f"⚠️  No se pudo verificar el comprobante {receipt_path}: {e}")
+                raise ValueError("No se pudo verificar el comprobante. Intenta de nuevo")
+        return receipt_type(head) is not None
+    
+    def receipt_links(self, payments: Iterable[Payment]) -> Dict[str, str]:
+        """
+        URL para ver el comprobante de cada pago: {receipt_url guardado: URL}.
+        Con bucket privado firma todas las que falten en una sola llamada.
+        """
+        references = [p.receipt_url for p in payments if p.receipt_url]
+        if not references:
+            return {}
+        try:
+            return self.storage_repo.resolve_urls(references)
+        except Exception:
+            return {}
+    
+    def receipt_link(self, receipt_url: Optional[str]) -> Optional[str]:
+        """URL para ver un comprobante (firmada si el bucket es privado)"""
+        if not receipt_url:
+            return None
+        try:
+            return self.storage_repo.resolve_urls([receipt_url]).get(receipt_url)
+        except Exception:
+            return None
+    
     def upload_receipt(
         self,
         payment_id: str,
@@ -124,14 +250,37 @@ class PaymentService:
     def approve_payment(
         self,
         payment_id: str,
-        reviewed_by: str
-    ) -> Optional[Payment]:
-        """Aprueba un pago (solo admin)"""
-        return self.payment_repo.update_status(
-            payment_id=payment_id,
-            status=PaymentStatus.APPROVED,
-            reviewed_by=reviewed_by
-        )
+        reviewed_by: str,
+        notification_link: Optional[str] = None
+    ) -> Optional[PaymentApproval]:
+        """
+        Aprueba un pago (solo admin) en una sola llamada a la BD: valida el
+        comprobante, aprueba, asigna el departamento al inquilino si no tiene
+        uno, lo marca ocupado y crea la notificación.
+        Retorna None si el pago no existe; ValueError si no tiene comprobante.
+        Si el pago ya no estaba pendiente no hace nada (already_reviewed).
+        """
+        return self.payment_repo.approve(payment_id, reviewed_by, notification_link)
+    
+    def review_payments(
+        self,
+        payment_ids: List[str],
+        status: PaymentStatus,
+        reviewed_by: str,
+        notes: Optional[str] = None,
+        notification_link_template: Optional[str] = None
+    ) -> List[PaymentReview]:
+        """
+        Aprueba o rechaza varios pagos pendientes en una sola llamada a la BD
+        (incluye asignación de departamentos y notificaciones).
+        notification_link_template: link de la notificación con "{id}" en lugar del ID del pago.
+        """
+        if status not in (PaymentStatus.APPROVED, PaymentStatus.REJECTED):
+            raise ValueError("Estado de revisión inválido")
+        ids = list(dict.fromkeys(pid for pid in payment_ids if pid))
+        if not ids:
+            raise ValueError("Selecciona al menos un pago")
+        return self.payment_repo.review_many(ids, status, reviewed_by, notes, notification_link_template)
     
     def reject_payment(
         self,
@@ -33,20 +33,13 @@ class RatingService:
         rating: int,
         comment: Optional[str] = None
     ) -> Rating:
-        """Crea una nueva calificación"""
+        """Crea la calificación del usuario, o la reemplaza si ya existía"""
         # Validar que la calificación esté entre 1 y 5
         if rating < 1 or rating > 5:
             raise ValueError("La calificación debe estar entre 1 y 5")
         
-        # Verificar si ya existe una calificación del usuario para este departamento
-        existing = self.rating_repo.get_by_tenant_and_department(tenant_id, department_id)
-        if existing:
-            # Actualizar la calificación existente
-            existing.rating = rating
-            existing.comment = comment
-            return self.rating_repo.update(existing)
-        
-        # Crear nueva calificación
+        # Una sola escritura: la BD resuelve si es alta o modificación
+        # (restricción única tenant_id + department_id), sin carrera ante doble envío
         new_rating = Rating(
             id="",  # Se generará en el repositorio
             tenant_id=tenant_id,
@@ -54,7 +47,7 @@ class RatingService:
             rating=rating,
             comment=comment
         )
-        return self.rating_repo.create(new_rating)
+        return self.rating_repo.upsert(new_rating)
     
     def update_rating(
         self,
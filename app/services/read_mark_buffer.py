@@ -0,0 +1,85 @@
+"""
+Buffer de notificaciones marcadas como leídas (?notif_id= en cualquier URL).
+
+Marcar como leída ya no hace un UPDATE antes de servir la página: el ID se
+agrega a un buffer del proceso y un hilo lo escribe en lotes, con un solo
+UPDATE ... WHERE id IN (...) por usuario, cada `interval` segundos o apenas
+se juntan `max_size` marcas. Al salir del proceso se escribe lo pendiente.
+
+Mientras tanto NotificationService oculta las marcas pendientes (o en
+escritura) de las no leídas: el usuario ve el cambio de inmediato.
+"""
+
+import atexit
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from ..observability.metrics import count_event
+
+# (user_id, ids) -> filas actualizadas
+FlushFunction = Callable[[str, List[str]], int]
+
+
+class ReadMarkBuffer:
+    """Marcas de leído pendientes por usuario, escritas en lotes"""
+
+    def __init__(self, flush_fn: FlushFunction, max_size: int = 50, interval: float = 2.0,
+                 log: Callable[[str], None] = print):
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.interval = interval
+        self.log = log
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, Set[str]] = {}
+        self._in_flight: Dict[str, Set[str]] = {}
+        self._size = 0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+
+    def add(self, user_id: str, notification_id: str) -> None:
+        with self._lock:
+            ids = self._pending.setdefault(user_id, set())
+            if notification_id in ids:
+                return
+            ids.add(notification_id)
+            self._size += 1
+            full = self._size >= self.max_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notification-read-marks", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def pending_for(self, user_id: str) -> Set[str]:
+        """IDs del usuario marcados como leídos que todavía no están en la BD"""
+        with self._lock:
+            return set(self._pending.get(user_id, ())) | set(self._in_flight.get(user_id, ()))
+
+    def flush(self) -> int:
+        """Escribe todas las marcas pendientes; retorna las filas actualizadas"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._size = self._pending, {}, 0
+                self._in_flight = batch
+            if not batch:
+                return 0
+            updated = 0
+            try:
+                for user_id, ids in batch.items():
+                    try:
+                        updated += self.flush_fn(user_id, sorted(ids))
+                    except Exception as e:
+                        self.log(f"⚠️  No se pudieron marcar {len(ids)} notificaciones como leídas: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+            count_event("notification_read_marks_flushed", updated)
+            return updated
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
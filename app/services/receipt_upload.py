@@ -0,0 +1,60 @@
+"""
+Subida directa de comprobantes a Storage.
+
+El navegador pide una URL firmada (PaymentService.create_receipt_upload),
+sube el archivo directamente a Supabase Storage y envía el formulario del
+pago solo con la ruta del objeto: los bytes no pasan por el worker de Flask.
+Al registrar el pago se confirma que el objeto existe, su tamaño, el tipo
+declarado y la firma de los primeros 16 bytes (una lectura con Range, o la
+descarga completa solo si esa lectura falla).
+"""
+
+import os
+from typing import Optional
+
+MAX_RECEIPT_SIZE = 10 * 1024 * 1024
+RECEIPT_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf"}
+
+# Carpeta de los objetos subidos con URL firmada (por usuario)
+UPLOADS_PREFIX = "uploads"
+
+# Firmas de archivo de los formatos aceptados (imagen o PDF)
+_MAGIC = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+    b"%PDF-": "application/pdf",
+}
+
+def receipt_folder(user_id: str) -> str:
+    return f"{UPLOADS_PREFIX}/{user_id}"
+
+
+def receipt_type(content: bytes) -> Optional[str]:
+    """Tipo MIME según los primeros bytes, None si no es imagen ni PDF"""
+    for magic, mime in _MAGIC.items():
+        if content.startswith(magic):
+            return mime
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def is_receipt_content_type(content_type: Optional[str]) -> bool:
+    """Tipo declarado en la subida: imagen o PDF (sin tipo se decide por la firma)"""
+    if not content_type:
+        return True
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith("image/") or content_type == "application/pdf"
+
+
+def validate_receipt_name(file_name: str, size: Optional[int] = None) -> None:
+    """Valida la extensión y el tamaño declarado antes de firmar la subida"""
+    ext = os.path.splitext(file_name or "")[1].lower()
+    if ext not in RECEIPT_EXTS:
+        raise ValueError("El comprobante debe ser una imagen o un PDF")
+    if size is not None and size <= 0:
+        raise ValueError("El archivo está vacío")
+    if size is not None and size > MAX_RECEIPT_SIZE:
+        raise ValueError("El archivo es demasiado grande. Máximo 10MB")
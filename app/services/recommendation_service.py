@@ -0,0 +1,275 @@
+import threading
+import time
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+# numpy se importa recién en el primer uso (ver _load_numpy) para no sumar su
+# tiempo de import al arranque en frío. Es opcional: sin él no hay recomendaciones.
+np = None
+
+
+def _load_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+from ..domain.entities import Department
+from ..domain.enums import DepartmentStatus
+from ..repositories.interfaces import DepartmentRepository
+
+
+NUMERIC_FEATURES = ("price", "rooms", "bathrooms", "area")
+BOOLEAN_FEATURES = ("has_terrace", "has_balcony", "sea_view", "parking", "furnished", "allow_pets")
+
+# Segundos entre revisiones de la versión de la tabla (cambios hechos por otros procesos)
+VERSION_CHECK_SECONDS = 60
+
+
+class RecommendationService:
+    """
+    Recomendaciones de "departamentos similares disponibles".
+
+    Mantiene en memoria una matriz (n_departamentos x 10) con precio, habitaciones,
+    baños, área y las seis características. La similitud (coseno sobre las columnas
+    estandarizadas) contra todos los departamentos se calcula con un único producto
+    matriz-vector. Cuando DepartmentService crea, edita o cambia el estado de un
+    departamento solo se actualiza su fila (normalizada con la media y desviación
+    de la última carga completa) y del top-k cacheado se descartan solo las
+    entradas a las que el cambio puede afectar.
+
+    Los cambios hechos por otros procesos (o workers) no pasan por aquí: cada
+    version_check_seconds se compara la versión de la tabla (cantidad de filas y
+    último updated_at) con la de la carga y, si cambió, la matriz se vuelve a leer.
+    La consulta y la carga se hacen fuera de _lock (mientras tanto se sigue
+    respondiendo con la matriz anterior) y la nueva matriz se instala de una vez.
+    """
+
+    def __init__(
+        self,
+        department_repo: DepartmentRepository,
+        top_k: int = 4,
+        version_check_seconds: float = VERSION_CHECK_SECONDS
+    ):
+        self.department_repo = department_repo
+        self.top_k = top_k
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.Lock()          # Protege la matriz y el cache
+        self._reload_lock = threading.Lock()   # Una sola revisión/carga a la vez
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._departments: Dict[str, Department] = {}
+        self._normalized = None   # Filas estandarizadas y de norma 1
+        self._mean = None
+        self._std = None
+        # department_id -> (ids del top-k, vector de consulta, puntaje del último)
+        self._cache: Dict[str, Tuple[List[str], object, float]] = {}
+        # Cambios recibidos durante una carga, para aplicarlos sobre la matriz nueva
+        self._pending: Optional[List[Tuple[str, object]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return _load_numpy()
+
+    def _vector(self, department: Department):
+        values = [getattr(department, name) for name in NUMERIC_FEATURES]
+        values = [float(v) if v is not None else np.nan for v in values]
+        values.extend(1.0 if getattr(department, name) else 0.0 for name in BOOLEAN_FEATURES)
+        return np.array(values, dtype=np.float64)
+
+    def _is_fresh(self) -> bool:
+        return self._loaded and time.monotonic() - self._checked_at < self.version_check_seconds
+
+    def _ensure_loaded(self) -> None:
+        """Revisa la versión y recarga la matriz sin retener _lock durante las consultas"""
+        with self._lock:
+            if self._is_fresh():
+                return
+            loaded = self._loaded
+        # Con matriz cargada, si otro hilo ya está revisando se usa la actual
+        if not self._reload_lock.acquire(blocking=not loaded):
+            return
+        try:
+            with self._lock:
+                if self._is_fresh():
+                    return
+                loaded, current_version = self._loaded, self._version
+                self._pending = []
+            now = time.monotonic()
+            version = self.department_repo.get_version()
+            # Sin versión (falló la consulta) se conserva la matriz cargada
+            if loaded and (version is None or version == current_version):
+                with self._lock:
+                    self._checked_at = now
+                return
+            try:
+                departments = self.department_repo.get_all_paged(DepartmentStatus.AVAILABLE)
+            except Exception as e:
+                print(f"⚠️  No se pudieron cargar los departamentos para recomendaciones: {e}")
+                if loaded:
+                    with self._lock:
+                        self._checked_at = now
+                    return
+                departments, version = [], None  # Se reintenta en la próxima revisión
+            state = self._build(departments)
+            with self._lock:
+                (self._ids, self._positions, self._departments,
+                 self._normalized, self._mean, self._std) = state
+                self._cache.clear()
+                for change, value in self._pending:
+                    if change == "saved":
+                        self._apply_saved(value)
+                    else:
+                        self._apply_deleted(value)
+                self._version = version
+                self._checked_at = now
+                self._loaded = True
+        finally:
+            with self._lock:
+                self._pending = None
+            self._reload_lock.release()
+
+    def _build(self, departments: List[Department]):
+        """Matriz normalizada y estadísticas de una carga completa (sin tocar el estado)"""
+        ids = [d.id for d in departments]
+        width = len(NUMERIC_FEATURES) + len(BOOLEAN_FEATURES)
+        raw = (
+            np.vstack([self._vector(d) for d in departments])
+            if departments else np.empty((0, width), dtype=np.float64)
+        )
+        if ids:
+            with warnings.catch_warnings():
+                # Columnas sin ningún valor (ej: área nunca cargada) dan NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                mean = np.nanmean(raw, axis=0)
+                std = np.nanstd(raw, axis=0)
+            mean = np.where(np.isnan(mean), 0.0, mean)
+            std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+        else:
+            mean = np.zeros(width)
+            std = np.ones(width)
+        positions = {dept_id: i for i, dept_id in enumerate(ids)}
+        return ids, positions, {d.id: d for d in departments}, _normalize(raw, mean, std), mean, std
+
+    def _normalize_one(self, department: Department):
+        return _normalize(self._vector(department)[np.newaxis, :], self._mean, self._std)[0]
+
+    def _invalidate(self, department_id: str, row=None) -> None:
+        """
+        Descarta del cache las entradas que incluyen al departamento, la suya
+        propia y, si la fila cambió, las que ahora podrían incluirlo (su puntaje
+        contra la consulta supera al del último del top-k).
+        """
+        stale = [
+            key for key, (ids, query, worst) in self._cache.items()
+            if key == department_id or department_id in ids
+            or (row is not None and float(query @ row) > worst)
+        ]
+        for key in stale:
+            del self._cache[key]
+
+    def _remove_row(self, department_id: str) -> None:
+        position = self._positions.pop(department_id, None)
+        if position is None:
+            return
+        # Se mueve la última fila al hueco para no desplazar toda la matriz
+        last = len(self._ids) - 1
+        if position != last:
+            last_id = self._ids[last]
+            self._normalized[position] = self._normalized[last]
+            self._ids[position] = last_id
+            self._positions[last_id] = position
+        self._ids.pop()
+        self._normalized = self._normalized[:last]
+        self._departments.pop(department_id, None)
+
+    def _apply_saved(self, department: Department) -> None:
+        if department.status != DepartmentStatus.AVAILABLE:
+            self._apply_deleted(department.id)
+            return
+        row = self._normalize_one(department)
+        position = self._positions.get(department.id)
+        if position is None:
+            self._positions[department.id] = len(self._ids)
+            self._ids.append(department.id)
+            self._normalized = np.vstack([self._normalized, row])
+        else:
+            self._normalized[position] = row
+        self._departments[department.id] = department
+        self._invalidate(department.id, row)
+
+    def _apply_deleted(self, department_id: str) -> None:
+        self._remove_row(department_id)
+        self._invalidate(department_id)
+
+    def on_department_saved(self, department: Optional[Department]) -> None:
+        """Actualiza la fila del departamento (alta, edición o cambio de estado)"""
+        if not self.enabled or not department:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("saved", department))
+            if self._loaded:
+                self._apply_saved(department)
+            # Sin cargar: se construirá completa en la primera consulta
+
+    def on_department_deleted(self, department_id: str) -> None:
+        """Quita el departamento de la matriz"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("deleted", department_id))
+            if self._loaded:
+                self._apply_deleted(department_id)
+
+    def get_similar(self, department: Department, k: Optional[int] = None) -> List[Department]:
+        """Retorna hasta k departamentos disponibles similares (excluye al propio)"""
+        if not self.enabled or not department:
+            return []
+        k = k or self.top_k
+        self._ensure_loaded()
+        with self._lock:
+            if not self._loaded:
+                return []
+            cached = self._cache.get(department.id)
+            # Un top más corto que k solo sirve si ya tenía a todos los candidatos
+            if cached is None or (len(cached[0]) < k and cached[2] != -np.inf):
+                cached = self._top_k(department, max(k, self.top_k))
+                self._cache[department.id] = cached
+            return [self._departments[dept_id] for dept_id in cached[0][:k] if dept_id in self._departments]
+
+    def _top_k(self, department: Department, k: int) -> Tuple[List[str], object, float]:
+        position = self._positions.get(department.id)
+        if position is not None:
+            query = self._normalized[position].copy()
+        else:
+            query = self._normalize_one(department)
+        n = len(self._ids)
+        candidates = min(k, n - (1 if position is not None else 0))
+        if candidates <= 0:
+            return [], query, -np.inf
+
+        scores = self._normalized @ query
+        if position is not None:
+            scores[position] = -np.inf
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+        # Con menos candidatos que k cualquier fila nueva entra en el top
+        worst = float(scores[top[-1]]) if candidates == k else -np.inf
+        return [self._ids[i] for i in top], query, worst
+
+
+def _normalize(vectors, mean, std):
+    """Estandariza columnas (valores faltantes = media) y normaliza filas a norma 1"""
+    scaled = (vectors - mean) / std
+    scaled = np.where(np.isnan(scaled), 0.0, scaled)
+    norms = np.linalg.norm(scaled, axis=-1, keepdims=True)
+    return scaled / np.where(norms == 0, 1.0, norms)
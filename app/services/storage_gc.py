@@ -0,0 +1,164 @@
+"""
+Recolector de objetos huérfanos de Storage.
+
+Un objeto queda huérfano cuando ninguna fila lo referencia: el pago falló
+después de subir el comprobante, se reemplazó o eliminó la imagen de un
+departamento sin borrar el archivo, o el navegador subió un comprobante
+(subida directa) y nunca envió el formulario.
+
+collect() arma el conjunto de objetos referenciados leyendo por páginas
+departments.image_url*, payments.receipt_url y reports.attachment_url, lista
+cada bucket por páginas y elimina (en lotes, con un solo remove() por lote)
+los objetos no referenciados más antiguos que el período de gracia. El
+período de gracia protege las subidas recientes cuya fila todavía no existe.
+Con dry_run solo informa qué eliminaría. Lo ejecuta scripts/storage_gc.py.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..observability.metrics import count_event, observe_operation
+from ..repositories.interfaces import (
+    DepartmentRepository,
+    PaymentRepository,
+    ReportRepository,
+    StorageRepository,
+)
+
+GC_GRACE_HOURS = 24
+# Las URLs de subida directa valen 2 h: el período de gracia debe ser mayor
+MIN_GRACE_HOURS = 3
+GC_BATCH_SIZE = 100
+GC_PAGE_SIZE = 1000
+
+
+@dataclass
+class BucketGCResult:
+    """Resultado del recolector en un bucket"""
+    bucket: str
+    scanned: int = 0  # Objetos listados
+    referenced: int = 0  # Objetos con alguna fila que los referencia
+    recent: int = 0  # Huérfanos dentro del período de gracia (se conservan)
+    orphans: List[str] = field(default_factory=list)  # Huérfanos a eliminar (o eliminados)
+    orphan_bytes: int = 0
+    deleted: int = 0
+
+
+@dataclass
+class StorageGCResult:
+    """Resultado de una ejecución de collect"""
+    older_than: datetime
+    dry_run: bool
+    references: int = 0  # Valores leídos de la BD (URLs o rutas)
+    buckets: List[BucketGCResult] = field(default_factory=list)
+    seconds: float = 0.0
+    complete: bool = True  # False si se alcanzó max_delete
+
+
+class StorageGCService:
+    """Encuentra y elimina objetos de Storage que ninguna fila referencia"""
+
+    def __init__(
+        self,
+        storage_repos: Sequence[StorageRepository],
+        department_repo: DepartmentRepository,
+        payment_repo: PaymentRepository,
+        report_repo: ReportRepository,
+        log: Callable[[str], None] = print,
+    ):
+        # Un repositorio por bucket (imágenes y comprobantes pueden compartirlo)
+        self.storage_repos: Dict[str, StorageRepository] = {}
+        for repo in storage_repos:
+            self.storage_repos.setdefault(repo.bucket, repo)
+        self.department_repo = department_repo
+        self.payment_repo = payment_repo
+        self.report_repo = report_repo
+        self.log = log
+
+    def _referenced_paths(self, page_size: int) -> Tuple[Dict[str, Set[str]], int]:
+        """Rutas referenciadas por bucket y valores leídos; una consulta paginada por tabla"""
+        paths: Dict[str, Set[str]] = {bucket: set() for bucket in self.storage_repos}
+        sources = (
+            self.department_repo.iter_image_urls(page_size),
+            self.payment_repo.iter_receipt_urls(page_size),
+            self.report_repo.iter_attachment_urls(page_size),
+        )
+        total = 0
+        for source in sources:
+            for reference in source:
+                total += 1
+                for bucket, repo in self.storage_repos.items():
+                    path = repo.object_path(reference)
+                    if path:
+                        paths[bucket].add(path)
+        return paths, total
+
+    def collect(
+        self,
+        grace_hours: float = GC_GRACE_HOURS,
+        dry_run: bool = False,
+        batch_size: int = GC_BATCH_SIZE,
+        page_size: int = GC_PAGE_SIZE,
+        max_delete: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> StorageGCResult:
+        """
+        Elimina los objetos sin referencias creados antes de now - grace_hours.
+        Si falla la lectura de referencias, o se leyeron menos filas que las que
+        tiene alguna tabla (IncompleteReadError), no se elimina nada: la
+        excepción se propaga antes de listar los buckets.
+        """
+        if grace_hours < MIN_GRACE_HOURS:
+            raise ValueError(f"El período de gracia debe ser de al menos {MIN_GRACE_HOURS} horas")
+        if batch_size <= 0 or page_size <= 0:
+            raise ValueError("El tamaño de lote y de página deben ser mayores a 0")
+        now = now or datetime.now(timezone.utc)
+        result = StorageGCResult(older_than=now - timedelta(hours=grace_hours), dry_run=dry_run)
+        start = time.perf_counter()
+        error = True
+        try:
+            # Primero las referencias: un objeto subido después del corte es
+            # reciente y lo protege el período de gracia
+            referenced, result.references = self._referenced_paths(page_size)
+            budget = max_delete
+            for bucket, repo in self.storage_repos.items():
+                stats = BucketGCResult(bucket)
+                result.buckets.append(stats)
+                for obj in repo.iter_objects(page_size=page_size):
+                    stats.scanned += 1
+                    if obj["path"] in referenced[bucket]:
+                        stats.referenced += 1
+                        continue
+                    created_at = obj.get("created_at")
+                    if created_at is None or created_at > result.older_than:
+                        stats.recent += 1
+                        continue
+                    if budget is not None and budget <= 0:
+                        result.complete = False
+                        break
+                    stats.orphans.append(obj["path"])
+                    stats.orphan_bytes += obj.get("size") or 0
+                    if budget is not None:
+                        budget -= 1
+                # Se elimina después de listar: borrar entre páginas correría el offset
+                for i in range(0, len(stats.orphans), batch_size):
+                    stats.deleted += self._remove(repo, stats.orphans[i:i + batch_size], dry_run)
+                if not dry_run:
+                    count_event("storage_gc_deleted", stats.deleted, bucket=bucket)
+            error = False
+        finally:
+            result.seconds = time.perf_counter() - start
+            observe_operation("storage_gc", "dry_run" if dry_run else "collect", result.seconds, error=error)
+        return result
+
+    def _remove(self, repo: StorageRepository, paths: List[str], dry_run: bool) -> int:
+        if not paths or dry_run:
+            return 0
+        try:
+            return repo.delete_files(paths)
+        except Exception as e:
+            # El lote queda para la próxima ejecución
+            self.log(f"⚠️  No se pudieron eliminar {len(paths)} objetos de '{repo.bucket}': {e}")
+            return 0
@@ -23,3 +23,253 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+
+// Notificaciones en vivo (SSE)
+// Mientras hay un stream abierto el navegador guarda las notificaciones no
+// leídas en sessionStorage y pone la cookie notif_stream: las páginas siguientes
+// no las consultan y se muestran desde esta caché, y el stream se reanuda con
+// el último evento recibido (last_event_id) en lugar de pedir todo otra vez.
+document.addEventListener('DOMContentLoaded', function() {
+    const root = document.getElementById('notifications');
+    if (!root || !root.dataset.streamUrl || !window.EventSource) {
+        return;
+    }
+    const STREAM_COOKIE = 'notif_stream';
+    const COOKIE_MAX_AGE = 60;
+    const MAX_ITEMS = 8;
+    const cacheKey = 'notifications:' + root.dataset.user;
+    const menu = root.querySelector('.dropdown-menu');
+
+    function loadCache() {
+        try {
+            return JSON.parse(sessionStorage.getItem(cacheKey));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function saveCache(cache) {
+        try {
+            sessionStorage.setItem(cacheKey, JSON.stringify(cache));
+        } catch (e) {
+            // Sin sessionStorage: solo se pierde la caché entre páginas
+        }
+    }
+
+    function setStreamCookie(active) {
+        document.cookie = STREAM_COOKIE + '=' + (active ? '1' : '') + '; path=/; max-age=' +
+            (active ? COOKIE_MAX_AGE : 0) + '; SameSite=Lax';
+    }
+
+    function itemLink(n) {
+        const link = n.link || root.dataset.defaultLink;
+        if (!n.id) {
+            return link;
+        }
+        return link + (link.indexOf('?') >= 0 ? '&' : '?') + 'notif_id=' + encodeURIComponent(n.id);
+    }
+
+    // Las notificaciones avisadas sin ID (creadas por la BD) se reemplazan
+    // por la misma notificación con ID si llega al reconectar
+    function sameNotification(a, b) {
+        if (a.id && b.id) {
+            return a.id === b.id;
+        }
+        return a.title === b.title && a.link === b.link;
+    }
+
+    function formatDate(value) {
+        if (!value) {
+            return '';
+        }
+        const d = new Date(value);
+        const pad = function(x) { return String(x).padStart(2, '0'); };
+        return pad(d.getDate()) + '/' + pad(d.getMonth() + 1) + '/' + d.getFullYear() + ' ' +
+            pad(d.getHours()) + ':' + pad(d.getMinutes());
+    }
+
+    function textDiv(className, text) {
+        const div = document.createElement('div');
+        div.className = className;
+        div.textContent = text || '';
+        return div;
+    }
+
+    function render(items) {
+        const count = items.length;
+        root.querySelectorAll('[data-notifications-count]').forEach(function(badge) {
+            badge.textContent = count;
+            badge.classList.toggle('d-none', count === 0);
+        });
+        const icon = root.querySelector('[data-notifications-icon]');
+        icon.classList.toggle('bi-bell-fill', count > 0);
+        icon.classList.toggle('bi-bell', count === 0);
+        root.querySelector('[data-notifications-mark-read]').classList.toggle('d-none', count === 0);
+
+        menu.querySelectorAll('.notification-item').forEach(function(li) { li.remove(); });
+        if (count === 0) {
+            const li = document.createElement('li');
+            li.className = 'notification-item';
+            li.appendChild(textDiv('dropdown-item text-muted small', 'Sin notificaciones'));
+            menu.appendChild(li);
+            return;
+        }
+        items.forEach(function(n) {
+            const li = document.createElement('li');
+            li.className = 'notification-item';
+            const a = document.createElement('a');
+            a.className = 'dropdown-item small';
+            a.href = itemLink(n);
+            a.dataset.notificationId = n.id || '';
+            const title = textDiv('fw-semibold', n.title);
+            if (n.count > 1) {
+                // Eventos agrupados en la misma notificación
+                const count = document.createElement('span');
+                count.className = 'badge bg-light text-dark ms-1';
+                count.textContent = '×' + n.count;
+                title.appendChild(count);
+            }
+            a.appendChild(title);
+            a.appendChild(textDiv('text-muted', n.message));
+            a.appendChild(textDiv('text-muted small', formatDate(n.created_at)));
+            li.appendChild(a);
+            const divider = document.createElement('li');
+            divider.className = 'notification-item';
+            divider.innerHTML = '<hr class="dropdown-divider">';
+            menu.appendChild(li);
+            menu.appendChild(divider);
+        });
+    }
+
+    // Con la cookie puesta el servidor no envió la lista: usar la caché (si
+    // esta pestaña no la tiene, el stream empieza con un snapshot)
+    let cache = root.dataset.streamed ? loadCache() : null;
+    if (cache) {
+        render(cache.items);
+    }
+
+    function update(mutator, eventId) {
+        cache = cache || { items: [], lastEventId: null };
+        mutator(cache);
+        if (eventId) {
+            cache.lastEventId = eventId;
+        }
+        saveCache(cache);
+        render(cache.items);
+    }
+
+    // Abrir una notificación o marcar todas como leídas cambia las no leídas
+    menu.addEventListener('click', function(event) {
+        const link = event.target.closest('[data-notification-id]');
+        if (link && link.dataset.notificationId && cache) {
+            const id = link.dataset.notificationId;
+            cache.items = cache.items.filter(function(n) { return String(n.id) !== id; });
+            saveCache(cache);
+        }
+    });
+    root.querySelector('[data-notifications-mark-read] form').addEventListener('submit', function() {
+        if (cache) {
+            cache.items = [];
+            saveCache(cache);
+        }
+    });
+
+    let url = root.dataset.streamUrl;
+    if (cache && cache.lastEventId) {
+        url += '?last_event_id=' + encodeURIComponent(cache.lastEventId);
+    }
+    const source = new EventSource(url);
+    let cookieTimer = null;
+
+    source.addEventListener('open', function() {
+        setStreamCookie(true);
+        if (!cookieTimer) {
+            cookieTimer = setInterval(function() {
+                if (source.readyState === EventSource.OPEN) {
+                    setStreamCookie(true);
+                }
+            }, (COOKIE_MAX_AGE / 3) * 1000);
+        }
+    });
+
+    source.addEventListener('snapshot', function(event) {
+        const data = JSON.parse(event.data);
+        update(function(c) { c.items = data.notifications.slice(0, MAX_ITEMS); }, event.lastEventId);
+    });
+
+    source.addEventListener('notification', function(event) {
+        const n = JSON.parse(event.data);
+        update(function(c) {
+            c.items = [n].concat(c.items.filter(function(item) { return !sameNotification(item, n); }))
+                .slice(0, MAX_ITEMS);
+        }, event.lastEventId);
+    });
+
+    source.addEventListener('error', function() {
+        // CLOSED: el servidor rechazó el stream (204/401); sin stream hay que consultar
+        if (source.readyState === EventSource.CLOSED) {
+            setStreamCookie(false);
+            clearInterval(cookieTimer);
+        }
+    });
+});
+
+
+// Subida directa de comprobantes
+// Los formularios con data-direct-upload piden una URL firmada al servidor,
+// suben el archivo directo a Storage y envían solo la ruta del objeto
+// (receipt_path). Si algo falla se envía el formulario con el archivo como antes.
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('form[data-direct-upload]').forEach(function(form) {
+        const input = form.querySelector('input[type="file"][name="receipt"]');
+        const pathInput = form.querySelector('input[name="receipt_path"]');
+        if (!input || !pathInput || !window.fetch || !window.FormData) {
+            return;
+        }
+        form.addEventListener('submit', function(event) {
+            const file = input.files[0];
+            if (!file || !form.checkValidity()) {
+                return;
+            }
+            event.preventDefault();
+            const buttons = form.querySelectorAll('button[type="submit"]');
+            buttons.forEach(function(b) { b.disabled = true; });
+
+            fetch(form.dataset.directUpload, {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({file_name: file.name, size: file.size})
+            }).then(function(response) {
+                return response.json().then(function(data) {
+                    if (!response.ok) {
+                        throw new Error(data.error || 'upload-url');
+                    }
+                    return data;
+                });
+            }).then(function(upload) {
+                const body = new FormData();
+                body.append('cacheControl', '3600');
+                body.append('', file);
+                return fetch(upload.signed_url, {
+                    method: 'PUT',
+                    headers: {'x-upsert': 'false'},
+                    body: body
+                }).then(function(response) {
+                    if (!response.ok) {
+                        throw new Error('upload');
+                    }
+                    return upload.path;
+                });
+            }).then(function(path) {
+                // El archivo ya está en Storage: no volver a enviarlo al servidor
+                pathInput.value = path;
+                input.removeAttribute('name');
+            }).catch(function() {
+                pathInput.value = '';
+            }).then(function() {
+                form.submit();
+            });
+        });
+    });
+});
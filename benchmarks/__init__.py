@@ -0,0 +1 @@
+"""Benchmarks de rutas sobre un backend en memoria (ver benchmarks/__main__.py)"""
@@ -0,0 +1,108 @@
+"""
+Benchmarks de rutas con datos sembrados en memoria.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks run --output benchmarks/baseline.json
+    python -m benchmarks run --scale 0.1 --iterations 10 --routes admin.
+    python -m benchmarks run --latency-ms 5           # simula el viaje de red
+    python -m benchmarks compare benchmarks/baseline.json current.json --threshold 0.2
+
+`compare` sale con código 1 si hay regresiones.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from .seed import Volumes
+
+
+def _run(args) -> int:
+    from .harness import run
+
+    volumes = Volumes().scaled(args.scale) if args.scale != 1 else Volumes()
+    for name in ("departments", "payments", "reports", "ratings", "notifications"):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(volumes, name, value)
+
+    print(f"Volúmenes: {volumes}")
+    result = run(
+        volumes,
+        iterations=args.iterations,
+        latency_ms=args.latency_ms,
+        route_filter=args.routes,
+        seed_value=args.seed,
+        time_budget_s=args.time_budget,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"✅ Resultados guardados en {args.output}")
+    return 0
+
+
+def _compare(args) -> int:
+    from .harness import compare
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    if baseline["meta"].get("volumes") != current["meta"].get("volumes"):
+        print("⚠️  Los volúmenes de datos no coinciden; la comparación puede no ser válida")
+
+    regressions = compare(baseline, current, threshold=args.threshold, min_ms=args.min_ms)
+    for name, after in current.get("routes", {}).items():
+        before = baseline.get("routes", {}).get(name)
+        if before:
+            change = (after["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            print(f"{name:<55} p95 {before['p95_ms']:>9.2f} -> {after['p95_ms']:>9.2f} ms ({change:+.0f}%)  "
+                  f"consultas {before['queries']:.1f} -> {after['queries']:.1f}")
+    if not regressions:
+        print("✅ Sin regresiones")
+        return 0
+    print()
+    print(f"❌ {len(regressions)} regresión(es):")
+    for r in regressions:
+        print(f"  {r['route']}: {r['metric']} {r['baseline']} -> {r['current']}")
+    return 1
+
+
+def main() -> int:
+    # Ejecutable desde la raíz del proyecto sin instalar el paquete
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de rutas")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Siembra datos y mide todas las rutas")
+    run_parser.add_argument("--scale", type=float, default=1.0,
+                            help="Factor sobre los volúmenes por defecto (ej: 0.1)")
+    for name in ("departments", "payments", "reports", "ratings", "notifications"):
+        run_parser.add_argument(f"--{name}", type=int, default=None)
+    run_parser.add_argument("--iterations", type=int, default=20, help="Peticiones medidas por ruta")
+    run_parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por consulta")
+    run_parser.add_argument("--routes", default=None, help="Solo rutas que contengan este texto")
+    run_parser.add_argument("--time-budget", type=float, default=10.0,
+                            help="Segundos aproximados por ruta; las rutas lentas se miden menos veces (mínimo 3)")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", default=None, help="Archivo JSON de resultados (baseline)")
+    run_parser.set_defaults(func=_run)
+
+    compare_parser = sub.add_parser("compare", help="Compara dos resultados")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="Aumento relativo de p50/p95 tolerado (default 0.2 = 20%%)")
+    compare_parser.add_argument("--min-ms", type=float, default=1.0,
+                                help="Diferencia mínima en ms para contar como regresión")
+    compare_parser.set_defaults(func=_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,649 @@
+"""
+Cliente de Supabase en memoria para benchmarks.
+
+Implementa el subconjunto de la API de supabase-py / postgrest que usan los
+repositorios (table/from_, select, eq, neq, gt, gte, lt, lte, in_, is_, like,
+ilike, order, limit, range, single, maybe_single, insert, update, upsert, delete,
+rpc, storage.from_). Así los benchmarks ejecutan los repositorios reales
+(incluida la conversión de filas a entidades) sin red ni base de datos.
+
+- Los filtros de igualdad usan índices hash por columna (se construyen la
+  primera vez y se invalidan al escribir), para que 500k filas no conviertan
+  cada consulta en un recorrido completo.
+- latency_ms agrega una espera fija por consulta para simular el viaje de red
+  y hacer visibles los N+1 en los tiempos.
+- Las funciones RPC se registran en FakeSupabaseClient.rpc_functions.
+"""
+
+import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from postgrest.exceptions import APIError
+
+from app.repositories.supabase.department_repo import fold_accents
+
+
+class FakeResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sort_key(value):
+    # Los NULL van al final en orden ascendente (como Postgres)
+    return (value is None, value)
+
+
+def _like_to_regex(pattern: str, flags: int = 0):
+    parts = (re.escape(part) for part in pattern.split("%"))
+    return re.compile("^" + ".*".join(parts) + "$", flags | re.DOTALL)
+
+
+class _Filter:
+    __slots__ = ("column", "op", "value", "negate")
+
+    def __init__(self, column: str, op: str, value: Any, negate: bool = False):
+        self.column = column
+        self.op = op
+        self.value = value
+        if op in ("like", "ilike"):
+            self.value = _like_to_regex(value, re.IGNORECASE if op == "ilike" else 0)
+        elif op == "in":
+            self.value = set(value)
+        self.negate = negate
+
+    def matches(self, row: dict) -> bool:
+        current = row.get(self.column)
+        op, value = self.op, self.value
+        if op == "eq":
+            result = current == value
+        elif op == "neq":
+            result = current != value
+        elif op == "in":
+            result = current in value
+        elif op == "is":
+            result = current is None if value in (None, "null") else current is value
+        elif current is None:
+            result = False
+        elif op == "gt":
+            result = current > value
+        elif op == "gte":
+            result = current >= value
+        elif op == "lt":
+            result = current < value
+        elif op == "lte":
+            result = current <= value
+        else:  # like / ilike
+            result = bool(value.match(str(current)))
+        return not result if self.negate else result
+
+
+class _Not:
+    """Permite query.not_.eq(...) como en postgrest"""
+
+    def __init__(self, query: "FakeQuery"):
+        self._query = query
+
+    def __getattr__(self, name: str):
+        def add(column, value):
+            return self._query._add_filter(column, name.rstrip("_"), value, negate=True)
+        return add
+
+
+class FakeQuery:
+    """Builder encadenable que imita a los request builders de postgrest"""
+
+    def __init__(self, client: "FakeSupabaseClient", table: str, source: Optional[Callable[[], Any]] = None):
+        self.client = client
+        self.table = table
+        self._source = source  # Filas de una función RPC (None = tabla)
+        self._operation = "select"
+        self._columns: Optional[List[str]] = None
+        self._count = None
+        self._payload: Any = None
+        self._on_conflict: Optional[List[str]] = None
+        self._ignore_duplicates = False
+        self._filters: List[_Filter] = []
+        self._order: List[tuple] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single: Optional[str] = None
+
+    # --- operaciones -------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "FakeQuery":
+        joined = ",".join(columns) if columns else "*"
+        names = [c.strip() for c in joined.split(",") if c.strip()]
+        self._columns = None if "*" in names else names
+        self._count = count
+        return self
+
+    def insert(self, data, **kwargs) -> "FakeQuery":
+        self._operation = "insert"
+        self._payload = data
+        return self
+
+    def upsert(self, data, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs) -> "FakeQuery":
+        self._operation = "upsert"
+        self._payload = data
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or ["id"]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, data: dict, **kwargs) -> "FakeQuery":
+        self._operation = "update"
+        self._payload = data
+        return self
+
+    def delete(self, **kwargs) -> "FakeQuery":
+        self._operation = "delete"
+        return self
+
+    # --- filtros -----------------------------------------------------------
+
+    def _add_filter(self, column: str, op: str, value: Any, negate: bool = False) -> "FakeQuery":
+        self._filters.append(_Filter(column, op, value, negate))
+        return self
+
+    def eq(self, column, value):
+        return self._add_filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._add_filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._add_filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._add_filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._add_filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._add_filter(column, "lte", value)
+
+    def in_(self, column, values: Iterable):
+        return self._add_filter(column, "in", list(values))
+
+    def is_(self, column, value):
+        return self._add_filter(column, "is", value)
+
+    def like(self, column, pattern):
+        return self._add_filter(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._add_filter(column, "ilike", pattern)
+
+    @property
+    def not_(self) -> _Not:
+        return _Not(self)
+
+    # --- modificadores -----------------------------------------------------
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "FakeQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "FakeQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._single = "maybe"
+        return self
+
+    # --- ejecución ---------------------------------------------------------
+
+    def _candidates(self) -> List[dict]:
+        if self._source is not None:
+            return self._source()
+        # Se usa el índice del primer filtro de igualdad (el resto se evalúa fila a fila)
+        for f in self._filters:
+            if f.op == "eq" and not f.negate:
+                return self.client._index(self.table, f.column).get(f.value, [])
+        return self.client.tables[self.table]
+
+    def _matching(self) -> List[dict]:
+        filters = self._filters
+        return [row for row in self._candidates() if all(f.matches(row) for f in filters)]
+
+    def _project(self, row: dict) -> dict:
+        if self._columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in self._columns}
+
+    def execute(self):
+        client = self.client
+        client.query_count += 1
+        client.queries_by_table[self.table] += 1
+        if client.latency_ms:
+            time.sleep(client.latency_ms / 1000)
+
+        if self._source is not None:
+            rows = self._source()
+            if not isinstance(rows, list):
+                return FakeResponse(rows)  # RPC que retorna un valor/JSON
+            self._source = lambda: rows
+
+        if self._operation == "insert":
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            return FakeResponse([dict(client.insert_row(self.table, row)) for row in payload])
+        if self._operation == "upsert":
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            rows = [client.upsert_row(self.table, row, self._on_conflict, self._ignore_duplicates) for row in payload]
+            # ON CONFLICT DO NOTHING: solo retorna las filas insertadas
+            return FakeResponse([dict(row) for row in rows if row is not None])
+        if self._operation == "update":
+            rows = self._matching()
+            client.update_rows(self.table, rows, self._payload)
+            return FakeResponse([dict(row) for row in rows])
+        if self._operation == "delete":
+            rows = self._matching()
+            client.delete_rows(self.table, rows)
+            return FakeResponse([dict(row) for row in rows])
+
+        rows = self._matching()
+        total = len(rows)
+        for column, desc in reversed(self._order):
+            rows = sorted(rows, key=lambda r: _sort_key(r.get(column)), reverse=desc)
+        if self._offset or self._limit is not None:
+            end = None if self._limit is None else self._offset + self._limit
+            rows = rows[self._offset:end]
+        if client.max_rows is not None:
+            rows = rows[:client.max_rows]  # PostgREST recorta a max-rows aunque el limit sea mayor
+        data = [self._project(row) for row in rows]
+        count = total if self._count else None
+
+        if self._single == "single":
+            if len(data) != 1:
+                raise APIError({
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "code": "PGRST116",
+                })
+            return FakeResponse(data[0], count)
+        if self._single == "maybe":
+            if not data:
+                return None  # Igual que postgrest 0.16
+            return FakeResponse(data[0], count)
+        return FakeResponse(data, count)
+
+
+class FakeBucket:
+    def __init__(self, storage: "FakeStorage", name: str):
+        self.storage = storage
+        self.name = name
+
+    def upload(self, path: str, file: bytes, file_options: Optional[dict] = None):
+        self.storage.objects[self.name][path] = file
+        self.storage.created_at[(self.name, path)] = _now_iso()
+        return {"Key": f"{self.name}/{path}"}
+
+    def get_public_url(self, path: str) -> str:
+        return f"https://storage.local/{self.name}/{path}"
+
+    def create_signed_url(self, path: str, expires_in: int, options: Optional[dict] = None) -> dict:
+        self.storage.signed_calls += 1
+        return {"signedURL": f"https://storage.local/object/sign/{self.name}/{path}?token={uuid.uuid4().hex}"}
+
+    def create_signed_urls(self, paths: List[str], expires_in: int, options: Optional[dict] = None) -> List[dict]:
+        self.storage.signed_calls += 1
+        return [
+            {"path": p, "error": None,
+             "signedURL": f"https://storage.local/object/sign/{self.name}/{p}?token={uuid.uuid4().hex}"}
+            for p in paths
+        ]
+
+    def remove(self, paths: List[str]):
+        objects = self.storage.objects[self.name]
+        return [{"name": p} for p in paths if objects.pop(p, None) is not None]
+
+    def create_signed_upload_url(self, path: str) -> dict:
+        token = uuid.uuid4().hex
+        self.storage.upload_tokens[token] = (self.name, path)
+        return {
+            "signed_url": f"https://storage.local/object/upload/sign/{self.name}/{path}?token={token}",
+            "token": token,
+            "path": path,
+        }
+
+    def upload_to_signed_url(self, path: str, token: str, file: bytes, file_options: Optional[dict] = None):
+        if self.storage.upload_tokens.pop(token, None) != (self.name, path):
+            raise Exception("invalid signature")
+        return self.upload(path, file, file_options)
+
+    def list(self, path: Optional[str] = None, options: Optional[dict] = None):
+        """Hijos directos de la carpeta `path` (como Storage: las subcarpetas sin metadata)"""
+        options = options or {}
+        prefix = f"{path.strip('/')}/" if path else ""
+        search = options.get("search", "")
+        entries: Dict[str, Optional[tuple]] = {}
+        for key, content in self.storage.objects[self.name].items():
+            if not key.startswith(prefix):
+                continue
+            name, sep, _ = key[len(prefix):].partition("/")
+            if search and search not in name:
+                continue
+            entries[name] = None if sep else (content, self.storage.created_at.get((self.name, key)))
+        names = sorted(entries)
+        offset = options.get("offset", 0)
+        limit = options.get("limit", 100)
+        return [
+            {"name": n, "id": None, "metadata": None} if entries[n] is None
+            else {"name": n, "id": n, "created_at": entries[n][1], "metadata": {"size": len(entries[n][0])}}
+            for n in names[offset:offset + limit]
+        ]
+
+    def download(self, path: str) -> bytes:
+        return self.storage.objects[self.name][path]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.objects: Dict[str, Dict[str, bytes]] = defaultdict(dict)
+        self.upload_tokens: Dict[str, tuple] = {}
+        self.created_at: Dict[tuple, str] = {}
+        self.signed_calls = 0
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self, bucket)
+
+
+class FakeSupabaseClient:
+    """Base de datos en memoria con la interfaz de supabase.Client"""
+
+    # Valores por defecto de columnas (como en database/schema.sql)
+    DEFAULTS = {
+        "departments": {"status": "available"},
+        "payments": {"status": "pending"},
+        "reports": {"status": "open"},
+        "notifications": {"is_read": False, "count": 1},
+    }
+
+    def __init__(self, latency_ms: float = 0.0, max_rows: Optional[int] = 1000):
+        self.tables: Dict[str, List[dict]] = defaultdict(list)
+        self.latency_ms = latency_ms
+        # db-max-rows de PostgREST (1000 en Supabase); None: sin límite
+        self.max_rows = max_rows
+        self.storage = FakeStorage()
+        self.rpc_functions: Dict[str, Callable[["FakeSupabaseClient", dict], Any]] = {
+            "search_departments": _search_departments,
+            "department_facets": _department_facets,
+            "approve_payment": _approve_payment,
+            "review_payments": _review_payments,
+            "purge_notifications": _purge_notifications,
+            "notify_users": _notify_users,
+        }
+        self._indexes: Dict[str, Dict[str, Dict[Any, List[dict]]]] = defaultdict(dict)
+        self.query_count = 0
+        self.queries_by_table: Counter = Counter()
+
+    # --- API de supabase.Client --------------------------------------------
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[dict] = None) -> FakeQuery:
+        function = self.rpc_functions[fn]
+        return FakeQuery(self, f"rpc/{fn}", source=lambda: function(self, params or {}))
+
+    # --- datos -------------------------------------------------------------
+
+    def reset_counters(self) -> None:
+        self.query_count = 0
+        self.queries_by_table.clear()
+
+    def _index(self, table: str, column: str) -> Dict[Any, List[dict]]:
+        index = self._indexes[table].get(column)
+        if index is None:
+            index = defaultdict(list)
+            for row in self.tables[table]:
+                index[row.get(column)].append(row)
+            self._indexes[table][column] = index
+        return index
+
+    def load(self, table: str, rows: List[dict]) -> None:
+        """Carga masiva (seed): las filas deben traer id y timestamps"""
+        self.tables[table].extend(rows)
+        self._indexes.pop(table, None)
+
+    def insert_row(self, table: str, data: dict) -> dict:
+        now = _now_iso()
+        row = dict(self.DEFAULTS.get(table, {}))
+        row.update({"id": str(uuid.uuid4()), "created_at": now, "updated_at": now})
+        row.update({k: v for k, v in data.items() if v is not None or k not in row})
+        self.tables[table].append(row)
+        for column, index in self._indexes[table].items():
+            index[row.get(column)].append(row)
+        return row
+
+    def upsert_row(self, table: str, data: dict, on_conflict: List[str],
+                   ignore_duplicates: bool = False) -> Optional[dict]:
+        first = on_conflict[0]
+        for row in self._index(table, first).get(data.get(first), []):
+            if all(row.get(c) == data.get(c) for c in on_conflict):
+                if ignore_duplicates:
+                    return None
+                self.update_rows(table, [row], data)
+                return row
+        return self.insert_row(table, data)
+
+    def update_rows(self, table: str, rows: List[dict], data: dict) -> None:
+        now = _now_iso()
+        for row in rows:
+            row.update(data)
+            if "updated_at" in row and "updated_at" not in data:
+                row["updated_at"] = now  # Trigger update_updated_at_column
+        if any(column in data for column in self._indexes[table]):
+            self._indexes.pop(table, None)
+
+    def delete_rows(self, table: str, rows: List[dict]) -> None:
+        if not rows:
+            return
+        doomed = {id(row) for row in rows}
+        self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed]
+        self._indexes.pop(table, None)
+
+
+# ---------------------------------------------------------------------------
+# Funciones RPC (equivalentes en Python de las de database/*.sql)
+# ---------------------------------------------------------------------------
+
+def _search_departments(client: FakeSupabaseClient, params: dict) -> List[dict]:
+    """Versión simplificada de search_departments: prefijos de palabra (AND)"""
+    terms = re.findall(r"([0-9a-z]+):\*", params.get("search_query", ""))
+    word = re.compile(r"[0-9a-z]+")
+    results = []
+    for row in client.tables["departments"]:
+        title_words = word.findall(fold_accents(row.get("title") or ""))
+        words = title_words + word.findall(
+            fold_accents(f"{row.get('address') or ''} {row.get('description') or ''}")
+        )
+        if all(any(w.startswith(t) for w in words) for t in terms):
+            rank = sum(any(w.startswith(t) for w in title_words) for t in terms)
+            results.append((rank, row.get("created_at") or "", row))
+    results.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [row for _, _, row in results]
+
+
+_FACET_FEATURES = ("has_terrace", "has_balcony", "sea_view", "parking", "furnished", "allow_pets")
+
+
+def _department_facets(client: FakeSupabaseClient, params: dict) -> dict:
+    """Versión en memoria de department_facets (database/department_facets.sql)"""
+    query = params.get("p_search_query")
+    source = _search_departments(client, {"search_query": query}) if query else client.tables["departments"]
+    status = params.get("p_status")
+    filters = params.get("p_filters") or {}
+    buckets = params.get("p_price_buckets") or 5
+    bounds = (("min_price", "price", 1), ("max_price", "price", -1), ("min_rooms", "rooms", 1), ("max_rooms", "rooms", -1))
+
+    def matches(row: dict) -> bool:
+        if status is not None and row.get("status") != status:
+            return False
+        if any(filters.get(feature) and not row.get(feature) for feature in _FACET_FEATURES):
+            return False
+        for key, column, sign in bounds:
+            if filters.get(key) is not None and (row.get(column) is None or (row[column] - filters[key]) * sign < 0):
+                return False
+        return True
+
+    rows = [row for row in source if matches(row)]
+    prices = [float(row["price"]) for row in rows if row.get("price") is not None]
+    rooms = Counter(row["rooms"] for row in rows if row.get("rooms") is not None)
+    price_histogram = []
+    if prices:
+        low, high = min(prices), max(prices)
+        width = (high - low) / buckets or 1.0
+        counts = [0] * buckets
+        for price in prices:
+            counts[min(int((price - low) / width), buckets - 1)] += 1
+        price_histogram = [
+            {"min": round(low + i * width, 2), "max": round(low + (i + 1) * width, 2), "count": count}
+            for i, count in enumerate(counts)
+        ]
+    return {
+        "total": len(rows),
+        "features": {feature: sum(1 for row in rows if row.get(feature)) for feature in _FACET_FEATURES},
+        "min_price": min(prices) if prices else None,
+        "max_price": max(prices) if prices else None,
+        "price_histogram": price_histogram,
+        "rooms_histogram": [{"rooms": r, "count": rooms[r]} for r in sorted(rooms)],
+    }
+
+
+def _approve_payment(client: FakeSupabaseClient, params: dict) -> dict:
+    """Versión en memoria de approve_payment (database/approve_payment.sql)"""
+    payments = client._index("payments", "id").get(params["p_payment_id"])
+    if not payments:
+        raise APIError({"message": "payment_not_found", "code": "P0001"})
+    payment = payments[0]
+    if payment["status"] != "pending":
+        return {"payment": dict(payment), "already_reviewed": True, "department_assigned": False}
+    if not payment.get("receipt_url"):
+        raise APIError({"message": "missing_receipt", "code": "P0001"})
+    client.update_rows("payments", [payment], {
+        "status": "approved", "reviewed_by": params["p_reviewed_by"], "updated_at": _now_iso(),
+    })
+    tenant = client._index("users", "id")[payment["tenant_id"]][0]
+    department = (client._index("departments", "id").get(payment["department_id"]) or [{}])[0]
+    assigned = tenant.get("department_id") is None
+    if assigned:
+        client.update_rows("users", [tenant], {"department_id": payment["department_id"]})
+        client.update_rows("departments", [department], {"status": "occupied"})
+    client.insert_row("notifications", {
+        "user_id": tenant["id"], "title": "Pago aprobado", "message": "Tu pago ha sido aprobado",
+        "link": params.get("p_notification_link"), "type": "payment_approved", "is_read": False,
+    })
+    return {
+        "payment": dict(payment),
+        "already_reviewed": False,
+        "tenant_email": tenant.get("email"),
+        "department_title": department.get("title"),
+        "department_assigned": assigned,
+    }
+
+
+def _review_payments(client: FakeSupabaseClient, params: dict) -> List[dict]:
+    """Versión en memoria de review_payments (database/review_payments.sql)"""
+    status = params["p_status"]
+    by_id = client._index("payments", "id")
+    users = client._index("users", "id")
+    departments = client._index("departments", "id")
+    now = _now_iso()
+    results = []
+    assigned_tenants = set()
+    for payment_id in dict.fromkeys(params["p_payment_ids"]):
+        rows = by_id.get(payment_id)
+        if not rows:
+            results.append({"id": payment_id, "result": "not_found"})
+            continue
+        payment = rows[0]
+        tenant = users[payment["tenant_id"]][0]
+        department = (departments.get(payment["department_id"]) or [{}])[0]
+        item = {"id": payment_id, "tenant_email": tenant.get("email"), "department_title": department.get("title"),
+                "department_assigned": False}
+        if payment["status"] != "pending":
+            item["result"] = "already_reviewed"
+        elif status == "approved" and not payment.get("receipt_url"):
+            item["result"] = "missing_receipt"
+        else:
+            data = {"status": status, "reviewed_by": params["p_reviewed_by"], "updated_at": now}
+            if params.get("p_notes"):
+                data["notes"] = params["p_notes"]
+            client.update_rows("payments", [payment], data)
+            if status == "approved" and tenant.get("department_id") is None and tenant["id"] not in assigned_tenants:
+                assigned_tenants.add(tenant["id"])
+                client.update_rows("users", [tenant], {"department_id": payment["department_id"]})
+                client.update_rows("departments", [department], {"status": "occupied"})
+                item["department_assigned"] = True
+            client.insert_row("notifications", {
+                "user_id": tenant["id"],
+                "title": "Pago aprobado" if status == "approved" else "Pago rechazado",
+                "message": "Tu pago ha sido aprobado" if status == "approved"
+                else "Tu pago ha sido rechazado. Revisa el comprobante.",
+                "link": (params.get("p_link_template") or "").replace("{id}", payment_id) or None,
+                "type": f"payment_{status}", "is_read": False,
+            })
+            item["result"] = status
+            item["payment"] = dict(payment)
+        results.append(item)
+    return results
+
+
+def _purge_notifications(client: FakeSupabaseClient, params: dict) -> int:
+    """Versión en memoria de purge_notifications (database/purge_notifications.sql)"""
+    older_than = datetime.fromisoformat(params["p_older_than"])
+    batch = sorted(
+        (n for n in client.tables["notifications"]
+         if n.get("is_read") and datetime.fromisoformat(n["created_at"]) < older_than),
+        key=lambda n: n["created_at"],
+    )[:params.get("p_batch_size", 1000)]
+    if params.get("p_archive"):
+        for row in batch:
+            client.tables["notifications_archive"].append(dict(row, archived_at=_now_iso()))
+    client.delete_rows("notifications", batch)
+    return len(batch)
+
+
+def _notify_users(client: FakeSupabaseClient, params: dict) -> List[dict]:
+    """Versión en memoria de notify_users (database/coalesce_notifications.sql)"""
+    key = params.get("p_coalesce_key")
+    bucket = int(time.time() // max(params.get("p_window_seconds") or 3600, 1)) if key else None
+    existing = client._index("notifications", "user_id")
+    rows = []
+    for user_id in dict.fromkeys(params["p_user_ids"]):
+        data = {"title": params["p_title"], "message": params["p_message"], "link": params.get("p_link"),
+                "type": params.get("p_type")}
+        match = key and next((n for n in existing.get(user_id, [])
+                              if n.get("coalesce_key") == key and n.get("coalesce_bucket") == bucket), None)
+        if match:
+            now = _now_iso()
+            count = 1 if match.get("is_read") else match.get("count", 1) + 1
+            client.update_rows("notifications", [match],
+                               dict(data, count=count, is_read=False, created_at=now, updated_at=now))
+            rows.append(dict(match))
+        else:
+            rows.append(dict(client.insert_row("notifications", dict(
+                data, user_id=user_id, is_read=False, coalesce_key=key, coalesce_bucket=bucket, count=1))))
+    return rows
+
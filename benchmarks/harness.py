@@ -0,0 +1,240 @@
+"""
+Ejecuta cada ruta GET de los blueprints con el test client de Flask sobre un
+FakeSupabaseClient con datos sembrados, y mide:
+
+    - p50 / p95 / media de latencia (ms) después de una petición de calentamiento
+    - llamadas a repositorios por petición (vía las métricas de app.observability)
+    - consultas a la base por petición (contadas por el cliente falso)
+    - pico de memoria asignada durante una petición (tracemalloc)
+"""
+
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from app import create_app
+from app.config import Config
+from app.deps import INSTRUMENTED, PROVIDERS, LazyDependencies
+from app.observability.metrics import OPERATION_METRIC, registry
+
+from .fake_supabase import FakeSupabaseClient
+from .seed import Fixture, Volumes, seed
+
+
+# Rol con el que se ejecuta cada blueprint (None = visitante sin sesión)
+ROLE_BY_BLUEPRINT = {"admin": "admin", "tenant": "tenant"}
+ROLE_OVERRIDES = {"visitor.pay_department": "tenant"}
+SKIP_ENDPOINTS = {"static", "auth.logout"}
+
+# Variantes con query string de rutas importantes
+EXTRA_SCENARIOS: List[Tuple[str, Dict[str, str]]] = [
+    ("visitor.home", {"q": "vista mar"}),
+    ("visitor.home", {"min_price": "400", "max_price": "900", "parking": "1", "furnished": "1"}),
+    ("visitor.home", {"page": "5"}),
+]
+
+
+def build_app(client: FakeSupabaseClient) -> Flask:
+    """App real con todas las dependencias apuntando al cliente en memoria"""
+    from app.repositories.supabase.storage_repo import SupabaseStorageRepository
+
+    app = create_app()
+    app.config.update(SECRET_KEY="benchmarks", QUERY_TRACE=False, TESTING=False)
+    providers = dict(PROVIDERS)
+    providers["client"] = lambda deps: client
+    providers["storage_repo"] = lambda deps: SupabaseStorageRepository(client)
+    providers["receipt_storage_repo"] = lambda deps: SupabaseStorageRepository(
+        client, bucket=Config.RECEIPTS_BUCKET, private=Config.RECEIPTS_PRIVATE
+    )
+    app.config["deps"] = LazyDependencies(providers, INSTRUMENTED)
+    return app
+
+
+def _url_params(endpoint: str, arguments, fixture: Fixture) -> Optional[Dict[str, str]]:
+    values = {
+        "department_id": (
+            fixture.available_department_id if endpoint.startswith("visitor.")
+            else fixture.tenant_department_id
+        ),
+        "payment_id": fixture.payment_id,
+        "report_id": fixture.report_id,
+        "notification_id": fixture.notification_id,
+        "user_id": fixture.tenant_id,
+    }
+    if any(arg not in values for arg in arguments):
+        return None
+    return {arg: values[arg] for arg in arguments}
+
+
+def discover_scenarios(app: Flask, fixture: Fixture) -> List[Dict]:
+    """Una entrada por ruta GET (más EXTRA_SCENARIOS), con su URL y rol"""
+    scenarios = []
+    with app.test_request_context():
+        from flask import url_for
+        for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.endpoint):
+            if rule.endpoint in SKIP_ENDPOINTS or "GET" not in rule.methods:
+                continue
+            params = _url_params(rule.endpoint, rule.arguments, fixture)
+            if params is None:
+                continue
+            blueprint = rule.endpoint.split(".")[0]
+            role = ROLE_OVERRIDES.get(rule.endpoint, ROLE_BY_BLUEPRINT.get(blueprint))
+            scenarios.append({
+                "name": rule.endpoint,
+                "endpoint": rule.endpoint,
+                "url": url_for(rule.endpoint, **params),
+                "role": role,
+            })
+        for endpoint, query in EXTRA_SCENARIOS:
+            query_string = "&".join(f"{k}={v}" for k, v in query.items())
+            scenarios.append({
+                "name": f"{endpoint}?{query_string}",
+                "endpoint": endpoint,
+                "url": url_for(endpoint, **query),
+                "role": ROLE_BY_BLUEPRINT.get(endpoint.split(".")[0]),
+            })
+    return scenarios
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _repo_calls(endpoint: str, iterations: int) -> Dict[str, float]:
+    histograms, _ = registry.snapshot()
+    calls: Dict[str, float] = {}
+    for (metric, labels), values in histograms.items():
+        label = dict(labels)
+        if metric != OPERATION_METRIC or label.get("endpoint") != endpoint:
+            continue
+        if label["component"] == "template":
+            continue
+        calls[f"{label['component']}.{label['operation']}"] = round(values[0] / iterations, 2)
+    return dict(sorted(calls.items()))
+
+
+def run_scenario(
+    app: Flask,
+    client: FakeSupabaseClient,
+    fixture: Fixture,
+    scenario: Dict,
+    iterations: int,
+    time_budget_s: Optional[float] = None,
+) -> Dict:
+    test_client = app.test_client()
+    with test_client.session_transaction() as session:
+        session.clear()
+        if scenario["role"] == "admin":
+            session.update(user_id=fixture.admin_id, user_role="admin", user_email="admin0@pucehogar.test")
+        elif scenario["role"] == "tenant":
+            session.update(user_id=fixture.tenant_id, user_role="tenant", user_email="inquilino0@pucehogar.test")
+
+    # Calentamiento: cachés de servicios, compilación de plantillas, etc.
+    start = time.perf_counter()
+    response = test_client.get(scenario["url"])
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    # Rutas muy lentas (ej: exportar PDF con 50k reportes) se miden menos veces
+    if time_budget_s and cold_ms > 0:
+        iterations = max(3, min(iterations, int(time_budget_s * 1000 / cold_ms)))
+
+    registry.reset()
+    client.reset_counters()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = test_client.get(scenario["url"])
+        timings.append((time.perf_counter() - start) * 1000)
+    repo_calls = _repo_calls(scenario["endpoint"], iterations)
+    queries = client.query_count / iterations
+    queries_by_table = {t: round(n / iterations, 2) for t, n in sorted(client.queries_by_table.items())}
+
+    tracemalloc.start()
+    test_client.get(scenario["url"])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "url": scenario["url"],
+        "role": scenario["role"],
+        "status": response.status_code,
+        "iterations": iterations,
+        "cold_ms": round(cold_ms, 3),
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "repo_calls": repo_calls,
+        "repo_calls_total": round(sum(repo_calls.values()), 2),
+        "queries": round(queries, 2),
+        "queries_by_table": queries_by_table,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(
+    volumes: Volumes,
+    iterations: int = 20,
+    latency_ms: float = 0.0,
+    route_filter: Optional[str] = None,
+    seed_value: int = 42,
+    time_budget_s: Optional[float] = 10.0,
+    log=print,
+) -> Dict:
+    client = FakeSupabaseClient(latency_ms=latency_ms)
+    start = time.perf_counter()
+    fixture = seed(client, volumes, seed_value)
+    log(f"Datos sembrados en {time.perf_counter() - start:.1f} s")
+
+    app = build_app(client)
+    results = {}
+    for scenario in discover_scenarios(app, fixture):
+        if route_filter and route_filter not in scenario["name"]:
+            continue
+        result = run_scenario(app, client, fixture, scenario, iterations, time_budget_s)
+        results[scenario["name"]] = result
+        log(f"{scenario['name']:<55} {result['status']}  p50 {result['p50_ms']:>9.2f} ms  "
+            f"p95 {result['p95_ms']:>9.2f} ms  consultas {result['queries']:>7.1f}")
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "volumes": asdict(volumes),
+            "iterations": iterations,
+            "latency_ms": latency_ms,
+            "seed": seed_value,
+        },
+        "routes": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.2, min_ms: float = 1.0) -> List[Dict]:
+    """
+    Compara dos resultados y retorna las regresiones:
+        - p50 o p95 más de `threshold` (20%) por encima del baseline, y por más de min_ms
+        - más consultas o llamadas a repositorios por petición (son deterministas)
+    """
+    regressions = []
+    for name, before in baseline.get("routes", {}).items():
+        after = current.get("routes", {}).get(name)
+        if after is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            old, new = before[key], after[key]
+            if new - old > min_ms and new > old * (1 + threshold):
+                regressions.append({"route": name, "metric": key, "baseline": old, "current": new})
+        for key in ("queries", "repo_calls_total"):
+            old, new = before.get(key, 0), after.get(key, 0)
+            if new > old:
+                regressions.append({"route": name, "metric": key, "baseline": old, "current": new})
+        if after["status"] != before["status"]:
+            regressions.append({"route": name, "metric": "status", "baseline": before["status"], "current": after["status"]})
+    return regressions
@@ -0,0 +1,104 @@
+"""
+Microbenchmark de hidratación: filas de Supabase -> entidades del dominio.
+
+Mide, para 100k filas de cada tabla, el tiempo de conversión y la memoria que
+ocupan las entidades resultantes (tracemalloc), usando el método masivo
+_rows_to_entities de cada repositorio (o _row_to_entity fila a fila si el
+repositorio no lo tiene).
+
+Uso:
+    python -m benchmarks.hydration
+    python -m benchmarks.hydration --rows 200000 --repeat 5 --json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.supabase.department_repo import SupabaseDepartmentRepository  # noqa: E402
+from app.repositories.supabase.notification_repo import SupabaseNotificationRepository  # noqa: E402
+from app.repositories.supabase.payment_repo import SupabasePaymentRepository  # noqa: E402
+from app.repositories.supabase.rating_repo import SupabaseRatingRepository  # noqa: E402
+from app.repositories.supabase.report_repo import SupabaseReportRepository  # noqa: E402
+from app.repositories.supabase.user_repo import SupabaseUserRepository  # noqa: E402
+
+from .fake_supabase import FakeSupabaseClient  # noqa: E402
+from .seed import Volumes, seed  # noqa: E402
+
+
+REPOSITORIES = {
+    "departments": SupabaseDepartmentRepository,
+    "payments": SupabasePaymentRepository,
+    "reports": SupabaseReportRepository,
+    "ratings": SupabaseRatingRepository,
+    "notifications": SupabaseNotificationRepository,
+    "users": SupabaseUserRepository,
+}
+
+
+def _hydrate(repo, rows):
+    bulk = getattr(repo, "_rows_to_entities", None)
+    if bulk is not None:
+        return bulk(rows)
+    return [repo._row_to_entity(row) for row in rows]
+
+
+def measure(repo, rows, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        entities = _hydrate(repo, rows)
+        timings.append(time.perf_counter() - start)
+        del entities
+
+    gc.collect()
+    tracemalloc.start()
+    entities = _hydrate(repo, rows)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entities
+    return min(timings), memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de convertir filas en entidades")
+    parser.add_argument("--rows", type=int, default=100_000, help="Filas por tabla")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    n = args.rows
+    client = FakeSupabaseClient()
+    seed(client, Volumes(departments=n, payments=n, reports=n, ratings=n, notifications=n, admins=n))
+
+    results = {}
+    for table, repo_class in REPOSITORIES.items():
+        rows = [dict(row) for row in client.tables[table][:n]]
+        # Las filas se multiplican si la tabla sembrada tiene menos de n (ej: users)
+        rows = (rows * (n // len(rows) + 1))[:n]
+        seconds, memory = measure(repo_class(client), rows, args.repeat)
+        results[table] = {
+            "rows": n,
+            "ms": round(seconds * 1000, 1),
+            "us_per_row": round(seconds / n * 1e6, 3),
+            "memory_mb": round(memory / 1024 / 1024, 1),
+            "bytes_per_row": round(memory / n),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'tabla':<15}{'ms':>10}{'µs/fila':>10}{'MB':>9}{'bytes/fila':>12}")
+    for table, r in results.items():
+        print(f"{table:<15}{r['ms']:>10.1f}{r['us_per_row']:>10.3f}{r['memory_mb']:>9.1f}{r['bytes_per_row']:>12}")
+
+
+if __name__ == "__main__":
+    main()
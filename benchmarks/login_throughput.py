@@ -0,0 +1,131 @@
+"""
+Benchmark de inicio de sesión bajo concurrencia.
+
+Lanza `--clients` hilos que hacen login en bucle durante `--seconds` y, en
+paralelo, un hilo que mide una operación liviana (una consulta al cliente en
+memoria, como la de una página pública). Se compara el PasswordHasher con el
+cupo configurado contra uno sin límite práctico (un cupo por cliente):
+
+    - logins por segundo y p50/p95 de latencia del login
+    - logins rechazados con PasswordHasherBusy (503)
+    - p50/p95 de la operación liviana mientras se hashea
+
+Uso:
+    python -m benchmarks.login_throughput
+    python -m benchmarks.login_throughput --clients 32 --concurrency 2 --method pbkdf2:sha256:600000
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repositories.supabase.user_repo import SupabaseUserRepository  # noqa: E402
+from app.services.auth_service import AuthService  # noqa: E402
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy  # noqa: E402
+
+from .fake_supabase import FakeSupabaseClient  # noqa: E402
+from .harness import _percentile  # noqa: E402
+from .seed import Volumes, seed  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+def _summary(timings: List[float], seconds: float) -> Dict:
+    if not timings:
+        return {"count": 0, "per_second": 0.0, "p50_ms": None, "p95_ms": None}
+    return {
+        "count": len(timings),
+        "per_second": round(len(timings) / seconds, 1),
+        "p50_ms": round(_percentile(timings, 50), 2),
+        "p95_ms": round(_percentile(timings, 95), 2),
+    }
+
+
+def measure(client: FakeSupabaseClient, hasher: PasswordHasher, emails: List[str], clients: int, seconds: float) -> Dict:
+    auth_service = AuthService(SupabaseUserRepository(client), hasher)
+    deadline = time.perf_counter() + seconds
+    logins: List[float] = []
+    light: List[float] = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def login_loop(index: int):
+        email = emails[index % len(emails)]
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                auth_service.login(email, PASSWORD)
+            except PasswordHasherBusy:
+                with lock:
+                    rejected[0] += 1
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                logins.append(elapsed)
+
+    def light_loop():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.table("departments").select("*").eq("status", "available").limit(12).execute()
+            light.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(clients)]
+    threads.append(threading.Thread(target=light_loop))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "max_concurrency": hasher.max_concurrency,
+        "login": _summary(logins, seconds),
+        "rejected": rejected[0],
+        "light_operation": _summary(light, seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de login con y sin cupo de hashing")
+    parser.add_argument("--clients", type=int, default=16, help="Hilos haciendo login a la vez")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 2, help="Cupo de hashes simultáneos")
+    parser.add_argument("--method", default="scrypt", help="Método de hash de werkzeug")
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración de cada medición")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    client = FakeSupabaseClient()
+    seed(client, Volumes().scaled(0.01))
+    setup = PasswordHasher(args.method, max_concurrency=args.concurrency)
+    password_hash = setup.hash(PASSWORD)
+    client.update_rows("users", client.tables["users"], {"password_hash": password_hash})
+    emails = [row["email"] for row in client.tables["users"]]
+
+    results = {
+        "capped": measure(client, PasswordHasher(args.method, args.concurrency, args.queue_timeout),
+                          emails, args.clients, args.seconds),
+        "uncapped": measure(client, PasswordHasher(args.method, args.clients, args.queue_timeout),
+                            emails, args.clients, args.seconds),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.clients} clientes, método {setup.prefix}, {args.seconds:.0f} s por medición")
+    print(f"{'modo':<10}{'cupo':>6}{'login/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'503':>6}"
+          f"{'liviana p50':>13}{'p95':>9}")
+    for mode, r in results.items():
+        login, light = r["login"], r["light_operation"]
+        print(f"{mode:<10}{r['max_concurrency']:>6}{login['per_second']:>10}{login['p50_ms'] or 0:>10.1f}"
+              f"{login['p95_ms'] or 0:>10.1f}{r['rejected']:>6}{light['p50_ms'] or 0:>13.2f}{light['p95_ms'] or 0:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
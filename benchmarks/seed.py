@@ -0,0 +1,215 @@
+"""
+Datos sintéticos para los benchmarks.
+
+Genera filas con la misma forma que las tablas de database/schema.sql y las
+carga en un FakeSupabaseClient. Es determinista (semilla fija) para que dos
+corridas con los mismos volúmenes sean comparables.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from .fake_supabase import FakeSupabaseClient
+
+
+@dataclass
+class Volumes:
+    """Cantidad de filas por tabla"""
+    departments: int = 10_000
+    payments: int = 200_000
+    reports: int = 50_000
+    ratings: int = 500_000
+    notifications: int = 20_000
+    admins: int = 3
+
+    @property
+    def tenants(self) -> int:
+        # Un inquilino cada 5 departamentos (el resto disponibles o en mantenimiento)
+        return max(1, self.departments // 5)
+
+    def scaled(self, factor: float) -> "Volumes":
+        return replace(self, **{
+            f.name: max(1, int(getattr(self, f.name) * factor))
+            for f in fields(self) if f.name != "admins"
+        })
+
+
+@dataclass
+class Fixture:
+    """IDs concretos para armar las URLs de las rutas"""
+    admin_id: str
+    tenant_id: str
+    tenant_department_id: str
+    available_department_id: str
+    payment_id: str
+    report_id: str
+    notification_id: str
+
+
+ADJECTIVES = ["Amplio", "Moderno", "Acogedor", "Luminoso", "Céntrico", "Renovado", "Exclusivo", "Tranquilo"]
+KINDS = ["departamento", "suite", "loft", "dúplex", "estudio", "penthouse"]
+SECTORS = ["La Carolina", "Cumbayá", "González Suárez", "La Floresta", "Quitumbe", "El Batán", "Tumbaco", "Salinas"]
+FEATURES_TEXT = ["vista al mar", "balcón", "terraza", "cerca de la universidad", "con parqueadero", "pet friendly"]
+PAYMENT_STATUS = ["approved"] * 7 + ["pending"] * 2 + ["rejected"]
+REPORT_STATUS = ["open", "in_progress", "resolved", "closed"]
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _timestamp(rng: random.Random, days: int = 1000) -> str:
+    return (START + timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+
+def seed(client: FakeSupabaseClient, volumes: Volumes, seed_value: int = 42) -> Fixture:
+    rng = random.Random(seed_value)
+
+    # --- departamentos -----------------------------------------------------
+    departments: List[dict] = []
+    for i in range(volumes.departments):
+        created = _timestamp(rng)
+        sector = rng.choice(SECTORS)
+        feature = rng.choice(FEATURES_TEXT)
+        departments.append({
+            "id": _uuid(rng),
+            "title": f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)} en {sector}",
+            "address": f"Calle {rng.randint(1, 400)} y Av. {sector}",
+            "price": float(rng.randrange(250, 1500, 10)),
+            "status": "available" if rng.random() < 0.85 else "maintenance",
+            "description": f"Departamento {feature}, {rng.randint(1, 4)} habitaciones, cerca de {rng.choice(SECTORS)}.",
+            "rooms": rng.randint(1, 4),
+            "bathrooms": rng.randint(1, 3),
+            "area": float(rng.randrange(35, 220)),
+            "image_url": f"https://storage.local/comprobantes/dept_{i}.jpg" if rng.random() < 0.8 else None,
+            "image_url_2": None,
+            "image_url_3": None,
+            "has_terrace": rng.random() < 0.3,
+            "has_balcony": rng.random() < 0.4,
+            "sea_view": rng.random() < 0.15,
+            "parking": rng.random() < 0.5,
+            "furnished": rng.random() < 0.35,
+            "allow_pets": rng.random() < 0.25,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    # --- usuarios (los primeros departamentos quedan ocupados) -------------
+    users: List[dict] = []
+    for i in range(volumes.admins):
+        created = _timestamp(rng)
+        users.append({
+            "id": _uuid(rng), "email": f"admin{i}@pucehogar.test", "role": "admin",
+            "full_name": f"Admin {i}", "department_id": None, "password_hash": None,
+            "created_at": created, "updated_at": created,
+        })
+    tenants: List[dict] = []
+    for i in range(volumes.tenants):
+        created = _timestamp(rng)
+        department = departments[i % len(departments)]
+        department["status"] = "occupied"
+        tenants.append({
+            "id": _uuid(rng), "email": f"inquilino{i}@pucehogar.test", "role": "tenant",
+            "full_name": f"Inquilino {i}", "department_id": department["id"], "password_hash": None,
+            "created_at": created, "updated_at": created,
+        })
+    users.extend(tenants)
+
+    # --- pagos -------------------------------------------------------------
+    payments: List[dict] = []
+    for i in range(volumes.payments):
+        tenant = tenants[0] if i == 0 else rng.choice(tenants)
+        month_index = rng.randrange(36)
+        month = f"{2023 + month_index // 12}-{month_index % 12 + 1:02d}"
+        created = _timestamp(rng)
+        status = rng.choice(PAYMENT_STATUS)
+        payments.append({
+            "id": _uuid(rng),
+            "tenant_id": tenant["id"],
+            "department_id": tenant["department_id"],
+            "amount": float(rng.randrange(250, 1500, 10)),
+            "status": status,
+            "month": month,
+            "receipt_url": f"https://storage.local/comprobantes/receipt_{i}.pdf",
+            "notes": None,
+            "reviewed_by": users[0]["id"] if status != "pending" else None,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    # --- reportes ----------------------------------------------------------
+    reports: List[dict] = []
+    for i in range(volumes.reports):
+        tenant = tenants[0] if i == 0 else rng.choice(tenants)
+        created = _timestamp(rng)
+        reports.append({
+            "id": _uuid(rng),
+            "tenant_id": tenant["id"],
+            "department_id": tenant["department_id"],
+            "title": f"Problema con {rng.choice(['la ducha', 'la luz', 'el agua', 'la puerta', 'el gas'])}",
+            "description": "Descripción del problema reportado por el inquilino.",
+            "status": rng.choice(REPORT_STATUS),
+            "notes": None,
+            "attachment_url": None,
+            "resolved_by": None,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    # --- calificaciones (un par inquilino-departamento único) --------------
+    pairs = len(tenants) * len(departments)
+    ratings: List[dict] = []
+    for pair in rng.sample(range(pairs), min(volumes.ratings, pairs)):
+        tenant = tenants[pair // len(departments)]
+        department = departments[pair % len(departments)]
+        created = _timestamp(rng)
+        ratings.append({
+            "id": _uuid(rng),
+            "tenant_id": tenant["id"],
+            "department_id": department["id"],
+            "rating": rng.randint(1, 5),
+            "comment": None if rng.random() < 0.7 else "Muy buen lugar",
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    # --- notificaciones ----------------------------------------------------
+    notifications: List[dict] = []
+    for i in range(volumes.notifications):
+        user = tenants[0] if i < 20 else rng.choice(users)
+        notifications.append({
+            "id": _uuid(rng),
+            "user_id": user["id"],
+            "title": "Pago aprobado",
+            "message": "Tu pago fue aprobado.",
+            "link": "/tenant/dashboard",
+            "type": "payment",
+            "is_read": rng.random() < 0.7 and i >= 20,
+            "created_at": _timestamp(rng),
+        })
+
+    tables: Dict[str, List[dict]] = {
+        "departments": departments,
+        "users": users,
+        "payments": payments,
+        "reports": reports,
+        "ratings": ratings,
+        "notifications": notifications,
+    }
+    for name, rows in tables.items():
+        client.load(name, rows)
+
+    available = next((d for d in departments if d["status"] == "available"), departments[-1])
+    return Fixture(
+        admin_id=users[0]["id"],
+        tenant_id=tenants[0]["id"],
+        tenant_department_id=tenants[0]["department_id"],
+        available_department_id=available["id"],
+        payment_id=payments[0]["id"],
+        report_id=reports[0]["id"],
+        notification_id=notifications[0]["id"],
+    )
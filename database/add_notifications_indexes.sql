@@ -0,0 +1,19 @@
+-- ============================================
+-- ÍNDICES DE NOTIFICACIONES
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- La campana de cada página pide las no leídas del usuario, más recientes
+-- primero (user_id + is_read, ORDER BY created_at DESC). El índice parcial
+-- solo contiene las no leídas: se mantiene pequeño aunque la tabla crezca, y
+-- la consulta lo recorre en orden sin ordenar.
+-- El segundo índice (solo leídas, por antigüedad) lo usa el job de retención
+-- (database/purge_notifications.sql) para encontrar cada lote sin recorrer
+-- la tabla.
+
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread
+    ON notifications(user_id, created_at DESC)
+    WHERE NOT is_read;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_read_created
+    ON notifications(created_at)
+    WHERE is_read;
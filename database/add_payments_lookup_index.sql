@@ -0,0 +1,19 @@
+-- ============================================
+-- ÍNDICE PARA CONSULTAS DE PAGO POR INQUILINO Y DEPARTAMENTO
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- La app pregunta "¿el inquilino tiene un pago aprobado de este departamento?"
+-- y "¿cuál es el estado de su último pago?" con consultas limit 1; estos índices
+-- las resuelven sin recorrer el historial de pagos del inquilino.
+
+CREATE INDEX IF NOT EXISTS idx_payments_tenant_department_status
+    ON payments(tenant_id, department_id, status);
+
+-- Último pago (order by created_at desc limit 1): se lee la primera entrada
+-- del índice en lugar de ordenar todos los pagos del par inquilino/departamento
+CREATE INDEX IF NOT EXISTS idx_payments_tenant_department_created
+    ON payments(tenant_id, department_id, created_at DESC);
+
+-- El índice compuesto empieza por tenant_id, así que también sirve para las
+-- consultas por inquilino; el índice simple solo agrega costo a cada escritura
+DROP INDEX IF EXISTS idx_payments_tenant;
@@ -0,0 +1,27 @@
+-- ============================================
+-- CALIFICACIÓN ÚNICA POR INQUILINO Y DEPARTAMENTO
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase si tu tabla ratings
+-- se creó sin la restricción UNIQUE(tenant_id, department_id) de schema.sql.
+-- La app guarda las calificaciones con upsert (on_conflict=tenant_id,department_id),
+-- que necesita esta restricción para funcionar.
+
+-- 1. Eliminar duplicados, conservando la calificación más reciente
+DELETE FROM ratings r
+USING ratings newer
+WHERE r.tenant_id = newer.tenant_id
+  AND r.department_id = newer.department_id
+  AND (r.updated_at, r.id) < (newer.updated_at, newer.id);
+
+-- 2. Agregar la restricción (mismo nombre que genera schema.sql)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'ratings'::regclass
+          AND conname = 'ratings_tenant_id_department_id_key'
+    ) THEN
+        ALTER TABLE ratings
+        ADD CONSTRAINT ratings_tenant_id_department_id_key UNIQUE (tenant_id, department_id);
+    END IF;
+END $$;
@@ -0,0 +1,56 @@
+-- ============================================
+-- BÚSQUEDA DE TEXTO COMPLETO EN DEPARTAMENTOS
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase
+-- para habilitar la búsqueda por título, dirección y descripción (q=)
+
+-- Extensión para ignorar tildes ("balcón" = "balcon")
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- Columna con el documento de búsqueda ya procesado
+ALTER TABLE departments
+ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Mantener search_vector actualizado en cada INSERT/UPDATE.
+-- Se usa un trigger (y no una columna generada) porque unaccent no es IMMUTABLE.
+-- Pesos: título (A) > dirección (B) > descripción (C)
+CREATE OR REPLACE FUNCTION departments_search_vector_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', unaccent(coalesce(NEW.title, ''))), 'A') ||
+        setweight(to_tsvector('spanish', unaccent(coalesce(NEW.address, ''))), 'B') ||
+        setweight(to_tsvector('spanish', unaccent(coalesce(NEW.description, ''))), 'C');
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_departments_search_vector ON departments;
+CREATE TRIGGER update_departments_search_vector
+    BEFORE INSERT OR UPDATE OF title, address, description ON departments
+    FOR EACH ROW EXECUTE FUNCTION departments_search_vector_update();
+
+-- Poblar los departamentos existentes
+UPDATE departments SET search_vector =
+    setweight(to_tsvector('spanish', unaccent(coalesce(title, ''))), 'A') ||
+    setweight(to_tsvector('spanish', unaccent(coalesce(address, ''))), 'B') ||
+    setweight(to_tsvector('spanish', unaccent(coalesce(description, ''))), 'C');
+
+-- Índice GIN para que la búsqueda no recorra toda la tabla
+CREATE INDEX IF NOT EXISTS idx_departments_search ON departments USING GIN (search_vector);
+
+-- Búsqueda ordenada por relevancia.
+-- search_query es un tsquery ya normalizado por la app (ej: 'vista:* & mar:*').
+-- Se expone vía RPC; los filtros de PostgREST (status, precio, características,
+-- paginación) se aplican sobre el resultado, por lo que siguen siendo combinables.
+-- Al ser LANGUAGE sql y STABLE, Postgres puede "inlinear" la función y usar los
+-- índices de la tabla también para esos filtros.
+CREATE OR REPLACE FUNCTION search_departments(search_query TEXT)
+RETURNS SETOF departments
+LANGUAGE sql STABLE
+AS $$
+    SELECT d.*
+    FROM departments d, to_tsquery('spanish', search_query) q
+    WHERE d.search_vector @@ q
+    ORDER BY ts_rank_cd(d.search_vector, q) DESC, d.created_at DESC;
+$$;
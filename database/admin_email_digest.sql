@@ -0,0 +1,22 @@
+-- ============================================
+-- CORREOS RESUMEN PARA ADMINS
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- Cada admin elige en su panel si recibe un correo por cada nuevo
+-- pago/reporte o un resumen periódico (users.email_digest_minutes).
+-- Los eventos de quienes eligen resumen se guardan en email_digest_queue
+-- hasta que el cron (/admin/cron/email-digest o
+-- scripts/send_email_digest.py) los envía en un solo correo y los elimina.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS email_digest_minutes INTEGER CHECK (email_digest_minutes > 0);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS email_digest_sent_at TIMESTAMP WITH TIME ZONE;
+
+CREATE TABLE IF NOT EXISTS email_digest_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_digest_queue_user ON email_digest_queue(user_id, created_at);
@@ -0,0 +1,82 @@
+-- ============================================
+-- APROBACIÓN DE PAGOS EN UNA TRANSACCIÓN
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- La app llama a esta función vía RPC al aprobar un pago; reemplaza la
+-- secuencia de ~10 consultas (leer pago, aprobar, leer inquilino, asignarle el
+-- departamento, marcarlo ocupado, crear la notificación) por una sola llamada
+-- atómica: si algo falla no queda nada a medias.
+--
+-- Errores (la app los traduce a mensajes):
+--   payment_not_found  el pago no existe
+--   missing_receipt    el pago no tiene comprobante
+--
+-- Solo aprueba pagos pendientes: si el pago ya se revisó (doble clic, otro
+-- admin, reintento) no cambia nada ni crea otra notificación y retorna
+-- already_reviewed = true, para que la app tampoco reenvíe el correo.
+--
+-- Retorna JSON:
+--   payment              fila del pago ya aprobado (o tal como estaba si ya se revisó)
+--   already_reviewed     true si el pago no estaba pendiente (no se hizo nada)
+--   tenant_email         email del inquilino (el correo se envía desde la app)
+--   department_title     título del departamento
+--   department_assigned  true si se asignó el departamento y se marcó ocupado
+
+CREATE OR REPLACE FUNCTION approve_payment(
+    p_payment_id UUID,
+    p_reviewed_by UUID,
+    p_notification_link TEXT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_payment payments%ROWTYPE;
+    v_tenant users%ROWTYPE;
+    v_department_title TEXT;
+    v_assigned BOOLEAN := FALSE;
+BEGIN
+    -- Bloquear el pago evita que dos admins lo aprueben a la vez
+    SELECT * INTO v_payment FROM payments WHERE id = p_payment_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'payment_not_found';
+    END IF;
+    IF v_payment.status = 'pending' AND coalesce(v_payment.receipt_url, '') = '' THEN
+        RAISE EXCEPTION 'missing_receipt';
+    END IF;
+
+    UPDATE payments
+    SET status = 'approved', reviewed_by = p_reviewed_by
+    WHERE id = p_payment_id AND status = 'pending'
+    RETURNING * INTO v_payment;
+    IF NOT FOUND THEN
+        RETURN json_build_object(
+            'payment', row_to_json(v_payment),
+            'already_reviewed', TRUE,
+            'department_assigned', FALSE
+        );
+    END IF;
+
+    -- Asignar el departamento al inquilino si aún no tiene uno
+    SELECT * INTO v_tenant FROM users WHERE id = v_payment.tenant_id FOR UPDATE;
+    IF v_tenant.department_id IS NULL THEN
+        UPDATE users SET department_id = v_payment.department_id WHERE id = v_tenant.id;
+        UPDATE departments SET status = 'occupied' WHERE id = v_payment.department_id;
+        v_assigned := TRUE;
+    END IF;
+
+    SELECT title INTO v_department_title FROM departments WHERE id = v_payment.department_id;
+
+    INSERT INTO notifications (user_id, title, message, link, type, is_read)
+    VALUES (v_tenant.id, 'Pago aprobado', 'Tu pago ha sido aprobado',
+            p_notification_link, 'payment_approved', FALSE);
+
+    RETURN json_build_object(
+        'payment', row_to_json(v_payment),
+        'already_reviewed', FALSE,
+        'tenant_email', v_tenant.email,
+        'department_title', v_department_title,
+        'department_assigned', v_assigned
+    );
+END;
+$$;
@@ -0,0 +1,65 @@
+-- ============================================
+-- NOTIFICACIONES AGRUPADAS (COALESCING)
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- Cuando un inquilino registra varios pagos o reportes seguidos, cada admin
+-- recibía una fila por evento. Con una clave de agrupación (ej:
+-- 'payment_created:<tenant_id>'), los eventos con la misma clave dentro de
+-- una ventana de tiempo actualizan una sola fila por usuario: se incrementa
+-- count y se renuevan el mensaje, el link y created_at.
+--
+-- notify_users inserta la notificación para todos los usuarios de
+-- p_user_ids en una sola sentencia (un upsert). Sin p_coalesce_key es un
+-- insert normal (las claves NULL nunca chocan).
+-- La ventana es fija: coalesce_bucket = epoch / p_window_seconds.
+-- Si la fila agrupada ya se leyó, vuelve a no leída con count = 1.
+--
+-- Retorna las filas insertadas o actualizadas.
+
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS coalesce_key TEXT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS coalesce_bucket BIGINT;
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS count INTEGER NOT NULL DEFAULT 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_coalesce
+    ON notifications(user_id, coalesce_key, coalesce_bucket);
+
+CREATE OR REPLACE FUNCTION notify_users(
+    p_user_ids UUID[],
+    p_title TEXT,
+    p_message TEXT,
+    p_link TEXT DEFAULT NULL,
+    p_type TEXT DEFAULT NULL,
+    p_coalesce_key TEXT DEFAULT NULL,
+    p_window_seconds INTEGER DEFAULT 3600
+)
+RETURNS SETOF notifications
+LANGUAGE sql
+AS $$
+    INSERT INTO notifications (user_id, title, message, link, type, is_read, coalesce_key, coalesce_bucket, count)
+    SELECT u.user_id, p_title, p_message, p_link, p_type, FALSE, p_coalesce_key,
+           CASE WHEN p_coalesce_key IS NOT NULL
+                THEN floor(extract(epoch FROM now()) / greatest(p_window_seconds, 1))::bigint END,
+           1
+    FROM (SELECT DISTINCT unnest(p_user_ids) AS user_id) u
+    ON CONFLICT (user_id, coalesce_key, coalesce_bucket) DO UPDATE
+    SET count = CASE WHEN notifications.is_read THEN 1 ELSE notifications.count + 1 END,
+        is_read = FALSE,
+        title = EXCLUDED.title,
+        message = EXCLUDED.message,
+        link = EXCLUDED.link,
+        created_at = NOW(),
+        updated_at = NOW()
+    RETURNING *;
+$$;
+
+-- Con NOTIFICATION_CHANNEL=postgres: avisar también cuando una fila agrupada
+-- se actualiza (el trigger de database/notifications_notify.sql solo cubre INSERT)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'notifications_notify') THEN
+        DROP TRIGGER IF EXISTS notify_notifications_coalesced ON notifications;
+        CREATE TRIGGER notify_notifications_coalesced
+            AFTER UPDATE OF count ON notifications
+            FOR EACH ROW EXECUTE FUNCTION notifications_notify();
+    END IF;
+END $$;
@@ -0,0 +1,107 @@
+-- ============================================
+-- FACETAS DEL CATÁLOGO
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase (después de add_search.sql).
+-- Calcula en la BD los conteos por característica y los histogramas de
+-- precio y habitaciones de los resultados del catálogo: la app recibe un
+-- solo JSON pequeño en lugar de descargar todas las filas que coinciden
+-- (que además PostgREST recorta a max-rows).
+--
+-- p_search_query: tsquery ya normalizado por la app (como search_departments), NULL sin texto
+-- p_status: estado de los departamentos ('available'), NULL para todos
+-- p_filters: los mismos filtros del catálogo, ej:
+--   {"sea_view": true, "min_price": 400, "max_price": 900, "min_rooms": 2}
+-- p_price_buckets: intervalos de igual ancho del histograma de precios
+--
+-- Retorna: total, features (conteo por característica), min_price,
+-- max_price, price_histogram [{min, max, count}] y rooms_histogram [{rooms, count}]
+
+CREATE OR REPLACE FUNCTION department_facets(
+    p_search_query TEXT DEFAULT NULL,
+    p_status TEXT DEFAULT NULL,
+    p_filters JSONB DEFAULT '{}'::jsonb,
+    p_price_buckets INT DEFAULT 5
+)
+RETURNS JSON
+LANGUAGE sql STABLE
+AS $$
+    WITH source AS (
+        SELECT d.* FROM departments d WHERE p_search_query IS NULL
+        UNION ALL
+        SELECT s.* FROM search_departments(p_search_query) s WHERE p_search_query IS NOT NULL
+    ),
+    matching AS (
+        SELECT price, rooms, has_terrace, has_balcony, sea_view, parking, furnished, allow_pets
+        FROM source
+        WHERE (p_status IS NULL OR status = p_status)
+          AND (NOT coalesce((p_filters->>'has_terrace')::boolean, false) OR has_terrace)
+          AND (NOT coalesce((p_filters->>'has_balcony')::boolean, false) OR has_balcony)
+          AND (NOT coalesce((p_filters->>'sea_view')::boolean, false) OR sea_view)
+          AND (NOT coalesce((p_filters->>'parking')::boolean, false) OR parking)
+          AND (NOT coalesce((p_filters->>'furnished')::boolean, false) OR furnished)
+          AND (NOT coalesce((p_filters->>'allow_pets')::boolean, false) OR allow_pets)
+          AND (p_filters->>'min_price' IS NULL OR price >= (p_filters->>'min_price')::numeric)
+          AND (p_filters->>'max_price' IS NULL OR price <= (p_filters->>'max_price')::numeric)
+          AND (p_filters->>'min_rooms' IS NULL OR rooms >= (p_filters->>'min_rooms')::int)
+          AND (p_filters->>'max_rooms' IS NULL OR rooms <= (p_filters->>'max_rooms')::int)
+    ),
+    totals AS (
+        SELECT
+            count(*) AS total,
+            count(*) FILTER (WHERE has_terrace) AS has_terrace,
+            count(*) FILTER (WHERE has_balcony) AS has_balcony,
+            count(*) FILTER (WHERE sea_view) AS sea_view,
+            count(*) FILTER (WHERE parking) AS parking,
+            count(*) FILTER (WHERE furnished) AS furnished,
+            count(*) FILTER (WHERE allow_pets) AS allow_pets,
+            min(price) AS min_price,
+            max(price) AS max_price,
+            -- Con un solo precio todos caen en el primer intervalo
+            coalesce(nullif((max(price) - min(price)) / p_price_buckets, 0), 1) AS width
+        FROM matching
+    ),
+    price_counts AS (
+        -- width_bucket deja el precio máximo en el intervalo n + 1: se junta con el último
+        SELECT
+            CASE WHEN t.max_price > t.min_price
+                 THEN least(width_bucket(m.price, t.min_price, t.max_price, p_price_buckets), p_price_buckets)
+                 ELSE 1 END AS bucket,
+            count(*) AS count
+        FROM matching m, totals t
+        WHERE m.price IS NOT NULL
+        GROUP BY 1
+    ),
+    price_histogram AS (
+        SELECT json_agg(json_build_object(
+                   'min', round(t.min_price + (b.bucket - 1) * t.width, 2),
+                   'max', round(t.min_price + b.bucket * t.width, 2),
+                   'count', coalesce(c.count, 0)
+               ) ORDER BY b.bucket) AS buckets
+        FROM totals t
+        CROSS JOIN generate_series(1, p_price_buckets) AS b(bucket)
+        LEFT JOIN price_counts c ON c.bucket = b.bucket
+        WHERE t.min_price IS NOT NULL
+    ),
+    rooms_histogram AS (
+        SELECT json_agg(json_build_object('rooms', rooms, 'count', count) ORDER BY rooms) AS buckets
+        FROM (
+            SELECT rooms, count(*) AS count FROM matching WHERE rooms IS NOT NULL GROUP BY rooms
+        ) r
+    )
+    SELECT json_build_object(
+        'total', t.total,
+        'features', json_build_object(
+            'has_terrace', t.has_terrace,
+            'has_balcony', t.has_balcony,
+            'sea_view', t.sea_view,
+            'parking', t.parking,
+            'furnished', t.furnished,
+            'allow_pets', t.allow_pets
+        ),
+        'min_price', t.min_price,
+        'max_price', t.max_price,
+        'price_histogram', coalesce(p.buckets, '[]'::json),
+        'rooms_histogram', coalesce(r.buckets, '[]'::json)
+    )
+    FROM totals t, price_histogram p, rooms_histogram r;
+$$;
@@ -0,0 +1,20 @@
+-- ============================================
+-- IDEMPOTENCIA DE FORMULARIOS (PAGOS Y REPORTES)
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- Cada formulario de pago/reporte envía una clave única (idempotency_key).
+-- La primera vez se registra aquí; un reintento con la misma clave (doble
+-- clic, reenvío del navegador) encuentra la fila y responde con el pago o
+-- reporte ya creado (result_id) sin volver a insertarlo ni notificar.
+-- Las claves expiran a las 24 h y la app elimina las expiradas periódicamente.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    scope TEXT NOT NULL,
+    result_id UUID,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW() + INTERVAL '24 hours'
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
@@ -0,0 +1,35 @@
+-- ============================================
+-- AVISO EN VIVO DE NOTIFICACIONES (LISTEN/NOTIFY)
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase si usas
+-- NOTIFICATION_CHANNEL=postgres (varios procesos/instancias de la app).
+-- Cada INSERT en notifications (desde la app o desde funciones como
+-- approve_payment y review_payments) se avisa por el canal
+-- pucehogar_notifications, que escucha cada proceso para empujar la
+-- notificación a los navegadores conectados por SSE.
+
+CREATE OR REPLACE FUNCTION notifications_notify()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('pucehogar_notifications', json_build_object(
+        'id', NEW.id,
+        'user_id', NEW.user_id,
+        'title', NEW.title,
+        'message', NEW.message,
+        'link', NEW.link,
+        'type', NEW.type,
+        'is_read', NEW.is_read,
+        'created_at', NEW.created_at,
+        'count', to_jsonb(NEW) -> 'count'  -- NULL si no se aplicó coalesce_notifications.sql
+    )::text);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS notify_notifications_insert ON notifications;
+CREATE TRIGGER notify_notifications_insert
+    AFTER INSERT ON notifications
+    FOR EACH ROW EXECUTE FUNCTION notifications_notify();
+
+-- Si ya aplicaste database/coalesce_notifications.sql, vuelve a ejecutarlo
+-- después de este script para avisar también de las notificaciones agrupadas.
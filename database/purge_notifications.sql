@@ -0,0 +1,60 @@
+-- ============================================
+-- RETENCIÓN DE NOTIFICACIONES LEÍDAS
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase (después de
+-- database/add_notifications_indexes.sql).
+-- Usada por scripts/purge_notifications.py. Cada llamada elimina como máximo
+-- p_batch_size notificaciones leídas creadas antes de p_older_than (las más
+-- antiguas primero), en su propia transacción: el job llama repetidamente
+-- hasta que un lote sale incompleto, sin bloqueos largos sobre la tabla.
+-- Con p_archive = TRUE las filas se copian a notifications_archive antes de
+-- eliminarse.
+--
+-- Retorna la cantidad de filas eliminadas en el lote.
+
+CREATE TABLE IF NOT EXISTS notifications_archive (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    link TEXT,
+    type TEXT,
+    is_read BOOLEAN NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_archive_user ON notifications_archive(user_id, created_at DESC);
+
+CREATE OR REPLACE FUNCTION purge_notifications(
+    p_older_than TIMESTAMP WITH TIME ZONE,
+    p_batch_size INTEGER DEFAULT 1000,
+    p_archive BOOLEAN DEFAULT FALSE
+)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH batch AS (
+        SELECT id FROM notifications
+        WHERE is_read AND created_at < p_older_than
+        ORDER BY created_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    removed AS (
+        DELETE FROM notifications n
+        USING batch b
+        WHERE n.id = b.id
+        RETURNING n.*
+    ),
+    archived AS (
+        INSERT INTO notifications_archive (id, user_id, title, message, link, type, is_read, created_at, updated_at)
+        SELECT id, user_id, title, message, link, type, is_read, created_at, updated_at
+        FROM removed
+        WHERE p_archive
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id
+    )
+    SELECT count(*)::int FROM removed;
+$$;
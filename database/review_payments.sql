@@ -0,0 +1,100 @@
+-- ============================================
+-- APROBAR / RECHAZAR PAGOS EN LOTE
+-- ============================================
+-- Ejecuta este script en el SQL Editor de Supabase.
+-- Usada por las acciones masivas de la lista de pagos del panel de admin.
+-- Una sola sentencia (y transacción) para todo el lote, sin importar cuántos
+-- pagos se seleccionen:
+--   - actualiza el estado de los pagos pendientes seleccionados (aprobar exige comprobante)
+--   - al aprobar, asigna el departamento a los inquilinos que no tienen uno
+--     (si un inquilino tiene varios pagos en el lote, el más antiguo) y marca
+--     esos departamentos como ocupados
+--   - inserta las notificaciones de todos los pagos revisados
+--
+-- p_status: 'approved' o 'rejected'
+-- p_link_template: link de la notificación, '{id}' se reemplaza por el ID del pago
+--
+-- Retorna un arreglo JSON con un elemento por pago solicitado:
+--   id, result ('approved' | 'rejected' | 'not_found' | 'already_reviewed' | 'missing_receipt'),
+--   payment (fila del pago si se revisó), tenant_email, department_title,
+--   department_assigned
+
+CREATE OR REPLACE FUNCTION review_payments(
+    p_payment_ids UUID[],
+    p_status TEXT,
+    p_reviewed_by UUID,
+    p_notes TEXT DEFAULT NULL,
+    p_link_template TEXT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+AS $$
+    WITH requested AS (
+        SELECT DISTINCT unnest(p_payment_ids) AS id
+    ),
+    locked AS (
+        SELECT p.* FROM payments p
+        WHERE p.id IN (SELECT id FROM requested)
+        FOR UPDATE
+    ),
+    reviewed AS (
+        UPDATE payments p
+        SET status = p_status,
+            reviewed_by = p_reviewed_by,
+            notes = coalesce(nullif(p_notes, ''), p.notes)
+        FROM locked l
+        WHERE p.id = l.id
+          AND l.status = 'pending'
+          AND (p_status <> 'approved' OR coalesce(l.receipt_url, '') <> '')
+        RETURNING p.*
+    ),
+    to_assign AS (
+        SELECT DISTINCT ON (r.tenant_id) r.id AS payment_id, r.tenant_id, r.department_id
+        FROM reviewed r
+        JOIN users u ON u.id = r.tenant_id
+        WHERE p_status = 'approved' AND u.department_id IS NULL
+        ORDER BY r.tenant_id, r.created_at
+    ),
+    assigned AS (
+        UPDATE users u SET department_id = t.department_id
+        FROM to_assign t
+        WHERE u.id = t.tenant_id
+        RETURNING u.id
+    ),
+    occupied AS (
+        UPDATE departments d SET status = 'occupied'
+        WHERE d.id IN (SELECT department_id FROM to_assign)
+        RETURNING d.id
+    ),
+    notified AS (
+        INSERT INTO notifications (user_id, title, message, link, type, is_read)
+        SELECT r.tenant_id,
+               CASE WHEN p_status = 'approved' THEN 'Pago aprobado' ELSE 'Pago rechazado' END,
+               CASE WHEN p_status = 'approved' THEN 'Tu pago ha sido aprobado'
+                    ELSE 'Tu pago ha sido rechazado. Revisa el comprobante.' END,
+               replace(p_link_template, '{id}', r.id::text),
+               'payment_' || p_status,
+               FALSE
+        FROM reviewed r
+        RETURNING id
+    )
+    SELECT coalesce(json_agg(json_build_object(
+        'id', q.id,
+        'result', CASE
+            WHEN l.id IS NULL THEN 'not_found'
+            WHEN r.id IS NOT NULL THEN p_status
+            WHEN l.status <> 'pending' THEN 'already_reviewed'
+            ELSE 'missing_receipt'
+        END,
+        'payment', CASE WHEN r.id IS NOT NULL THEN row_to_json(r) END,
+        'tenant_email', u.email,
+        'department_title', d.title,
+        'department_assigned', t.payment_id IS NOT NULL
+    )), '[]'::json)
+    FROM requested q
+    LEFT JOIN locked l ON l.id = q.id
+    LEFT JOIN reviewed r ON r.id = q.id
+    LEFT JOIN users u ON u.id = l.tenant_id
+    LEFT JOIN departments d ON d.id = l.department_id
+    LEFT JOIN to_assign t ON t.payment_id = q.id;
+$$;
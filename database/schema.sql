@@ -10,6 +10,8 @@ CREATE TABLE IF NOT EXISTS users (
     role TEXT NOT NULL CHECK (role IN ('admin', 'tenant', 'visitor')),
     full_name TEXT,
     department_id UUID REFERENCES departments(id) ON DELETE SET NULL,
+    email_digest_minutes INTEGER CHECK (email_digest_minutes > 0), -- Admins: correo resumen (NULL = uno por evento)
+    email_digest_sent_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -70,11 +72,47 @@ CREATE TABLE IF NOT EXISTS ratings (
     UNIQUE(tenant_id, department_id) -- Un usuario solo puede calificar un departamento una vez
 );
 
+-- Tabla de notificaciones
+CREATE TABLE IF NOT EXISTS notifications (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    link TEXT,
+    type TEXT,
+    is_read BOOLEAN NOT NULL DEFAULT FALSE,
+    coalesce_key TEXT, -- Agrupa eventos repetidos (ver database/coalesce_notifications.sql)
+    coalesce_bucket BIGINT,
+    count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Cola de eventos de los correos resumen de admins
+CREATE TABLE IF NOT EXISTS email_digest_queue (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Claves de idempotencia de los formularios de pago/reporte (ver database/idempotency_keys.sql)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    scope TEXT NOT NULL,
+    result_id UUID,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW() + INTERVAL '24 hours'
+);
+
 -- Índices para mejorar rendimiento
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_department ON users(department_id);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
-CREATE INDEX IF NOT EXISTS idx_payments_tenant ON payments(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_payments_tenant_department_status ON payments(tenant_id, department_id, status);
+CREATE INDEX IF NOT EXISTS idx_payments_tenant_department_created ON payments(tenant_id, department_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
 CREATE INDEX IF NOT EXISTS idx_payments_month ON payments(month);
 CREATE INDEX IF NOT EXISTS idx_reports_tenant ON reports(tenant_id);
@@ -82,6 +120,11 @@ CREATE INDEX IF NOT EXISTS idx_reports_status ON reports(status);
 CREATE INDEX IF NOT EXISTS idx_departments_status ON departments(status);
 CREATE INDEX IF NOT EXISTS idx_ratings_department ON ratings(department_id);
 CREATE INDEX IF NOT EXISTS idx_ratings_tenant ON ratings(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread ON notifications(user_id, created_at DESC) WHERE NOT is_read;
+CREATE INDEX IF NOT EXISTS idx_notifications_read_created ON notifications(created_at) WHERE is_read;
+CREATE INDEX IF NOT EXISTS idx_email_digest_queue_user ON email_digest_queue(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_coalesce ON notifications(user_id, coalesce_key, coalesce_bucket);
 
 -- Función para actualizar updated_at automáticamente
 CREATE OR REPLACE FUNCTION update_updated_at_column()
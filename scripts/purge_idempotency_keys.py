@@ -0,0 +1,46 @@
+"""
+Elimina las claves de idempotencia expiradas (tabla idempotency_keys)
+
+Alternativa al cron de Vercel (/admin/cron/email-digest, que también las
+elimina) para un servidor propio o un worker programado.
+
+Uso:
+    python scripts/purge_idempotency_keys.py
+    python scripts/purge_idempotency_keys.py --json
+
+Ejemplo de cron (a diario a las 4:00):
+    0 4 * * * cd /ruta/al/proyecto && python scripts/purge_idempotency_keys.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.deps import build_dependencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elimina las claves de idempotencia expiradas")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    deps = build_dependencies()
+    idempotency_service = deps.get("idempotency_service")
+    try:
+        purged = idempotency_service.purge_expired()
+    except Exception as e:
+        print(f"❌ Error al eliminar las claves expiradas: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({"purged": purged}))
+    else:
+        print(f"{purged} clave(s) de idempotencia expiradas eliminadas")
+
+
+if __name__ == "__main__":
+    main()
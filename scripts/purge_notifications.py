@@ -0,0 +1,77 @@
+"""
+Job de retención de notificaciones
+
+Elimina (o archiva en notifications_archive) las notificaciones leídas más
+antiguas que N días, en lotes acotados: cada lote es una llamada a la función
+purge_notifications (database/purge_notifications.sql) con su propia
+transacción corta. Las no leídas nunca se eliminan.
+
+Uso:
+    python scripts/purge_notifications.py
+    python scripts/purge_notifications.py --days 30 --batch-size 500 --archive
+    python scripts/purge_notifications.py --max-batches 20 --pause 0.5 --json
+
+Pensado para ejecutarse periódicamente (cron). Sale con código 1 si falla un
+lote; las filas de los lotes anteriores ya quedaron eliminadas.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.deps import build_dependencies
+from app.services.notification_service import RETENTION_BATCH_SIZE, RETENTION_DAYS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elimina o archiva notificaciones leídas antiguas")
+    parser.add_argument("--days", type=int, default=int(os.getenv("NOTIFICATION_RETENTION_DAYS", RETENTION_DAYS)),
+                        help=f"Antigüedad mínima en días (por defecto {RETENTION_DAYS} o NOTIFICATION_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE, help="Filas por lote")
+    parser.add_argument("--max-batches", type=int, default=None, help="Detenerse después de N lotes")
+    parser.add_argument("--pause", type=float, default=0.0, help="Segundos de espera entre lotes")
+    parser.add_argument("--archive", action="store_true", help="Copiar a notifications_archive antes de eliminar")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    deps = build_dependencies()
+    notification_service = deps.get("notification_service")
+    try:
+        result = notification_service.purge_read(
+            older_than_days=args.days,
+            batch_size=args.batch_size,
+            archive=args.archive,
+            max_batches=args.max_batches,
+            pause=args.pause,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    except Exception as e:
+        print(f"❌ Error en el job de retención: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({
+            "older_than": result.older_than.isoformat(),
+            "removed": result.removed,
+            "batches": result.batches,
+            "seconds": round(result.seconds, 3),
+            "archived": result.archived,
+            "complete": result.complete,
+        }))
+        return
+
+    action = "archivadas" if result.archived else "eliminadas"
+    print(f"Notificaciones leídas anteriores a {result.older_than:%Y-%m-%d %H:%M} UTC")
+    print(f"  {result.removed} {action} en {result.batches} lote(s), {result.seconds:.2f}s")
+    if not result.complete:
+        print("  ⚠️  Se alcanzó --max-batches; quedan notificaciones por procesar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Envía los correos resumen pendientes de los admins
+
+Alternativa al cron de Vercel (/admin/cron/email-digest) para un servidor
+propio o un worker programado. Envía un correo a cada admin cuyo intervalo
+(users.email_digest_minutes) se cumplió y que tiene eventos en la cola.
+
+Uso:
+    python scripts/send_email_digest.py
+    python scripts/send_email_digest.py --json
+
+Ejemplo de cron (cada 15 minutos):
+    */15 * * * * cd /ruta/al/proyecto && python scripts/send_email_digest.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.deps import build_dependencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Envía los correos resumen pendientes de los admins")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    deps = build_dependencies()
+    email_digest_service = deps.get("email_digest_service")
+    if not email_digest_service.email_service.enabled:
+        print("⚠️  SMTP no configurado: los eventos quedan en la cola")
+    try:
+        result = email_digest_service.send_due()
+    except Exception as e:
+        print(f"❌ Error al enviar los resúmenes: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({
+            "sent": result.sent,
+            "events": result.events,
+            "failed": result.failed,
+            "seconds": round(result.seconds, 3),
+        }))
+    else:
+        print(f"{result.sent} resumen(es) enviados con {result.events} evento(s) en {result.seconds:.2f}s")
+        if result.failed:
+            print(f"⚠️  {result.failed} envío(s) fallaron; sus eventos volvieron a la cola")
+    if result.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
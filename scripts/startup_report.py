@@ -0,0 +1,134 @@
+"""
+Reporte de tiempos de arranque en frío (cold start)
+
+Importa el punto de entrada de Vercel (api/index.py) en un proceso nuevo con
+`python -X importtime`, y muestra:
+    - Tiempo total de import + create_app()
+    - El tiempo de import agrupado por paquete y los módulos más lentos
+    - Qué dependencias se construyeron durante el arranque (deberían ser ninguna)
+
+Uso:
+    python scripts/startup_report.py
+    python scripts/startup_report.py --top 30 --budget-ms 600
+    python scripts/startup_report.py --json > startup.json
+
+Sale con código 1 si el tiempo total supera el presupuesto (--budget-ms o
+la variable de entorno COLD_START_BUDGET_MS), para poder usarlo en CI.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1500"))
+
+# Código que se ejecuta en el proceso hijo: mide el import de api.index
+# (que llama a create_app) y reporta las dependencias construidas.
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+from api.index import app
+elapsed_ms = (time.perf_counter() - start) * 1000
+deps = app.config.get("deps")
+built = deps.built() if hasattr(deps, "built") else sorted(deps or {})
+print(json.dumps({"elapsed_ms": elapsed_ms, "built": built}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str):
+    """Convierte la salida de -X importtime en una lista de módulos"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # Cada nivel de anidamiento agrega dos espacios
+            "depth": (len(indent) - 1) // 2,
+        })
+    return modules
+
+
+def run_report():
+    env = dict(os.environ)
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"❌ Falló el arranque de la app (código {proc.returncode})")
+
+    summary = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    return summary, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de tiempos de arranque en frío")
+    parser.add_argument("--top", type=int, default=20, help="Cantidad de módulos a mostrar")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Presupuesto de arranque en ms (default: COLD_START_BUDGET_MS o 1500)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    summary, modules = run_report()
+    # Tiempo propio agrupado por paquete raíz (flask, supabase, app, ...)
+    packages = {}
+    for m in modules:
+        root = m["module"].split(".")[0]
+        packages[root] = packages.get(root, 0.0) + m["self_ms"]
+    top_packages = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    top_modules = sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:args.top]
+    import_total_ms = sum(m["self_ms"] for m in modules)
+    over_budget = summary["elapsed_ms"] > args.budget_ms
+
+    if args.json:
+        print(json.dumps({
+            "elapsed_ms": round(summary["elapsed_ms"], 2),
+            "import_ms": round(import_total_ms, 2),
+            "budget_ms": args.budget_ms,
+            "over_budget": over_budget,
+            "built_dependencies": summary["built"],
+            "packages": [{"package": name, "self_ms": round(ms, 2)} for name, ms in top_packages],
+            "modules": top_modules,
+        }, indent=2))
+    else:
+        print("=" * 60)
+        print("  REPORTE DE ARRANQUE EN FRÍO")
+        print("=" * 60)
+        print(f"Import + create_app(): {summary['elapsed_ms']:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+        print(f"Tiempo total de imports: {import_total_ms:.1f} ms")
+        built = ", ".join(summary["built"]) or "ninguna"
+        print(f"Dependencias construidas al arrancar: {built}")
+        print()
+        print(f"{'propio (ms)':>12}  paquete")
+        for name, ms in top_packages:
+            print(f"{ms:>12.1f}  {name}")
+        print()
+        print(f"{'propio (ms)':>12} {'acumulado (ms)':>15}  módulo")
+        for m in top_modules:
+            print(f"{m['self_ms']:>12.1f} {m['cumulative_ms']:>15.1f}  {m['module']}")
+        print()
+        print("❌ Fuera de presupuesto" if over_budget else "✅ Dentro del presupuesto")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Recolector de objetos huérfanos de Storage
+
+Elimina los archivos de los buckets (STORAGE_BUCKET y RECEIPTS_BUCKET) que
+ninguna fila referencia (departments.image_url*, payments.receipt_url,
+reports.attachment_url) y que tienen más de --grace-hours horas. Los
+buckets se listan por páginas y se eliminan en lotes de --batch-size
+objetos (un remove() por lote). Con --dry-run solo muestra qué eliminaría.
+
+Uso:
+    python scripts/storage_gc.py --dry-run
+    python scripts/storage_gc.py --grace-hours 48 --batch-size 100
+    python scripts/storage_gc.py --max-delete 500 --json
+
+Pensado para ejecutarse periódicamente (cron). Sale con código 1 si falla la
+lectura de referencias o el listado; en ese caso no se elimina nada.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.deps import build_dependencies
+from app.services.storage_gc import GC_BATCH_SIZE, GC_GRACE_HOURS, GC_PAGE_SIZE
+
+
+def _size(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB" if n >= 1024 * 1024 else f"{n / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elimina objetos de Storage que ninguna fila referencia")
+    parser.add_argument("--grace-hours", type=float, default=GC_GRACE_HOURS,
+                        help=f"Conservar los objetos más recientes que N horas (por defecto {GC_GRACE_HOURS})")
+    parser.add_argument("--batch-size", type=int, default=GC_BATCH_SIZE, help="Objetos por llamada a remove()")
+    parser.add_argument("--page-size", type=int, default=GC_PAGE_SIZE, help="Objetos/filas por página al listar")
+    parser.add_argument("--max-delete", type=int, default=None, help="Eliminar como máximo N objetos")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué se eliminaría")
+    parser.add_argument("--verbose", action="store_true", help="Listar cada objeto huérfano")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    deps = build_dependencies()
+    storage_gc_service = deps.get("storage_gc_service")
+    try:
+        result = storage_gc_service.collect(
+            grace_hours=args.grace_hours,
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+            page_size=args.page_size,
+            max_delete=args.max_delete,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    except Exception as e:
+        print(f"❌ Error en el recolector de Storage: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({
+            "older_than": result.older_than.isoformat(),
+            "dry_run": result.dry_run,
+            "references": result.references,
+            "seconds": round(result.seconds, 3),
+            "complete": result.complete,
+            "buckets": [
+                {
+                    "bucket": b.bucket,
+                    "scanned": b.scanned,
+                    "referenced": b.referenced,
+                    "recent": b.recent,
+                    "orphans": len(b.orphans),
+                    "orphan_bytes": b.orphan_bytes,
+                    "deleted": b.deleted,
+                    **({"paths": b.orphans} if args.verbose else {}),
+                }
+                for b in result.buckets
+            ],
+        }))
+        return
+
+    mode = " (simulación, no se eliminó nada)" if result.dry_run else ""
+    print(f"Objetos sin referencias anteriores a {result.older_than:%Y-%m-%d %H:%M} UTC{mode}")
+    print(f"  {result.references} referencias leídas de la BD, {result.seconds:.2f}s")
+    for b in result.buckets:
+        print(f"  [{b.bucket}] {b.scanned} objetos: {b.referenced} referenciados, {b.recent} recientes, "
+              f"{len(b.orphans)} huérfanos ({_size(b.orphan_bytes)}), {b.deleted} eliminados")
+        if args.verbose:
+            for path in b.orphans:
+                print(f"    - {path}")
+    if not result.complete:
+        print("  ⚠️  Se alcanzó --max-delete; quedan objetos por procesar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Pruebas de la aprobación de un pago contra el cliente falso de benchmarks/
+(versión en memoria de database/approve_payment.sql): aprobar dos veces no
+repite la notificación ni el correo al inquilino.
+"""
+
+import unittest
+
+from benchmarks.fake_supabase import FakeSupabaseClient
+from benchmarks.harness import build_app
+
+
+class ApprovePaymentTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeSupabaseClient()
+        admin = self.client.insert_row("users", {"email": "admin@correo.cl", "full_name": "Admin", "role": "admin"})
+        tenant = self.client.insert_row("users", {"email": "inquilino@correo.cl", "full_name": "Inquilino", "role": "tenant"})
+        department = self.client.insert_row("departments", {
+            "title": "Depto", "address": "Calle", "price": 500, "status": "available",
+        })
+        self.payment = self.client.insert_row("payments", {
+            "tenant_id": tenant["id"], "department_id": department["id"], "amount": 500,
+            "month": "2026-10", "status": "pending", "receipt_url": "uploads/recibo.pdf",
+        })
+        self.app = build_app(self.client)
+        self.emails = []
+        email_service = self.app.config["deps"].get("email_service")
+        email_service.send_email_async = lambda to, subject, body: self.emails.append((to, subject))
+        self.http = self.app.test_client()
+        with self.http.session_transaction() as session:
+            session.update(user_id=admin["id"], user_role="admin", user_email=admin["email"])
+
+    def approve(self):
+        return self.http.post(f"/admin/payment/{self.payment['id']}/approve")
+
+    def notifications(self):
+        return [n for n in self.client.tables["notifications"] if n["type"] == "payment_approved"]
+
+    def test_second_approval_is_a_no_op(self):
+        self.assertEqual(self.approve().status_code, 302)
+        self.assertEqual(self.payment["status"], "approved")
+        self.assertEqual(len(self.notifications()), 1)
+        self.assertEqual(self.emails, [(["inquilino@correo.cl"], "Pago aprobado")])
+
+        self.approve()
+        self.assertEqual(len(self.notifications()), 1)
+        self.assertEqual(len(self.emails), 1)
+        with self.http.session_transaction() as session:
+            self.assertIn(("warning", "El pago ya había sido revisado"), session["_flashes"])
+
+    def test_rejected_payment_is_not_approved(self):
+        self.client.update_rows("payments", [self.payment], {"status": "rejected"})
+        approval = self.app.config["deps"].get("payment_service").approve_payment(self.payment["id"], "admin")
+        self.assertTrue(approval.already_reviewed)
+        self.assertEqual(self.payment["status"], "rejected")
+        self.assertEqual(self.notifications(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
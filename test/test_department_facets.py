@@ -0,0 +1,51 @@
+"""
+Pruebas de las facetas del catálogo (función department_facets) contra el
+cliente falso de benchmarks/: con la función disponible y sin ella.
+"""
+
+import unittest
+
+from app.services.department_service import DepartmentService
+from app.repositories.supabase.department_repo import SupabaseDepartmentRepository
+from benchmarks.fake_supabase import FakeSupabaseClient
+from benchmarks.harness import build_app
+
+
+class DepartmentFacetsTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeSupabaseClient()
+        for i in range(4):
+            self.client.insert_row("departments", {
+                "title": f"Depto {i}", "address": "Calle", "price": 100 + 50 * i,
+                "rooms": i % 2 + 1, "parking": i % 2 == 0, "status": "available",
+            })
+        self.service = DepartmentService(SupabaseDepartmentRepository(client=self.client))
+        self.app = build_app(self.client)
+
+    def catalog(self) -> str:
+        response = self.app.test_client().get("/")
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=True)
+
+    def test_counts_from_rpc(self):
+        facets = self.service.get_facets()
+        self.assertEqual(facets["total"], 4)
+        self.assertEqual(facets["features"]["parking"], 2)
+        self.assertIn("Estacionamiento <span class=\"text-muted small\">(2)</span>", self.catalog())
+
+    def test_no_results_is_not_a_failure(self):
+        facets = self.service.get_facets(filters={"min_price": 10000})
+        self.assertEqual(facets["total"], 0)
+        self.assertEqual(facets["price_histogram"], [])
+
+    def test_missing_rpc_hides_counts(self):
+        del self.client.rpc_functions["department_facets"]
+        self.assertIsNone(self.service.get_facets())
+        html = self.catalog()
+        self.assertIn("Estacionamiento", html)
+        self.assertNotIn("(0)", html)
+        self.assertNotIn("Precios entre", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Pruebas de las opciones de resumen para admins con el cron diario de Vercel
+(DIGEST_CRON_DAILY): no se ofrecen ni se aceptan intervalos menores a un día.
+"""
+
+import unittest
+
+from app.services.email_digest import DIGEST_INTERVALS, EmailDigestService
+
+
+class StubUserRepository:
+    def __init__(self):
+        self.saved = {}
+
+    def set_email_digest(self, user_id, minutes):
+        self.saved[user_id] = minutes
+        return True
+
+
+class DigestIntervalsTest(unittest.TestCase):
+    def service(self, cron_daily):
+        self.user_repo = StubUserRepository()
+        return EmailDigestService(None, self.user_repo, None, cron_daily=cron_daily)
+
+    def test_daily_cron_hides_sub_daily_options(self):
+        service = self.service(cron_daily=True)
+        self.assertEqual(sorted(service.intervals), [0, 1440])
+        for minutes in (60, 240):
+            with self.assertRaises(ValueError):
+                service.set_preference("admin", minutes)
+        self.assertTrue(service.set_preference("admin", 1440))
+        self.assertEqual(self.user_repo.saved, {"admin": 1440})
+
+    def test_saved_sub_daily_preference_shows_as_daily(self):
+        service = self.service(cron_daily=True)
+        self.assertEqual(service.effective_minutes(60), 1440)
+        self.assertEqual(service.effective_minutes(None), 0)
+
+    def test_frequent_cron_keeps_all_options(self):
+        service = self.service(cron_daily=False)
+        self.assertEqual(service.intervals, DIGEST_INTERVALS)
+        self.assertTrue(service.set_preference("admin", 60))
+        self.assertEqual(service.effective_minutes(60), 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Pruebas del envío por lotes de EmailService con un servidor SMTP falso:
+todos los correos del lote deben ir en una sola conexión.
+"""
+
+import smtplib
+import unittest
+from unittest import mock
+
+from app.observability.metrics import registry
+from app.services.email_service import EmailService
+
+
+class FakeSMTP:
+    connections = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        FakeSMTP.connections.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        if msg["To"] == "rechazado@correo.cl":
+            raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"no")})
+        self.sent.append(msg["To"])
+
+
+class EmailBatchTest(unittest.TestCase):
+    def setUp(self):
+        FakeSMTP.connections = []
+        self.service = EmailService()
+        self.service.host, self.service.port = "smtp.correo.cl", 587
+        self.service.user = self.service.from_email = "app@correo.cl"
+        self.service.password = "clave"
+        self.service.background = False
+        patcher = mock.patch("app.services.email_service.smtplib.SMTP", FakeSMTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_uses_one_connection(self):
+        emails = [([f"inquilino{i}@correo.cl"], "Pago aprobado", "ok") for i in range(5)]
+        self.assertEqual(self.service.send_many_async(emails).result(), 5)
+        self.assertEqual(len(FakeSMTP.connections), 1)
+        self.assertEqual(len(FakeSMTP.connections[0].sent), 5)
+
+    def test_refused_recipient_does_not_stop_the_batch(self):
+        emails = [
+            (["rechazado@correo.cl"], "Pago rechazado", "x"),
+            (["invalido"], "Pago rechazado", "x"),
+            (["inquilino@correo.cl"], "Pago rechazado", "x"),
+        ]
+        self.assertEqual(self.service.send_many(emails), 1)
+        self.assertEqual(FakeSMTP.connections[0].sent, ["inquilino@correo.cl"])
+
+    def test_send_email_is_a_batch_of_one(self):
+        self.assertTrue(self.service.send_email(["inquilino@correo.cl"], "Asunto", "Cuerpo"))
+        self.assertFalse(self.service.send_email(["invalido"], "Asunto", "Cuerpo"))
+        self.assertEqual(len(FakeSMTP.connections), 1)
+
+    def test_background_sends_are_measured(self):
+        self.service.background = True
+        labels = 'component="email_service",operation="{}",endpoint="-"'
+        before = registry.render()
+        self.assertTrue(self.service.send_email_async(["inquilino@correo.cl"], "Asunto", "Cuerpo").result())
+        self.assertEqual(self.service.send_many_async([(["otro@correo.cl"], "Asunto", "Cuerpo")]).result(), 1)
+        after = registry.render()
+        for operation in ("send_email", "send_many"):
+            count = f"pucehogar_operation_duration_seconds_count{{{labels.format(operation)}}}"
+            self.assertIn(count, after)
+            self.assertGreater(_value(after, count), _value(before, count))
+
+
+def _value(rendered: str, series: str) -> float:
+    for line in rendered.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+if __name__ == "__main__":
+    unittest.main()
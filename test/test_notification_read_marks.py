@@ -0,0 +1,48 @@
+"""
+Pruebas de las marcas de leído en lote: un ?notif_id= que no es UUID no
+entra al buffer (Postgres rechazaría el UPDATE ... IN (...) de todo el lote).
+"""
+
+import unittest
+import uuid
+
+from app.services.notification_service import NotificationService
+from app.services.read_mark_buffer import ReadMarkBuffer
+
+
+class StubNotificationRepository:
+    def __init__(self):
+        self.batches = []
+
+    def mark_many_as_read(self, user_id, notification_ids):
+        for notification_id in notification_ids:
+            uuid.UUID(notification_id)  # Como Postgres: un ID inválido rechaza el lote
+        self.batches.append((user_id, sorted(notification_ids)))
+        return len(notification_ids)
+
+    def mark_as_read(self, notification_id, user_id):
+        return True
+
+
+class ReadMarksTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = StubNotificationRepository()
+        self.buffer = ReadMarkBuffer(self.repo.mark_many_as_read, max_size=100, interval=60, log=lambda m: None)
+        self.service = NotificationService(self.repo, read_buffer=self.buffer)
+
+    def test_invalid_id_is_not_buffered(self):
+        valid = [str(uuid.uuid4()) for _ in range(2)]
+        for notification_id in valid:
+            self.assertTrue(self.service.mark_as_read(notification_id, "u1", defer=True))
+        for invalid in ("abc", "1 OR 1=1", ""):
+            self.assertFalse(self.service.mark_as_read(invalid, "u1", defer=True))
+        self.assertEqual(self.buffer.pending_for("u1"), set(valid))
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.repo.batches, [("u1", sorted(valid))])
+
+    def test_invalid_id_is_not_written_directly(self):
+        self.assertFalse(self.service.mark_as_read("abc", "u1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
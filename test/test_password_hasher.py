@@ -0,0 +1,33 @@
+"""
+Pruebas del prefijo de PasswordHasher: se obtiene del método configurado sin
+hashear, así que needs_rehash() no ocupa cupo ni puede lanzar PasswordHasherBusy.
+"""
+
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from app.services.password_hasher import PasswordHasher, method_prefix
+
+
+class PasswordHasherPrefixTest(unittest.TestCase):
+    def test_prefix_matches_werkzeug(self):
+        for method in ("scrypt", "scrypt:16384:8:1", "pbkdf2", "pbkdf2:sha512", "pbkdf2:sha256:1000"):
+            with self.subTest(method=method):
+                stored = generate_password_hash("secreto", method)
+                self.assertEqual(method_prefix(method), stored.split("$", 1)[0])
+
+    def test_needs_rehash_without_free_slot(self):
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", max_concurrency=1, queue_timeout=0.01)
+        current = generate_password_hash("secreto", "pbkdf2:sha256:1000")
+        old = generate_password_hash("secreto", "pbkdf2:sha256:500")
+        hasher._slots.acquire()
+        try:
+            self.assertFalse(hasher.needs_rehash(current))
+            self.assertTrue(hasher.needs_rehash(old))
+        finally:
+            hasher._slots.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Pruebas de la detección de N+1: consultas reales de postgrest contra un
+transporte de httpx falso, hechas desde una ruta de Flask en modo testing.
+"""
+
+import inspect
+import json
+import unittest
+
+import httpx
+from flask import Flask
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+from app.observability import query_trace
+from app.observability.query_trace import NPlusOneQueryError
+from app.repositories.supabase.department_repo import SupabaseDepartmentRepository
+
+BASE_URL = "http://supabase.test/rest/v1"
+THRESHOLD = 3
+
+
+def _respond(request: httpx.Request) -> httpx.Response:
+    department_id = request.url.params.get("id", "eq.").split(".", 1)[1]
+    return httpx.Response(200, json={"id": department_id, "title": "Depto", "price": 100, "status": "available"})
+
+
+class StubSupabaseClient:
+    """Lo mínimo del cliente de Supabase que usan los repositorios y query_trace.install"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.postgrest = SyncPostgrestClient(BASE_URL)
+        self.postgrest.session = SyncClient(
+            base_url=BASE_URL, headers=self.postgrest.session.headers, transport=transport
+        )
+
+    def table(self, name: str):
+        return self.postgrest.from_(name)
+
+
+def _line_of(function, text: str) -> int:
+    lines, start = inspect.getsourcelines(function)
+    return start + next(i for i, line in enumerate(lines) if text in line)
+
+
+class QueryTraceTest(unittest.TestCase):
+    def setUp(self):
+        self.client = StubSupabaseClient(httpx.MockTransport(_respond))
+        query_trace.install(self.client)
+        repo = SupabaseDepartmentRepository(client=self.client)
+
+        self.app = Flask(__name__)
+        self.app.testing = True
+        self.app.config.update(QUERY_TRACE=True, QUERY_REPEAT_THRESHOLD=THRESHOLD)
+        query_trace.init_app(self.app)
+
+        @self.app.route("/departments/<int:count>")
+        def departments(count):
+            found = [repo.get_by_id(f"d{i}") for i in range(count)]
+            return json.dumps(len([d for d in found if d]))
+
+    def test_under_threshold_passes(self):
+        response = self.app.test_client().get(f"/departments/{THRESHOLD}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_queries_raise_with_call_site(self):
+        with self.assertRaises(NPlusOneQueryError) as raised:
+            self.app.test_client().get(f"/departments/{THRESHOLD + 2}")
+        message = str(raised.exception)
+        self.assertIn("GET departments?id=eq.?", message)
+        self.assertIn(f"x{THRESHOLD + 2}", message)
+        line = _line_of(SupabaseDepartmentRepository.get_by_id, ".execute()")
+        self.assertIn(f"app/repositories/supabase/department_repo.py:{line} get_by_id", message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Pruebas de RecommendationService contra el cliente falso de benchmarks/:
+carga fuera del lock, actualización de una sola fila e invalidación parcial
+del top-k cacheado.
+"""
+
+import unittest
+from dataclasses import replace
+
+from app.domain.enums import DepartmentStatus
+from app.repositories.supabase.department_repo import SupabaseDepartmentRepository
+from app.services.recommendation_service import RecommendationService
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+
+class RecommendationServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeSupabaseClient()
+        self.repo = SupabaseDepartmentRepository(client=self.client)
+        # Dos grupos bien separados: baratos de 1 habitación y caros de 4
+        for i in range(6):
+            cheap = i < 3
+            self.client.insert_row("departments", {
+                "title": f"Depto {i}", "address": "Calle", "price": 100 + i if cheap else 900 + i,
+                "rooms": 1 if cheap else 4, "parking": not cheap, "status": "available",
+            })
+        self.ids = [row["id"] for row in self.client.tables["departments"]]
+        self.service = RecommendationService(self.repo, top_k=2, version_check_seconds=3600)
+
+    def department(self, index):
+        return self.repo.get_by_id(self.ids[index])
+
+    def similar_ids(self, index):
+        return [d.id for d in self.service.get_similar(self.department(index))]
+
+    def test_load_does_not_hold_the_lock(self):
+        held = []
+        get_all_paged = self.repo.get_all_paged
+
+        def checked(*args, **kwargs):
+            held.append(self.service._lock.locked())
+            return get_all_paged(*args, **kwargs)
+
+        self.repo.get_all_paged = checked
+        self.assertEqual(set(self.similar_ids(0)), {self.ids[1], self.ids[2]})
+        self.assertEqual(held, [False])
+
+    def test_save_updates_the_row_and_keeps_unaffected_cache(self):
+        self.assertEqual(set(self.similar_ids(0)), {self.ids[1], self.ids[2]})
+        self.assertEqual(set(self.similar_ids(3)), {self.ids[4], self.ids[5]})
+        cached = self.service._cache[self.ids[3]]
+
+        # El depto 5 pasa a ser barato: sale del top de 3 y entra en el de 0
+        moved = replace(self.department(5), price=101.5, rooms=1, parking=False)
+        self.service.on_department_saved(moved)
+        self.assertNotIn(self.ids[3], self.service._cache)
+        self.assertIn(self.ids[5], self.similar_ids(0))
+        self.assertNotIn(self.ids[5], self.similar_ids(3))
+        self.assertIsNot(self.service._cache[self.ids[3]], cached)
+
+    def test_unrelated_change_keeps_cache(self):
+        self.similar_ids(0)
+        cached = self.service._cache[self.ids[0]]
+        # Un caro que sigue siendo caro no puede entrar en el top de los baratos
+        self.service.on_department_saved(replace(self.department(4), price=950))
+        self.assertIs(self.service._cache[self.ids[0]], cached)
+
+    def test_occupied_and_deleted_leave_the_matrix(self):
+        self.assertIn(self.ids[1], self.similar_ids(0))
+        self.service.on_department_saved(replace(self.department(1), status=DepartmentStatus.OCCUPIED))
+        self.assertNotIn(self.ids[1], self.similar_ids(0))
+        self.service.on_department_deleted(self.ids[2])
+        self.assertNotIn(self.ids[2], self.similar_ids(0))
+        self.assertEqual(len(self.service._ids), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
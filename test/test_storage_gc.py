@@ -0,0 +1,80 @@
+"""
+Pruebas del recolector de objetos huérfanos de Storage contra el cliente
+falso de benchmarks/, con un max-rows menor al tamaño de página pedido
+(como PostgREST: la respuesta se recorta aunque el limit sea mayor).
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.supabase.department_repo import SupabaseDepartmentRepository
+from app.repositories.supabase.payment_repo import SupabasePaymentRepository
+from app.repositories.supabase.report_repo import SupabaseReportRepository
+from app.repositories.supabase.storage_repo import SupabaseStorageRepository
+from app.repositories.supabase.streaming import IncompleteReadError
+from app.services.storage_gc import StorageGCService
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+BUCKET = "comprobantes"
+MAX_ROWS = 5
+
+
+class StorageGCTest(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeSupabaseClient(max_rows=MAX_ROWS)
+        self.storage_repo = SupabaseStorageRepository(client=self.client, bucket=BUCKET)
+        self.payment_repo = SupabasePaymentRepository(client=self.client)
+        self.service = StorageGCService(
+            [self.storage_repo],
+            SupabaseDepartmentRepository(client=self.client),
+            self.payment_repo,
+            SupabaseReportRepository(client=self.client),
+            log=lambda message: None,
+        )
+        bucket = self.client.storage.from_(BUCKET)
+        # Más pagos que max-rows: la lectura de referencias recibe páginas cortas
+        self.referenced = [f"receipt_{i:02d}.pdf" for i in range(3 * MAX_ROWS + 2)]
+        for i, path in enumerate(self.referenced):
+            bucket.upload(path, b"%PDF-1.4")
+            reference = bucket.get_public_url(path) if i % 2 else path
+            self.client.insert_row("payments", {"user_id": "u1", "amount": 100, "receipt_url": reference})
+        self.orphans = ["orphan_a.pdf", "orphan_b.pdf"]
+        for path in self.orphans:
+            bucket.upload(path, b"%PDF-1.4")
+        self.later = datetime.now(timezone.utc) + timedelta(days=2)
+
+    def objects(self):
+        return set(self.client.storage.objects[BUCKET])
+
+    def test_short_pages_do_not_end_the_read(self):
+        values = list(self.payment_repo.iter_receipt_urls(page_size=4 * MAX_ROWS))
+        self.assertEqual(len(values), len(self.referenced))
+
+    def test_collect_keeps_references_beyond_max_rows(self):
+        result = self.service.collect(page_size=4 * MAX_ROWS, now=self.later)
+        self.assertEqual(result.references, len(self.referenced))
+        self.assertEqual(sorted(result.buckets[0].orphans), self.orphans)
+        self.assertEqual(self.objects(), set(self.referenced))
+
+    def test_incomplete_read_raises(self):
+        values = self.payment_repo.iter_receipt_urls(page_size=MAX_ROWS)
+        next(values)
+        # Fila insertada durante la lectura con un id anterior al cursor
+        self.client.insert_row("payments", {"id": "", "user_id": "u1", "amount": 1, "receipt_url": "late.pdf"})
+        with self.assertRaises(IncompleteReadError):
+            list(values)
+
+    def test_collect_deletes_nothing_if_references_are_incomplete(self):
+        def truncated(page_size):
+            yield self.referenced[0]
+            raise IncompleteReadError("payments")
+
+        self.payment_repo.iter_receipt_urls = truncated
+        before = self.objects()
+        with self.assertRaises(IncompleteReadError):
+            self.service.collect(now=self.later)
+        self.assertEqual(self.objects(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()